@@ -1,19 +1,32 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import requests
-import json
-import os
-import sqlite3
-from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
-from collections.abc import Iterable as IterableABC, Mapping as MappingABC
-
-from datetime import datetime, timezone, timedelta
+import contextlib
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from datetime import datetime
 from zoneinfo import ZoneInfo
 import pandas as pd
-import html as _html
 import textwrap
 
+from superleague import cache, config, highlights, live, metrics, odds, render, sleeper, standings, teams, ttl
+from superleague.config import (
+    LIVE_POLL_SECONDS,
+    MAX_SEASON_WEEKS,
+    RENDER_MODE,
+    load_leagues_from_env_var,
+    load_leagues_from_file,
+    normalize_league_mapping,
+)
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except Exception:  # pragma: no cover - older/newer Streamlit layouts
+    add_script_run_ctx = None
+    get_script_run_ctx = None
+
 # Configure the page
 st.set_page_config(
     page_title="316 Super League",
@@ -21,41 +34,7 @@ st.set_page_config(
     layout="wide"
 )
 
-# League configuration
-LEAGUES_ENV_VAR = "SL_LEAGUES"
-LEAGUES_FILE_ENV_VAR = "SL_LEAGUES_FILE"
-DEFAULT_LEAGUES_FILENAME = "leagues.json"
-
-
-def _normalize_league_mapping(raw: Any) -> Dict[str, str]:
-    if isinstance(raw, MappingABC):
-        result: Dict[str, str] = {}
-        for name, league_id in raw.items():
-            if league_id is None:
-                continue
-            league_id_str = str(league_id).strip()
-            if not league_id_str:
-                continue
-            result[str(name)] = league_id_str
-        return result
-    if isinstance(raw, IterableABC) and not isinstance(raw, (str, bytes, bytearray)):
-        normalized: Dict[str, str] = {}
-        for item in raw:
-            if isinstance(item, MappingABC):
-                name = item.get("name") or item.get("league") or item.get("label")
-                league_id = item.get("id") or item.get("league_id")
-                if name and league_id:
-                    league_id_str = str(league_id).strip()
-                    if league_id_str:
-                        normalized[str(name)] = league_id_str
-            elif isinstance(item, (list, tuple)) and len(item) >= 2:
-                name, league_id = item[0], item[1]
-                if league_id:
-                    league_id_str = str(league_id).strip()
-                    if league_id_str:
-                        normalized[str(name)] = league_id_str
-        return normalized
-    return {}
+# League configuration (secrets first, then SL_LEAGUES, then leagues.json; see superleague.config)
 
 
 def _load_leagues_from_secrets() -> Dict[str, str]:
@@ -81,64 +60,11 @@ def _load_leagues_from_secrets() -> Dict[str, str]:
                 raw = None
     if raw is None:
         return {}
-    return _normalize_league_mapping(raw)
-
-
-def _load_leagues_from_env_var() -> Dict[str, str]:
-    try:
-        raw_json = os.environ.get(LEAGUES_ENV_VAR)
-    except Exception:
-        raw_json = None
-    if not raw_json:
-        return {}
-    try:
-        data = json.loads(raw_json)
-    except Exception:
-        return {}
-    return _normalize_league_mapping(data)
-
-
-def _load_leagues_from_file() -> Dict[str, str]:
-    candidates = []
-    try:
-        env_path = os.environ.get(LEAGUES_FILE_ENV_VAR)
-    except Exception:
-        env_path = None
-    if env_path:
-        try:
-            candidate = Path(env_path).expanduser()
-            if not candidate.is_absolute():
-                candidate = Path.cwd() / candidate
-            candidates.append(candidate)
-        except Exception:
-            pass
-    default_path = Path(__file__).with_name(DEFAULT_LEAGUES_FILENAME)
-    if default_path.exists():
-        candidates.append(default_path)
-    seen = set()
-    for candidate in candidates:
-        try:
-            resolved = candidate.resolve()
-        except Exception:
-            resolved = candidate
-        if resolved in seen:
-            continue
-        seen.add(resolved)
-        try:
-            with candidate.open("r", encoding="utf-8") as handle:
-                data = json.load(handle)
-        except FileNotFoundError:
-            continue
-        except Exception:
-            continue
-        normalized = _normalize_league_mapping(data)
-        if normalized:
-            return normalized
-    return {}
+    return normalize_league_mapping(raw)
 
 
 def _load_leagues_from_sources() -> Dict[str, str]:
-    loaders = (_load_leagues_from_secrets, _load_leagues_from_env_var, _load_leagues_from_file)
+    loaders = (_load_leagues_from_secrets, load_leagues_from_env_var, load_leagues_from_file)
     for loader in loaders:
         try:
             leagues = loader()
@@ -150,735 +76,208 @@ def _load_leagues_from_sources() -> Dict[str, str]:
 
 
 LEAGUES = _load_leagues_from_sources()
-CACHE_TTL_SECONDS = 43200
-NFL_STATE_TTL_SECONDS = 3600
-CACHE_ENV_VAR = "SL_CACHE_DB_PATH"
-_NULL_SENTINEL = "__NULL__"
 
-try:
-    _CACHE_DB_PATH_VALUE = os.environ.get(CACHE_ENV_VAR)
-except Exception:
-    _CACHE_DB_PATH_VALUE = None
 
-if _CACHE_DB_PATH_VALUE:
-    try:
-        _candidate = Path(_CACHE_DB_PATH_VALUE).expanduser()
-        if not _candidate.is_absolute():
-            _candidate = Path.cwd() / _candidate
-        CACHE_DB_PATH: Optional[Path] = _candidate
-    except Exception:
-        CACHE_DB_PATH = None
-else:
-    CACHE_DB_PATH = None
+def _attach_script_ctx_initializer() -> Optional[Callable[[], None]]:
+    """Return a thread initializer that attaches the current Streamlit script context, if there is one.
 
-
-@st.cache_resource(show_spinner=False)
-def _get_db_connection(db_path: Optional[str]):
-    if not db_path:
+    Worker threads then behave like the script thread, so cached fetchers can still report errors into the page.
+    """
+    if get_script_run_ctx is None or add_script_run_ctx is None:
         return None
-    path_obj = Path(db_path)
     try:
-        path_obj.parent.mkdir(parents=True, exist_ok=True)
+        ctx = get_script_run_ctx()
     except Exception:
-        pass
-
-    conn = sqlite3.connect(path_obj, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    with conn:
-        conn.execute("PRAGMA foreign_keys = ON;")
-    _initialize_database(conn)
-    return conn
+        ctx = None
+    if ctx is None:
+        return None
 
+    def _attach_ctx():
+        try:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        except Exception:
+            pass
 
-def get_db_connection():
-    if CACHE_DB_PATH is None:
-        return None
-    return _get_db_connection(str(CACHE_DB_PATH))
-
-
-def _initialize_database(conn: sqlite3.Connection) -> None:
-    schema = """
-    CREATE TABLE IF NOT EXISTS league (
-        league_id TEXT PRIMARY KEY,
-        name TEXT,
-        season INTEGER,
-        status TEXT,
-        raw_payload TEXT NOT NULL,
-        fetched_at TEXT NOT NULL
-    );
-    CREATE TABLE IF NOT EXISTS user (
-        user_id TEXT PRIMARY KEY,
-        display_name TEXT,
-        username TEXT,
-        team_name TEXT,
-        avatar TEXT,
-        raw_payload TEXT NOT NULL,
-        fetched_at TEXT NOT NULL
-    );
-    CREATE TABLE IF NOT EXISTS league_user (
-        league_id TEXT NOT NULL,
-        user_id TEXT NOT NULL,
-        role TEXT,
-        is_owner INTEGER DEFAULT 0,
-        fetched_at TEXT NOT NULL,
-        PRIMARY KEY (league_id, user_id),
-        FOREIGN KEY (league_id) REFERENCES league(league_id) ON DELETE CASCADE,
-        FOREIGN KEY (user_id) REFERENCES user(user_id) ON DELETE CASCADE
-    );
-    CREATE TABLE IF NOT EXISTS roster (
-        league_id TEXT NOT NULL,
-        roster_id INTEGER NOT NULL,
-        owner_id TEXT,
-        wins INTEGER,
-        losses INTEGER,
-        ties INTEGER,
-        points_for REAL,
-        points_against REAL,
-        settings_json TEXT,
-        metadata_json TEXT,
-        raw_payload TEXT NOT NULL,
-        fetched_at TEXT NOT NULL,
-        PRIMARY KEY (league_id, roster_id)
-    );
-    CREATE TABLE IF NOT EXISTS matchup (
-        league_id TEXT NOT NULL,
-        week INTEGER NOT NULL,
-        matchup_id INTEGER NOT NULL,
-        roster_id INTEGER NOT NULL,
-        points REAL,
-        projected_points REAL,
-        is_playoff INTEGER,
-        is_consolation INTEGER,
-        players_json TEXT,
-        raw_payload TEXT NOT NULL,
-        fetched_at TEXT NOT NULL,
-        PRIMARY KEY (league_id, week, matchup_id, roster_id)
-    );
-    CREATE TABLE IF NOT EXISTS fetch_log (
-        endpoint TEXT NOT NULL,
-        league_key TEXT NOT NULL,
-        week_key TEXT NOT NULL,
-        status_code INTEGER,
-        error TEXT,
-        fetched_at TEXT NOT NULL,
-        PRIMARY KEY (endpoint, league_key, week_key)
-    );
-    CREATE TABLE IF NOT EXISTS nfl_state (
-        state_key TEXT PRIMARY KEY,
-        payload TEXT NOT NULL,
-        fetched_at TEXT NOT NULL
-    );
-    CREATE INDEX IF NOT EXISTS idx_matchup_league_week ON matchup(league_id, week);
-    CREATE INDEX IF NOT EXISTS idx_roster_league_owner ON roster(league_id, owner_id);
-    """
-    with conn:
-        conn.executescript(schema)
+    return _attach_ctx
 
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+def _run_parallel(tasks: Iterable[Callable[[], Any]], max_workers: Optional[int] = None) -> list:
+    return sleeper.run_parallel(tasks, max_workers=max_workers, initializer=_attach_script_ctx_initializer())
 
 
-def _parse_iso(value: Optional[str]) -> Optional[datetime]:
-    if not value:
-        return None
-    try:
-        if value.endswith("Z"):
-            value = value[:-1] + "+00:00"
-        return datetime.fromisoformat(value)
-    except Exception:
-        return None
+class RefreshGenerations:
+    """Background refreshes per fetch key, bumped by `_invalidate_streamlit_caches` (see `_freshness_epoch`)."""
 
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[tuple, int] = {}
 
-def _is_fresh(fetched_at: Optional[str], ttl_seconds: int) -> bool:
-    stamp = _parse_iso(fetched_at)
-    if stamp is None:
-        return False
-    return datetime.now(timezone.utc) - stamp <= timedelta(seconds=ttl_seconds)
+    def bump(self, key: tuple) -> None:
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
 
+    def total(self, keys: Iterable[tuple]) -> int:
+        with self.lock:
+            return sum(self.counts.get(key, 0) for key in keys)
 
-def _normalize_key(value: Optional[Any]) -> str:
-    if value is None:
-        return _NULL_SENTINEL
-    return str(value)
 
+@st.cache_resource
+def _refresh_generations() -> RefreshGenerations:
+    return RefreshGenerations()
 
-def _get_cached_timestamp(conn: sqlite3.Connection, endpoint: str, league_key: str, week_key: str) -> Optional[str]:
-    cur = conn.execute(
-        "SELECT fetched_at FROM fetch_log WHERE endpoint = ? AND league_key = ? AND week_key = ?",
-        (endpoint, league_key, week_key),
-    )
-    row = cur.fetchone()
-    return row['fetched_at'] if row else None
 
+# Process-wide (module globals are recreated on every rerun); bound once per run so the refresher thread never
+# needs a script context to reach it
+REFRESH_GENERATIONS = _refresh_generations()
 
-def _record_fetch_log(conn: sqlite3.Connection, endpoint: str, league_key: str, week_key: str, status_code: Optional[int], error: Optional[str] = None) -> None:
-    with conn:
-        conn.execute(
-            "INSERT OR REPLACE INTO fetch_log (endpoint, league_key, week_key, status_code, error, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (endpoint, league_key, week_key, status_code, error, _now_iso()),
-        )
 
+# Cache data for 12 hours (43200 seconds)
+@st.cache_data(ttl=43200)
+def _fetch_league_info(league_id, epoch):
+    """`fetch_league_info` for one freshness slot."""
+    result = sleeper.fetch_resource('league', league_id)
+    if result.data is None and result.error is not None:
+        st.error(f"Error fetching league info: {result.error}")
+    return result.data
 
-def _json_dumps(payload: Any) -> str:
-    return json.dumps(payload, separators=(",", ":"))
 
+def fetch_league_info(league_id):
+    """Fetch basic league information"""
+    return _fetch_league_info(league_id, _freshness_epoch('league', league_id=league_id))
 
-def _load_cached_json(conn: sqlite3.Connection, query: str, params: Iterable[Any]) -> Optional[Any]:
-    try:
-        cur = conn.execute(query, tuple(params))
-        row = cur.fetchone()
-    except Exception:
-        return None
-    if not row:
-        return None
-    try:
-        payload = row["raw_payload"]
-    except Exception:
-        try:
-            payload = row[0]
-        except Exception:
-            return None
-    try:
-        return json.loads(payload)
-    except Exception:
-        return None
 
+def _freshness_epoch(endpoint, weeks=(None,), league_id=None):
+    """`(slot, generation)` for an endpoint's keys: the current TTL-long time slot (the shortest TTL among `weeks`)
+    and how often those keys of `league_id` were refreshed in the background.
 
-def _ensure_league_stub(conn: sqlite3.Connection, league_id: str) -> None:
-    try:
-        with conn:
-            conn.execute(
-                "INSERT OR IGNORE INTO league (league_id, name, season, status, raw_payload, fetched_at) VALUES (?, NULL, NULL, NULL, ?, ?)",
-                (str(league_id), _json_dumps({}), _now_iso()),
-            )
-    except Exception:
-        pass
+    Every fetcher takes it as an extra argument, so its `st.cache_data` entries roll over as often as the SQLite
+    cache revalidates them (see `superleague.ttl`): every minute for the current week during games, every 12 hours
+    on a Tuesday, and as soon as a background refresh changed one of its keys. The NFL state's own slot is judged by
+    the last state fetched, since it cannot ask for itself.
+    """
+    state = LAST_NFL_STATE['state'] if endpoint == 'nfl_state' else fetch_nfl_state()
+    ttl = min(sleeper.ttl_for(endpoint, week=week, state=state) for week in weeks)
+    generation = REFRESH_GENERATIONS.total(sleeper.fetch_key(endpoint, league_id, week) for week in weeks)
+    return int(time.time() // max(ttl, 1)), generation
 
 
-def _to_int(value: Any) -> Optional[int]:
-    try:
-        if value is None:
-            return None
-        return int(value)
-    except (TypeError, ValueError):
-        return None
+@st.cache_data(ttl=43200, max_entries=256)
+def _fetch_rosters(league_id, epoch):
+    """`fetch_rosters` for one freshness slot."""
+    result = sleeper.fetch_summary('rosters', league_id)
+    if result.data is None and result.error is not None:
+        st.error(f"Error fetching rosters: {result.error}")
+    return result.data
 
 
-def _to_float(value: Any) -> Optional[float]:
-    try:
-        if value is None:
-            return None
-        return float(value)
-    except (TypeError, ValueError):
-        return None
+def fetch_rosters(league_id):
+    """Fetch rosters for a league (roster_id, owner_id and the standings settings only)"""
+    return _fetch_rosters(league_id, _freshness_epoch('rosters', league_id=league_id))
 
+@st.cache_data(ttl=43200)
+def _fetch_users(league_id, epoch):
+    """`fetch_users` for one freshness slot."""
+    result = sleeper.fetch_summary('users', league_id)
+    if result.data is None and result.error is not None:
+        st.error(f"Error fetching users: {result.error}")
+    return result.data
 
-def _to_bool(value: Any) -> Optional[bool]:
-    if isinstance(value, bool):
-        return value
-    if isinstance(value, (int, float)):
-        return bool(value)
-    if isinstance(value, str):
-        lowered = value.strip().lower()
-        if lowered in {"true", "1", "yes", "y", "t"}:
-            return True
-        if lowered in {"false", "0", "no", "n", "f"}:
-            return False
-    return None
 
+def fetch_users(league_id):
+    """Fetch users for a league (user_id, display_name, username and metadata.team_name only)"""
+    return _fetch_users(league_id, _freshness_epoch('users', league_id=league_id))
 
-def _load_cached_matchups(conn: sqlite3.Connection, league_id: str, week: int) -> Optional[list]:
-    try:
-        cur = conn.execute(
-            "SELECT raw_payload FROM matchup WHERE league_id = ? AND week = ? ORDER BY matchup_id, roster_id",
-            (str(league_id), int(week)),
-        )
-        rows = cur.fetchall()
-    except Exception:
-        return None
-    if not rows:
-        return None
-    items: list = []
-    for row in rows:
-        try:
-            items.append(json.loads(row['raw_payload']))
-        except Exception:
-            continue
-    return items or None
+@st.cache_data(ttl=43200, show_spinner=False)
+def _fetch_team_index(league_id, epoch):
+    """`fetch_team_index` for one rosters + users freshness slot."""
+    return teams.TeamIndex(fetch_rosters(league_id) or [], fetch_users(league_id) or [])
 
 
-def _store_matchups(conn: sqlite3.Connection, league_id: str, week: int, items: Iterable[Any]) -> Optional[list]:
-    normalized_items = []
-    fetched_at = _now_iso()
-    try:
-        with conn:
-            conn.execute(
-                "DELETE FROM matchup WHERE league_id = ? AND week = ?",
-                (str(league_id), int(week)),
-            )
-            for entry in items:
-                if entry is None:
-                    continue
-                normalized = dict(entry)
-                if normalized.get('week') is None:
-                    normalized['week'] = int(week)
-                roster_id = _to_int(normalized.get('roster_id'))
-                matchup_id = _to_int(normalized.get('matchup_id'))
-                if roster_id is None or matchup_id is None:
-                    continue
-                normalized_items.append(normalized)
-                players = normalized.get('players')
-                conn.execute(
-                    "INSERT OR REPLACE INTO matchup (league_id, week, matchup_id, roster_id, points, projected_points, is_playoff, is_consolation, players_json, raw_payload, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                    (
-                        str(league_id),
-                        int(week),
-                        matchup_id,
-                        roster_id,
-                        _to_float(normalized.get('points')),
-                        _to_float(normalized.get('projected_points')),
-                        1 if _to_bool(normalized.get('is_playoff')) else 0,
-                        1 if _to_bool(normalized.get('is_consolation')) else 0,
-                        _json_dumps(players) if players is not None else None,
-                        _json_dumps(normalized),
-                        fetched_at,
-                    ),
-                )
-    except Exception:
-        return None
-    return normalized_items or []
+def fetch_team_index(league_id):
+    """Build the roster_id -> owner -> team name index for a league from its cached rosters and users.
 
-# Cache data for 12 hours (43200 seconds)
-@st.cache_data(ttl=43200)
-def fetch_league_info(league_id):
-    """Fetch basic league information"""
-    conn = get_db_connection()
-    league_key = _normalize_key(league_id)
-    week_key = _NULL_SENTINEL
+    Keyed on both fetchers' epochs, so it is rebuilt once per data refresh of either.
+    """
+    epoch = (_freshness_epoch('rosters', league_id=league_id), _freshness_epoch('users', league_id=league_id))
+    return _fetch_team_index(league_id, epoch)
 
-    if conn:
-        try:
-            cached_ts = _get_cached_timestamp(conn, 'league', league_key, week_key)
-            if cached_ts and _is_fresh(cached_ts, CACHE_TTL_SECONDS):
-                cached = _load_cached_json(
-                    conn,
-                    "SELECT raw_payload FROM league WHERE league_id = ?",
-                    (str(league_id),),
-                )
-                if cached is not None:
-                    return cached
-        except Exception:
-            pass
 
-    try:
-        response = requests.get(f"https://api.sleeper.app/v1/league/{league_id}", timeout=10)
-        status_code = getattr(response, 'status_code', None)
-        if status_code == 200:
-            data = response.json()
-            if conn and data:
-                try:
-                    with conn:
-                        conn.execute(
-                            "INSERT OR REPLACE INTO league (league_id, name, season, status, raw_payload, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
-                            (
-                                str(league_id),
-                                data.get('name'),
-                                data.get('season'),
-                                data.get('status'),
-                                _json_dumps(data),
-                                _now_iso(),
-                            ),
-                        )
-                    _record_fetch_log(conn, 'league', league_key, week_key, status_code, None)
-                except Exception:
-                    pass
-            return data
-
-        if conn:
-            try:
-                _record_fetch_log(conn, 'league', league_key, week_key, status_code, f'status {status_code}')
-            except Exception:
-                pass
-            fallback = _load_cached_json(
-                conn,
-                "SELECT raw_payload FROM league WHERE league_id = ?",
-                (str(league_id),),
-            )
-            if fallback is not None:
-                return fallback
-        return None
-    except Exception as e:
-        if conn:
-            try:
-                _record_fetch_log(conn, 'league', league_key, week_key, None, str(e))
-            except Exception:
-                pass
-            fallback = _load_cached_json(
-                conn,
-                "SELECT raw_payload FROM league WHERE league_id = ?",
-                (str(league_id),),
-            )
-            if fallback is not None:
-                return fallback
-        st.error(f"Error fetching league info: {e}")
-        return None
+def fetch_standings(league_id, rosters):
+    """Return the league's standings rows in rank order.
 
-@st.cache_data(ttl=43200)
-def fetch_rosters(league_id):
-    """Fetch rosters for a league"""
-    conn = get_db_connection()
-    league_key = _normalize_key(league_id)
-    week_key = _NULL_SENTINEL
+    Read from the cache DB's materialized `standings` table (recomputed whenever rosters or users are stored);
+    without a cache DB they are computed from `rosters` and the team index instead.
+    """
+    db = cache.get_db_connection()
+    if db:
+        rows = cache.load_standings(db, league_id)
+        if rows:
+            return rows
+    return standings.compute_standings(rosters, fetch_team_index(league_id))
 
-    if conn:
-        try:
-            cached_ts = _get_cached_timestamp(conn, 'rosters', league_key, week_key)
-            if cached_ts and _is_fresh(cached_ts, CACHE_TTL_SECONDS):
-                try:
-                    cur = conn.execute(
-                        "SELECT raw_payload FROM roster WHERE league_id = ? ORDER BY roster_id",
-                        (str(league_id),),
-                    )
-                    rows = cur.fetchall()
-                except Exception:
-                    rows = None
-                if rows:
-                    payloads = []
-                    for row in rows:
-                        try:
-                            payloads.append(json.loads(row['raw_payload']))
-                        except Exception:
-                            continue
-                    if payloads:
-                        return payloads
-        except Exception:
-            pass
 
-    try:
-        response = requests.get(f"https://api.sleeper.app/v1/league/{league_id}/rosters", timeout=10)
-        status_code = getattr(response, 'status_code', None)
-        if status_code == 200:
-            data = response.json()
-            if conn and isinstance(data, list):
-                try:
-                    _ensure_league_stub(conn, league_id)
-                    with conn:
-                        conn.execute("DELETE FROM roster WHERE league_id = ?", (str(league_id),))
-                        fetched_at = _now_iso()
-                        for roster in data:
-                            roster_id = _to_int(roster.get('roster_id'))
-                            if roster_id is None:
-                                continue
-                            settings = roster.get('settings') or {}
-                            metadata = roster.get('metadata') or {}
-                            conn.execute(
-                                "INSERT OR REPLACE INTO roster (league_id, roster_id, owner_id, wins, losses, ties, points_for, points_against, settings_json, metadata_json, raw_payload, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                                (
-                                    str(league_id),
-                                    roster_id,
-                                    roster.get('owner_id'),
-                                    _to_int(settings.get('wins')),
-                                    _to_int(settings.get('losses')),
-                                    _to_int(settings.get('ties')),
-                                    _to_float(settings.get('fpts')),
-                                    _to_float(settings.get('fpts_against')),
-                                    _json_dumps(settings),
-                                    _json_dumps(metadata),
-                                    _json_dumps(roster),
-                                    fetched_at,
-                                ),
-                            )
-                    _record_fetch_log(conn, 'rosters', league_key, week_key, status_code, None)
-                except Exception:
-                    pass
-            return data
-
-        if conn:
-            try:
-                _record_fetch_log(conn, 'rosters', league_key, week_key, status_code, f'status {status_code}')
-            except Exception:
-                pass
-            try:
-                cur = conn.execute(
-                    "SELECT raw_payload FROM roster WHERE league_id = ? ORDER BY roster_id",
-                    (str(league_id),),
-                )
-                rows = cur.fetchall()
-            except Exception:
-                rows = None
-            if rows:
-                payloads = []
-                for row in rows:
-                    try:
-                        payloads.append(json.loads(row['raw_payload']))
-                    except Exception:
-                        continue
-                if payloads:
-                    return payloads
-        return None
-    except Exception as e:
-        if conn:
-            try:
-                _record_fetch_log(conn, 'rosters', league_key, week_key, None, str(e))
-            except Exception:
-                pass
-            try:
-                cur = conn.execute(
-                    "SELECT raw_payload FROM roster WHERE league_id = ? ORDER BY roster_id",
-                    (str(league_id),),
-                )
-                rows = cur.fetchall()
-            except Exception:
-                rows = None
-            if rows:
-                payloads = []
-                for row in rows:
-                    try:
-                        payloads.append(json.loads(row['raw_payload']))
-                    except Exception:
-                        continue
-                if payloads:
-                    return payloads
-        st.error(f"Error fetching rosters: {e}")
-        return None
+@st.cache_data(ttl=43200, show_spinner=False, max_entries=2048)
+def _fetch_matchups_week(league_id, week, epoch):
+    """Fetch a single week of matchups (week, matchup_id, roster_id and points per entry) for one freshness slot.
 
-@st.cache_data(ttl=43200)
-def fetch_users(league_id):
-    """Fetch users for a league"""
-    conn = get_db_connection()
-    league_key = _normalize_key(league_id)
-    week_key = _NULL_SENTINEL
+    Returns `(data, error)`: data is a list (possibly empty) or None on a network error with nothing cached;
+    error is the network error message, if any, even when a cached fallback was served.
+    """
+    result = sleeper.fetch_summary('matchups', league_id, int(week))
+    error = str(result.error) if result.error is not None else None
+    if result.data is None and result.error is None:
+        return [], None
+    return result.data, error
 
-    if conn:
-        try:
-            cached_ts = _get_cached_timestamp(conn, 'users', league_key, week_key)
-            if cached_ts and _is_fresh(cached_ts, CACHE_TTL_SECONDS):
-                try:
-                    cur = conn.execute(
-                        "SELECT u.raw_payload FROM league_user lu JOIN user u ON u.user_id = lu.user_id WHERE lu.league_id = ?",
-                        (str(league_id),),
-                    )
-                    rows = cur.fetchall()
-                except Exception:
-                    rows = None
-                if rows:
-                    payloads = []
-                    for row in rows:
-                        try:
-                            payloads.append(json.loads(row['raw_payload']))
-                        except Exception:
-                            continue
-                    if payloads:
-                        return payloads
-        except Exception:
-            pass
 
-    try:
-        response = requests.get(f"https://api.sleeper.app/v1/league/{league_id}/users", timeout=10)
-        status_code = getattr(response, 'status_code', None)
-        if status_code == 200:
-            data = response.json()
-            if conn and isinstance(data, list):
-                try:
-                    _ensure_league_stub(conn, league_id)
-                    fetched_at = _now_iso()
-                    with conn:
-                        for user in data:
-                            user_id = user.get('user_id')
-                            if not user_id:
-                                continue
-                            metadata = user.get('metadata') or {}
-                            conn.execute(
-                                "INSERT OR REPLACE INTO user (user_id, display_name, username, team_name, avatar, raw_payload, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                                (
-                                    str(user_id),
-                                    user.get('display_name'),
-                                    user.get('username'),
-                                    metadata.get('team_name'),
-                                    user.get('avatar'),
-                                    _json_dumps(user),
-                                    fetched_at,
-                                ),
-                            )
-                        conn.execute("DELETE FROM league_user WHERE league_id = ?", (str(league_id),))
-                        for user in data:
-                            user_id = user.get('user_id')
-                            if not user_id:
-                                continue
-                            metadata = user.get('metadata') or {}
-                            role = metadata.get('role')
-                            bool_val = _to_bool(metadata.get('is_owner'))
-                            if bool_val is None:
-                                bool_val = _to_bool(user.get('is_owner'))
-                            conn.execute(
-                                "INSERT OR REPLACE INTO league_user (league_id, user_id, role, is_owner, fetched_at) VALUES (?, ?, ?, ?, ?)",
-                                (
-                                    str(league_id),
-                                    str(user_id),
-                                    role,
-                                    1 if bool_val else 0,
-                                    fetched_at,
-                                ),
-                            )
-                    _record_fetch_log(conn, 'users', league_key, week_key, status_code, None)
-                except Exception:
-                    pass
-            return data
-
-        if conn:
-            try:
-                _record_fetch_log(conn, 'users', league_key, week_key, status_code, f'status {status_code}')
-            except Exception:
-                pass
-            try:
-                cur = conn.execute(
-                    "SELECT u.raw_payload FROM league_user lu JOIN user u ON u.user_id = lu.user_id WHERE lu.league_id = ?",
-                    (str(league_id),),
-                )
-                rows = cur.fetchall()
-            except Exception:
-                rows = None
-            if rows:
-                payloads = []
-                for row in rows:
-                    try:
-                        payloads.append(json.loads(row['raw_payload']))
-                    except Exception:
-                        continue
-                if payloads:
-                    return payloads
-        return None
-    except Exception as e:
-        if conn:
-            try:
-                _record_fetch_log(conn, 'users', league_key, week_key, None, str(e))
-            except Exception:
-                pass
-            try:
-                cur = conn.execute(
-                    "SELECT u.raw_payload FROM league_user lu JOIN user u ON u.user_id = lu.user_id WHERE lu.league_id = ?",
-                    (str(league_id),),
-                )
-                rows = cur.fetchall()
-            except Exception:
-                rows = None
-            if rows:
-                payloads = []
-                for row in rows:
-                    try:
-                        payloads.append(json.loads(row['raw_payload']))
-                    except Exception:
-                        continue
-                if payloads:
-                    return payloads
-        st.error(f"Error fetching users: {e}")
-        return None
+def _matchups_week(league_id, week):
+    return _fetch_matchups_week(league_id, week, _freshness_epoch('matchups', (week,), league_id))
 
 
-@st.cache_data(ttl=43200)
 def fetch_matchups(league_id, week=None, max_week=18):
     """Fetch matchups for a league.
 
-    If `week` is provided, fetch /matchups/{week}. If not, probe weeks 1..max_week and return a combined list of matchups found.
+    If `week` is provided, fetch /matchups/{week}. If not, fetch weeks 1..max_week concurrently and return a combined list of matchups found.
     Returns a list (possibly empty) or None on network error.
     """
-    conn = get_db_connection()
-    league_key = _normalize_key(league_id)
-    errors = []
-
-    def _cached_week(target_week: int):
-        if not conn:
-            return None
-        try:
-            cached_ts = _get_cached_timestamp(conn, 'matchups', league_key, _normalize_key(target_week))
-            if cached_ts and _is_fresh(cached_ts, CACHE_TTL_SECONDS):
-                return _load_cached_matchups(conn, league_id, int(target_week))
-        except Exception:
-            return None
-        return None
+    if week is not None:
+        return _fetch_matchups(league_id, int(week), max_week, _freshness_epoch('matchups', (int(week),), league_id))
+    limit = cache.to_int(max_week) or MAX_SEASON_WEEKS
+    weeks = range(1, min(max(limit, 1), MAX_SEASON_WEEKS) + 1)
+    return _fetch_matchups(league_id, None, max_week, _freshness_epoch('matchups', weeks, league_id))
 
-    def _fetch_week(target_week: int):
-        cached = _cached_week(target_week)
-        if cached is not None:
-            return cached
-
-        try:
-            url = f"https://api.sleeper.app/v1/league/{league_id}/matchups/{target_week}"
-            resp = requests.get(url, timeout=10)
-            status_code = getattr(resp, 'status_code', None)
-            if status_code == 200:
-                data = resp.json()
-                list_data = data if isinstance(data, list) else []
-                recorded = False
-                if conn and isinstance(list_data, list):
-                    try:
-                        _ensure_league_stub(conn, league_id)
-                        stored = _store_matchups(conn, league_id, int(target_week), list_data)
-                        if stored is not None:
-                            list_data = stored
-                        _record_fetch_log(conn, 'matchups', league_key, _normalize_key(target_week), status_code, None)
-                        recorded = True
-                    except Exception:
-                        pass
-                if conn and not recorded:
-                    try:
-                        _record_fetch_log(conn, 'matchups', league_key, _normalize_key(target_week), status_code, None)
-                    except Exception:
-                        pass
-                try:
-                    week_int = int(target_week)
-                except (TypeError, ValueError):
-                    week_int = None
-                if week_int is not None and isinstance(list_data, list):
-                    for item in list_data:
-                        if isinstance(item, dict) and item.get('week') is None:
-                            item['week'] = week_int
-                return list_data if isinstance(list_data, list) else []
-
-            if conn:
-                try:
-                    _record_fetch_log(conn, 'matchups', league_key, _normalize_key(target_week), status_code, f'status {status_code}')
-                except Exception:
-                    pass
-                fallback = _load_cached_matchups(conn, league_id, int(target_week))
-                if fallback is not None:
-                    return fallback
-            return []
-        except Exception as exc:
-            errors.append(exc)
-            if conn:
-                try:
-                    _record_fetch_log(conn, 'matchups', league_key, _normalize_key(target_week), None, str(exc))
-                except Exception:
-                    pass
-                fallback = _load_cached_matchups(conn, league_id, int(target_week))
-                if fallback is not None:
-                    return fallback
-            return None
 
+@st.cache_data(ttl=43200, max_entries=1024)
+def _fetch_matchups(league_id, week, max_week, epoch):
+    """`fetch_matchups` for one freshness slot."""
     if week is not None:
-        result = _fetch_week(int(week))
-        if result is None:
-            if errors:
-                st.error(f"Error fetching matchups: {errors[0]}")
+        data, error = _matchups_week(league_id, int(week))
+        if data is None:
+            if error:
+                st.error(f"Error fetching matchups: {error}")
             return None
-        return result
+        return data
 
     if max_week is None:
-        limit = 18
+        limit = MAX_SEASON_WEEKS
     else:
         try:
             limit = int(max_week)
         except (TypeError, ValueError):
-            limit = 18
+            limit = MAX_SEASON_WEEKS
     if limit < 1:
         return []
 
-    limit = min(limit, 18)
+    limit = min(limit, MAX_SEASON_WEEKS)
+    outcomes = _run_parallel(partial(_matchups_week, league_id, w) for w in range(1, limit + 1))
     collected = []
-    for w in range(1, limit + 1):
-        week_result = _fetch_week(w)
+    errors = []
+    for outcome in outcomes:
+        if not outcome:
+            continue
+        week_result, error = outcome
+        if error:
+            errors.append(error)
         if isinstance(week_result, list):
             collected.extend(week_result)
 
@@ -889,6 +288,53 @@ def fetch_matchups(league_id, week=None, max_week=18):
     return collected
 
 
+def _invalidate_streamlit_caches(endpoint: str, league_id: Optional[str] = None, week: Optional[int] = None) -> None:
+    """Refresh listener: bump the refreshed key's generation, so only the in-memory fetcher entries that read it
+    (see `_freshness_epoch`) are recomputed from the refreshed SQLite rows; other leagues and weeks keep theirs.
+
+    Runs on the background refresher thread, so it only bumps the process-wide, locked `REFRESH_GENERATIONS`.
+    """
+    REFRESH_GENERATIONS.bump(sleeper.fetch_key(endpoint, league_id, week))
+
+
+sleeper.set_refresh_listener('streamlit', _invalidate_streamlit_caches)
+
+
+def _week_list(weeks):
+    return sorted({w for w in (cache.to_int(w) for w in weeks) if w is not None and 1 <= w <= MAX_SEASON_WEEKS})
+
+
+def _remaining_regular_season(completed_week, league_info):
+    """Weeks after `completed_week` up to the league's last regular-season week (the odds columns' schedule)."""
+    return range(completed_week + 1, ttl.regular_season_end(league_info) + 1)
+
+
+def prefetch_league_data(league_ids: Iterable[str], weeks: Iterable[int] = (), league_weeks=None) -> None:
+    """Warm the fetch caches for every (league, endpoint, week) request a render needs.
+
+    League info, rosters, users and each requested matchup week are planned up front and fetched
+    concurrently, so a cold render costs roughly the slowest request rather than the sum of all of them.
+    `league_weeks(league_info)` adds weeks that depend on a league's own settings; those are fetched
+    once every league's info is in. Later calls to the `fetch_*` functions are then served from cache.
+    """
+    week_list = _week_list(weeks)
+    league_ids = [league_id for league_id in league_ids if league_id and not str(league_id).startswith("YOUR_")]
+    tasks = []
+    for league_id in league_ids:
+        tasks.append(partial(fetch_league_info, league_id))
+        tasks.append(partial(fetch_rosters, league_id))
+        tasks.append(partial(fetch_users, league_id))
+        tasks.extend(partial(_matchups_week, league_id, w) for w in week_list)
+    _run_parallel(tasks)
+    if league_weeks is None:
+        return
+    tasks = []
+    for league_id in league_ids:
+        extra = set(_week_list(league_weeks(fetch_league_info(league_id)))) - set(week_list)
+        tasks.extend(partial(_matchups_week, league_id, w) for w in sorted(extra))
+    _run_parallel(tasks)
+
+
 def _extract_entries_from_matchups(raw_matchups):
     """Normalize various matchup payload shapes into a flat list of entries.
 
@@ -920,56 +366,27 @@ def _extract_entries_from_matchups(raw_matchups):
     return entries
 
 
+@st.cache_resource
+def _last_nfl_state():
+    return {'state': None}
+
+
+# The last NFL state fetched by this process (see `_freshness_epoch`); process-wide like `REFRESH_GENERATIONS`
+LAST_NFL_STATE = _last_nfl_state()
+
+
 @st.cache_data(ttl=3600)
+def _fetch_nfl_state(epoch):
+    """`fetch_nfl_state` for one freshness slot."""
+    state = sleeper.fetch_resource('nfl_state').data
+    if state is not None:
+        LAST_NFL_STATE['state'] = state
+    return state
+
+
 def fetch_nfl_state():
     """Fetch NFL state from Sleeper (week, season, etc)."""
-    conn = get_db_connection()
-    cached_payload = None
-    cached_ts = None
-    if conn:
-        try:
-            cur = conn.execute("SELECT payload, fetched_at FROM nfl_state WHERE state_key = ?", ('nfl',))
-            row = cur.fetchone()
-        except Exception:
-            row = None
-        if row:
-            try:
-                cached_payload = json.loads(row['payload'])
-            except Exception:
-                cached_payload = None
-            cached_ts = row['fetched_at']
-            if cached_ts and _is_fresh(cached_ts, NFL_STATE_TTL_SECONDS) and cached_payload is not None:
-                return cached_payload
-
-    try:
-        resp = requests.get("https://api.sleeper.app/v1/state/nfl", timeout=6)
-        status_code = getattr(resp, 'status_code', None)
-        if status_code == 200:
-            data = resp.json()
-            if conn and data is not None:
-                try:
-                    with conn:
-                        conn.execute(
-                            "INSERT OR REPLACE INTO nfl_state (state_key, payload, fetched_at) VALUES (?, ?, ?)",
-                            ('nfl', _json_dumps(data), _now_iso()),
-                        )
-                    _record_fetch_log(conn, 'nfl_state', _NULL_SENTINEL, _NULL_SENTINEL, status_code, None)
-                except Exception:
-                    pass
-            return data
-        if conn:
-            try:
-                _record_fetch_log(conn, 'nfl_state', _NULL_SENTINEL, _NULL_SENTINEL, status_code, f'status {status_code}')
-            except Exception:
-                pass
-        return cached_payload
-    except Exception as exc:
-        if conn:
-            try:
-                _record_fetch_log(conn, 'nfl_state', _NULL_SENTINEL, _NULL_SENTINEL, None, str(exc))
-            except Exception:
-                pass
-        return cached_payload
+    return _fetch_nfl_state(_freshness_epoch('nfl_state'))
 
 
 def find_latest_completed_week(all_entries, completeness_threshold=0.8):
@@ -981,235 +398,378 @@ def find_latest_completed_week(all_entries, completeness_threshold=0.8):
     """
     if not all_entries:
         return None
+    return highlights.latest_completed_week(highlights.build_frame(all_entries), completeness_threshold)
 
-    # group entries by week -> by (league, matchup_id)
-    weeks = {}
-    for e in all_entries:
-        w = e.get('week')
-        if w is None:
-            continue
-        mid = e.get('matchup_id')
-        league = e.get('league')
-        key = f"{league}:{mid}"
-        weeks.setdefault(w, {}).setdefault(key, []).append(e)
+def _highlight_candidate_weeks(state):
+    """Return the weeks probed for weekly highlights, most recent first.
 
+    Starts at the week before the reported NFL week (the most recently completed one) and steps back up to
+    4 weeks. Without a usable NFL state, falls back to weeks 18..15.
+    """
     candidate_weeks = []
-    for w, matchups in weeks.items():
-        total = len(matchups)
-        if total == 0:
-            continue
-        complete = 0
-        for grp in matchups.values():
-            ok = True
-            for ent in grp:
-                pts = ent.get('points')
-                if pts is None:
-                    ok = False
-                    break
-            if ok:
-                complete += 1
-        frac = complete / total
-        if frac >= completeness_threshold:
+    if state and isinstance(state.get('week'), int):
+        current_week = state.get('week')
+        # start from the previous week (most recently completed week), not the current in-progress week
+        start_week = max(current_week - 1, 1)
+        for w in range(start_week, max(start_week - 4, 0), -1):
             candidate_weeks.append(w)
+    else:
+        # Fallback: try recent weeks 18..1 (but keep short to avoid probing too many)
+        candidate_weeks = list(range(18, 14, -1))
+    return candidate_weeks
 
-    if candidate_weeks:
-        return max(candidate_weeks)
 
-    # Fallback: pick the week with the highest fraction of complete matchups
-    best_week = None
-    best_frac = 0.0
-    for w, matchups in weeks.items():
-        total = len(matchups)
-        if total == 0:
-            continue
-        complete = 0
-        for grp in matchups.values():
-            ok = True
-            for ent in grp:
-                if ent.get('points') is None:
-                    ok = False
-                    break
-            if ok:
-                complete += 1
-        frac = complete / total
-        if frac > best_frac:
-            best_frac = frac
-            best_week = w
-
-    return best_week
-
-def get_team_name(roster, users):
-    """Get team name from roster and users data"""
-    if not users:
-        return f"Team {roster['roster_id']}"
-    
-    owner_id = roster['owner_id']
-    for user in users:
-        if user['user_id'] == owner_id:
-            if user.get('metadata', {}).get('team_name'):
-                return user['metadata']['team_name']
-            elif user.get('display_name'):
-                return user['display_name']
-            else:
-                return user.get('username', f"Team {roster['roster_id']}")
-    
-    return f"Team {roster['roster_id']}"
+def _season_week_limit(state):
+    """Return the latest completed week according to the NFL state, or None when it is unknown."""
+    if state and isinstance(state.get('week'), int):
+        return max(state.get('week') - 1, 0)
+    return None
 
 
-def resolve_team_name_from_roster_id(roster_id, league_name, league_rosters, league_users):
-    """Resolve a human-friendly team name for a given roster_id using cached rosters and users.
+def resolve_team_name_from_roster_id(roster_id, league_name, league_teams):
+    """Resolve a human-friendly team name for a given roster_id using the league's cached `TeamIndex`.
 
     Returns a string team name or a fallback like 'Team {roster_id}'.
     """
-    try:
-        rosters = league_rosters.get(league_name, []) if league_rosters is not None else []
-        users = league_users.get(league_name, []) if league_users is not None else []
-    except Exception:
-        rosters = []
-        users = []
+    team_index = league_teams.get(league_name) if league_teams is not None else None
+    if team_index is None:
+        return f"Team {roster_id}"
+    return team_index.name_for(roster_id)
+
+# Standings row key -> column header
+STANDINGS_COLUMNS = {
+    'rank': 'Rank',
+    'team_name': 'Team',
+    'wins': 'Wins',
+    'losses': 'Losses',
+    'ties': 'Ties',
+    'points_for': 'Points For',
+    'points_against': 'Points Against',
+}
+# All-play row key -> column header, shown once a regular-season week is complete
+ALL_PLAY_COLUMNS = {
+    'all_play': 'All-Play',
+    'expected_wins': 'xW',
+}
+# Zone odds row key -> column header, shown while the regular season has games left
+ODDS_COLUMNS = {
+    'promotion_odds': 'Promotion %',
+    'safe_odds': 'Safe %',
+    'relegation_odds': 'Relegation %',
+}
+# Matchup entry fields the all-play and odds caches are keyed on
+ENTRY_KEYS = ('week', 'matchup_id', 'roster_id', 'points')
+
+
+@st.cache_data(ttl=43200, max_entries=256, show_spinner=False)
+def _league_odds(table, entries, completed_week, last_week, promotion_allowed, demotion_allowed, simulations):
+    """Zone odds for one league, keyed on its standings and matchup entries so a rerun only simulates after a sync."""
+    rows = [{'roster_id': roster_id, 'wins': wins, 'points_for': points_for} for roster_id, wins, points_for in table]
+    return odds.league_odds(
+        rows,
+        [dict(zip(ENTRY_KEYS, entry)) for entry in entries],
+        completed_week,
+        last_week,
+        promotion_allowed,
+        demotion_allowed,
+        simulations,
+    )
 
-    for roster in rosters:
-        try:
-            if roster.get('roster_id') == roster_id:
-                return get_team_name(roster, users)
-        except Exception:
+
+@st.cache_data(ttl=43200, max_entries=1024, show_spinner=False)
+def _all_play_totals(entries):
+    """All-play totals per roster_id for weeks not yet materialized in the cache DB, keyed on their entries."""
+    frame = highlights.build_frame(dict(zip(ENTRY_KEYS, entry)) for entry in entries)
+    totals = highlights.all_play_totals(highlights.all_play_weeks(frame))
+    return {row['roster_id']: row for row in totals.to_dict('records')}
+
+
+def fetch_all_play(league_id, last_week, completed_week):
+    """Season all-play wins/losses/ties and expected wins per roster_id over weeks 1..min(completed, last).
+
+    Finalized weeks are summed from the cache DB's `all_play` table (filled once as each week is finalized);
+    only the weeks still open to stat corrections, or every week without a cache DB, are ranked here.
+    """
+    max_week = min(completed_week, last_week)
+    totals = {}
+    covered = set()
+    db = cache.get_db_connection()
+    stored = cache.load_all_play(db, league_id, max_week) if db else None
+    if stored:
+        rows, weeks = stored
+        totals = {row['roster_id']: row for row in rows}
+        covered = set(weeks)
+    entries = []
+    for week in range(1, max_week + 1):
+        if week not in covered:
+            entries.extend(entry for entry in fetch_matchups(league_id, week=week) or [] if isinstance(entry, dict))
+    if not entries:
+        return totals
+    entry_key = tuple(tuple(entry.get(key) for key in ENTRY_KEYS) for entry in entries)
+    merged = dict(totals)
+    for roster_id, row in _all_play_totals(entry_key).items():
+        base = merged.get(roster_id)
+        merged[roster_id] = {key: row[key] + (base[key] if base else 0) for key in ('wins', 'losses', 'ties', 'expected_wins')}
+    return merged
+
+
+def attach_all_play(league_id, league_info, standings_rows):
+    """Copies of the standings rows with the all-play record ("W-L", "-T" when tied) and expected wins.
+
+    Returns the rows unchanged before the first regular-season week is complete or when the NFL week is unknown.
+    """
+    completed_week = _season_week_limit(fetch_nfl_state())
+    if not completed_week or not standings_rows:
+        return standings_rows
+    totals = fetch_all_play(league_id, ttl.regular_season_end(league_info), completed_week)
+    if not totals:
+        return standings_rows
+    rows = []
+    for row in standings_rows:
+        record = totals.get(row['roster_id'])
+        if record is None:
+            rows.append(dict(row, all_play="—", expected_wins="—"))
             continue
+        wins, losses, ties = int(record['wins']), int(record['losses']), int(record['ties'])
+        all_play = f"{wins}-{losses}" + (f"-{ties}" if ties else "")
+        rows.append(dict(row, all_play=all_play, expected_wins=f"{record['expected_wins']:.1f}"))
+    return rows
 
-    return f"Team {roster_id}"
 
-def display_league_standings(league_name, league_id, league_index=0, total_leagues=1):
-    """Display standings for a single league"""
-    st.subheader(f"🏆 {league_name}")
-    
+def attach_odds(league_id, league_info, standings_rows, promotion_allowed, demotion_allowed):
+    """Copies of the standings rows with formatted promotion/safe/relegation odds (see `superleague.odds`).
+
+    Returns the rows unchanged when odds are disabled, the NFL week is unknown, or the regular season is over.
+    Zones a league does not have show a dash.
+    """
+    completed_week = _season_week_limit(fetch_nfl_state())
+    last_week = ttl.regular_season_end(league_info)
+    if config.ODDS_SIMULATIONS <= 0 or not completed_week or completed_week >= last_week or not standings_rows:
+        return standings_rows
+    entries = fetch_matchups(league_id, max_week=last_week) or []
+    table = tuple((row['roster_id'], row['wins'], row['points_for']) for row in standings_rows)
+    entry_key = tuple(tuple(entry.get(key) for key in ENTRY_KEYS) for entry in entries if isinstance(entry, dict))
+    zone_odds = _league_odds(
+        table, entry_key, completed_week, last_week, promotion_allowed, demotion_allowed, config.ODDS_SIMULATIONS
+    )
+    if not zone_odds:
+        return standings_rows
+    rows = []
+    for row in standings_rows:
+        team_odds = zone_odds.get(row['roster_id'])
+        rows.append(dict(
+            row,
+            promotion_odds=odds.format_odds(team_odds.promotion) if team_odds and promotion_allowed else "—",
+            safe_odds=odds.format_odds(team_odds.safe) if team_odds else "—",
+            relegation_odds=odds.format_odds(team_odds.relegation) if team_odds and demotion_allowed else "—",
+        ))
+    return rows
+
+
+def _standings_columns(standings_rows):
+    """Column mapping for a standings table: the all-play and odds columns join when its rows carry them."""
+    columns = dict(STANDINGS_COLUMNS)
+    if standings_rows and 'all_play' in standings_rows[0]:
+        columns.update(ALL_PLAY_COLUMNS)
+    if standings_rows and 'promotion_odds' in standings_rows[0]:
+        columns.update(ODDS_COLUMNS)
+    return columns
+
+
+def load_league_standings(league_name, league_id, league_index=0, total_leagues=1):
+    """Standings rows and zone switches for one league.
+
+    Returns (rows, promotion_allowed, demotion_allowed, problem); `problem` is None on success, otherwise a
+    (level, message) pair to show instead of the table.
+    """
     # Check if league ID is set
     if league_id.startswith("YOUR_") or not league_id:
-        st.warning(f"⚠️ Please update the league ID for {league_name} in the app.py file")
-        return
-    
+        return [], False, False, ("warning", f"⚠️ Please update the league ID for {league_name} in the app.py file")
+
     # Fetch data
     league_info = fetch_league_info(league_id)
     rosters = fetch_rosters(league_id)
-    users = fetch_users(league_id)
-    
+
     if not league_info or not rosters:
-        st.error(f"❌ Could not load data for {league_name}")
-        return
-    
-    # Create standings dataframe
-    standings_data = []
-    for roster in rosters:
-        settings = roster.get('settings', {})
-        team_name = get_team_name(roster, users)
-        
-        standings_data.append({
-            'Team': team_name,
-            'Wins': settings.get('wins', 0),
-            'Losses': settings.get('losses', 0),
-            'Ties': settings.get('ties', 0),
-            'Points For': round(settings.get('fpts', 0), 1),
-            'Points Against': round(settings.get('fpts_against', 0), 1)
-        })
-    
-    # Sort by wins (descending), then by points for (descending)
-    standings_data.sort(key=lambda x: (x['Wins'], x['Points For']), reverse=True)
-    
-    # Add rank
-    for i, team in enumerate(standings_data):
-        team['Rank'] = i + 1
-    
-    # Display as table
-    df = pd.DataFrame(standings_data)
-    df = df[['Rank', 'Team', 'Wins', 'Losses', 'Ties', 'Points For', 'Points Against']]
+        return [], False, False, ("error", f"❌ Could not load data for {league_name}")
+
+    # Standings rows (rank, team, W/L/T, PF/PA and zone flags) come precomputed from the cache DB
+    standings_rows = fetch_standings(league_id, rosters)
 
     # Highlight promotion/demotion rows:
     # - Top 3 are promotion spots (green) unless this is the top league (league_index == 0)
     # - Bottom 3 are demotion spots (red) unless this is the bottom league (league_index == total_leagues - 1)
-    def _row_style(row):
-        try:
-            rank = int(row['Rank'])
-        except Exception:
-            return [''] * len(row)
+    promotion_allowed = league_index != 0
+    demotion_allowed = league_index != (total_leagues - 1)
+    standings_rows = attach_all_play(league_id, league_info, standings_rows)
+    standings_rows = attach_odds(league_id, league_info, standings_rows, promotion_allowed, demotion_allowed)
+    return standings_rows, promotion_allowed, demotion_allowed, None
 
-        n = len(df)
-        promotion_allowed = league_index != 0
-        demotion_allowed = league_index != (total_leagues - 1)
 
-        # Faded colors (low-key backgrounds)
-        promo_color = 'background-color: #e6f4ea'  # soft green
-        demo_color = 'background-color: #fdecea'   # soft red
+def _show_problem(problem):
+    level, message = problem
+    (st.warning if level == "warning" else st.error)(message)
 
-        if promotion_allowed and rank <= 3:
-            return [promo_color] * len(row)
-        if demotion_allowed and rank > n - 3:
-            return [demo_color] * len(row)
-        return [''] * len(row)
 
-    # Render a custom HTML table so we can control colors for light/dark mode.
-    # Build classes for each row (promo/demo/none) then render HTML with a small CSS block
-    n = len(df)
-    promotion_allowed = league_index != 0
-    demotion_allowed = league_index != (total_leagues - 1)
+def _standings_dataframe(standings_rows):
+    columns = _standings_columns(standings_rows)
+    return pd.DataFrame(
+        [{label: row[key] for key, label in columns.items()} for row in standings_rows],
+        columns=list(columns.values()),
+    )
 
-    # Build table header
-    headers = list(df.columns)
 
-    import html as _html
+def _table_height(row_count):
+    """A reasonable iframe height for a standings table with `row_count` rows."""
+    row_height = 36
+    padding = 60
+    return int(row_count * row_height + padding)
 
-    rows_html = ""
-    for _, row in df.iterrows():
-        try:
-            rank = int(row['Rank'])
-        except Exception:
-            rank = None
-
-        cls = ""
-        if promotion_allowed and rank is not None and rank <= 3:
-            cls = "promo"
-        elif demotion_allowed and rank is not None and rank > n - 3:
-            cls = "demo"
-
-        # Escape cell contents to avoid breaking the HTML if team names contain <, &, etc.
-        row_cells = "".join(f"<td>{_html.escape(str(row[h]))}</td>" for h in headers)
-        rows_html += f"<tr class=\"{cls}\">{row_cells}</tr>\n"
-    # CSS uses prefers-color-scheme to pick subtle backgrounds that read well in both themes.
-    css = '''
-    <style>
-    .sl-table { border-collapse: collapse; width: 100%; background: transparent; }
-    .sl-table th, .sl-table td { padding: 8px 10px; text-align: left; border-bottom: 1px solid rgba(0,0,0,0.06); color: inherit; }
-    .sl-table thead th { font-weight: 600; }
-    /* Light mode faded colors */
-    .promo { background-color: #e6f4ea; }
-    .demo  { background-color: #fdecea; }
-    /* Dark mode adjustments: set light text color and subtle translucent backgrounds */
-    @media (prefers-color-scheme: dark) {
-        .sl-table { background: transparent; }
-        .sl-table th, .sl-table td { border-bottom: 1px solid rgba(255,255,255,0.06); color: #e6eef6; }
-        .promo { background-color: rgba(38,166,91,0.12); }
-        .demo  { background-color: rgba(239,83,80,0.12); }
-    }
-    </style>
-    '''
-
-    header_html = "".join(f"<th>{_html.escape(str(h))}</th>" for h in headers)
-    html = f"""
-    {css}
-    <div class="sl-table-wrapper">
-      <table class="sl-table">
-        <thead><tr>{header_html}</tr></thead>
-        <tbody>
-        {rows_html}
-        </tbody>
-      </table>
-    </div>
+
+def _attach_team(row, league_teams):
+    """Set row['team'] for a highlight kernel row (names are resolved only for the handful of rows kernels return)."""
+    if row is None:
+        return None
+    roster_id = row.get('roster_id')
+    if roster_id is not None and not pd.isna(roster_id):
+        row['team'] = resolve_team_name_from_roster_id(roster_id, row.get('league'), league_teams)
+    return row
+
+
+def weekly_highlight_cards(df_all, league_teams):
+    """Card HTML for one week's highest scoring team, lowest scoring team and closest matchup."""
+    # Highest / lowest scoring team and the closest (league, matchup) pair
+    top = _attach_team(highlights.top_score(df_all), league_teams)
+    bottom = _attach_team(highlights.bottom_score(df_all), league_teams)
+    closest = highlights.closest_matchup(df_all)
+
+    # Defensive getters and display preparation
+    if top is not None:
+        top_team = top.get('team', None)
+        top_league = top.get('league', '')
+        top_points = top.get('points', 0.0)
+    else:
+        top_team = None
+        top_league = ''
+        top_points = 0.0
+
+    if bottom is not None:
+        bottom_team = bottom.get('team', None)
+        bottom_league = bottom.get('league', '')
+        bottom_points = bottom.get('points', 0.0)
+    else:
+        bottom_team = None
+        bottom_league = ''
+        bottom_points = 0.0
+
+    # Prepare closest matchup display
+    closest_display = None
+    if closest is not None:
+        first, second, diff = closest
+        teams = [_attach_team(r, league_teams) for r in (first, second)]
+        names = [r.get('team') or f"Team {r.get('roster_id', '?')}" for r in teams]
+        closest_display = (names[0], names[1], diff)
+
+    # Each highlighted box has a larger subheading and the league on its own line
+    display_top = top_team or (f"Team {int(top.get('roster_id'))}" if top is not None and top.get('roster_id') is not None else "Team ?")
+    cards = [render.highlight_card("Highest scoring team", [
+        ('sl-hl-primary', 'font-size:20px;font-weight:600', display_top),
+        ('sl-hl-muted', 'font-size:13px', top_league),
+        ('sl-hl-success', 'font-size:20px;margin-top:6px', f"{float(top_points):.2f} pts"),
+    ])]
+
+    display_bottom = bottom_team or (f"Team {int(bottom.get('roster_id'))}" if bottom is not None and bottom.get('roster_id') is not None else "Team ?")
+    cards.append(render.highlight_card("Lowest scoring team", [
+        ('sl-hl-primary', 'font-size:20px;font-weight:600', display_bottom),
+        ('sl-hl-muted', 'font-size:13px', bottom_league),
+        ('sl-hl-danger', 'font-size:20px;margin-top:6px', f"{float(bottom_points):.2f} pts"),
+    ]))
+
+    if closest_display is not None:
+        t1, t2, diff = closest_display
+        cards.append(render.highlight_card("Closest matchup", [
+            ('sl-hl-primary', 'font-size:20px', t1),
+            ('sl-hl-muted', 'font-size:13px', 'vs'),
+            ('sl-hl-primary', 'font-size:20px', t2),
+            ('sl-hl-primary', 'font-size:20px;margin-top:6px', f"Δ {float(diff):.2f} pts"),
+        ]))
+    else:
+        cards.append(render.highlight_card("Closest matchup", [
+            ('sl-hl-muted', 'font-size:14px', 'No close matchups found'),
+        ]))
+    return cards
+
+
+def display_live_week(week, league_teams):
+    """Live weekly section: the current week's highlight cards and scores.
+
+    Runs as an `st.fragment` with `run_every=LIVE_POLL_SECONDS`, so each poll reruns only this function: it asks the
+    shared `live.WeekPoller` for `/matchups/{week}` of every league and marks the scores that moved since this
+    session's previous poll. Season highlights and standings stay as the last full run rendered them.
     """
+    latest = live.get_week_poller().poll(LEAGUES.values(), week, LIVE_POLL_SECONDS)
+    records = []
+    for league_name, league_id in LEAGUES.items():
+        for e in _extract_entries_from_matchups(latest.get(str(league_id)) or []):
+            e['league'] = league_name
+            records.append(e)
+
+    snapshot_key = f"live_scores_week_{week}"
+    snapshot, changed = live.diff_scores(st.session_state.get(snapshot_key), records)
+    st.session_state[snapshot_key] = snapshot
+
+    st.subheader(f"Week {week} (live)")
+    try:
+        now_et = datetime.now(tz=ZoneInfo("America/New_York"))
+    except Exception:
+        now_et = datetime.now()
+    st.caption(
+        f"Scores refresh every {LIVE_POLL_SECONDS}s. Updated {now_et.strftime('%I:%M:%S %p %Z')}; "
+        f"{len(changed)} score(s) changed since the last update."
+    )
+
+    if not records:
+        st.info("No matchups for the current week yet.")
+        return
+    frame = highlights.build_frame(records)
+    if frame['points'].notna().any():
+        for column, card in zip(st.columns(3), weekly_highlight_cards(frame, league_teams)):
+            with column:
+                st.markdown(card, unsafe_allow_html=True)
+    else:
+        st.info("No scores for the current week yet.")
+
+    score_rows = []
+    for e in sorted(records, key=lambda e: (e['league'], str(e.get('matchup_id')), str(e.get('roster_id')))):
+        key = (e['league'], e.get('matchup_id'), e.get('roster_id'))
+        score_rows.append({
+            'League': e['league'],
+            'Matchup': e.get('matchup_id'),
+            'Team': resolve_team_name_from_roster_id(e.get('roster_id'), e['league'], league_teams),
+            'Points': cache.to_float(e.get('points')),
+            'Changed': '▲' if key in changed else '',
+        })
+    st.dataframe(pd.DataFrame(score_rows), hide_index=True)
+
+
+def display_league_standings(league_name, league_id, league_index=0, total_leagues=1):
+    """Display standings for a single league"""
+    st.subheader(f"🏆 {league_name}")
+
+    standings_rows, promotion_allowed, demotion_allowed, problem = load_league_standings(
+        league_name, league_id, league_index, total_leagues
+    )
+    if problem is not None:
+        _show_problem(problem)
+        return
+
+    # The table HTML (with its own CSS, since it renders in an iframe) is cached by a hash of the rows.
+    html = render.standings_table(standings_rows, _standings_columns(standings_rows), promotion_allowed, demotion_allowed)
 
     # Compute a reasonable height for the embedded HTML table and render via components.html
     try:
-        row_height = 36
-        padding = 60
-        table_height = int(n * row_height + padding)
         max_height = 1200
-        table_height = min(table_height, max_height)
+        table_height = min(_table_height(len(standings_rows)), max_height)
     except Exception:
         table_height = 400
 
@@ -1218,12 +778,177 @@ def display_league_standings(league_name, league_id, league_index=0, total_leagu
         components.html(html, height=table_height, scrolling=True)
     except Exception as e:
         st.error(f"Could not render custom table HTML, falling back to Streamlit table: {e}")
-        st.dataframe(df)
+        st.dataframe(_standings_dataframe(standings_rows))
     
     # (Removed: per-request, metrics for Current Week / Regular Season Weeks / Total Teams)
 
+def display_combined_page(leagues, card_sections=()):
+    """Render every league's standings (and any collected highlight cards) in a single components.html iframe.
+
+    `card_sections` is a list of (title, [card HTML]) pairs. Sections collapse client-side, so opening or closing
+    one does not rerun the script; leagues that cannot be shown get their warning above the iframe instead.
+    """
+    total_leagues = len(leagues)
+    sections = []
+    league_tables = []
+    height = 40  # expand/collapse toolbar
+    for title, cards in card_sections:
+        sections.append((title, render.card_grid(cards)))
+        height += 44 + -(-len(cards) // 3) * 150
+    for idx, (league_name, league_id) in enumerate(leagues.items()):
+        standings_rows, promotion_allowed, demotion_allowed, problem = load_league_standings(
+            league_name, league_id, league_index=idx, total_leagues=total_leagues
+        )
+        if problem is not None:
+            _show_problem(problem)
+            continue
+        columns = _standings_columns(standings_rows)
+        markup = render.standings_markup(standings_rows, columns, promotion_allowed, demotion_allowed)
+        sections.append((f"🏆 {league_name}", markup))
+        league_tables.append((league_name, standings_rows))
+        height += 44 + _table_height(len(standings_rows))
+
+    if not sections:
+        return
+
+    # One iframe sized to its content (phones scroll the page, not a nested frame); fall back to native elements
+    try:
+        components.html(render.combined_page(sections), height=height, scrolling=True)
+    except Exception as e:
+        st.error(f"Could not render custom table HTML, falling back to Streamlit table: {e}")
+        st.markdown(render.HIGHLIGHT_CSS, unsafe_allow_html=True)
+        for title, cards in card_sections:
+            st.subheader(title)
+            for card in cards:
+                st.markdown(card, unsafe_allow_html=True)
+        for league_name, standings_rows in league_tables:
+            st.subheader(f"🏆 {league_name}")
+            st.dataframe(_standings_dataframe(standings_rows))
+
 # Main app
+def _debug_requested():
+    try:
+        value = st.query_params.get("debug")
+    except Exception:
+        return False
+    return str(value).strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _metrics_dataframe(series):
+    def _ms(seconds):
+        return round(seconds * 1000, 1) if seconds is not None else None
+
+    rows = []
+    for s in series:
+        histogram = s.kind == 'histogram'
+        rows.append({
+            'Metric': s.name,
+            'Labels': ", ".join(f"{key}={value}" for key, value in s.labels),
+            # Counters report their total; histograms the number of observations and their sum in seconds
+            'Value': int(s.count) if histogram else round(s.total, 3),
+            'Sum s': round(s.total, 3) if histogram else None,
+            'Mean ms': _ms(s.total / s.count) if histogram and s.count else None,
+            'p50 ms': _ms(metrics.quantile(s, 0.5)) if histogram else None,
+            'p95 ms': _ms(metrics.quantile(s, 0.95)) if histogram else None,
+        })
+    return pd.DataFrame(rows)
+
+
+# All-time record row key -> column header
+HISTORY_RECORD_COLUMNS = {
+    'owner_name': 'Owner',
+    'seasons': 'Seasons',
+    'wins': 'Wins',
+    'losses': 'Losses',
+    'ties': 'Ties',
+    'points_for': 'Points For',
+    'first_places': '1st Places',
+    'top_tier_seasons': 'Top-Tier Seasons',
+    'promotions': 'Promotions',
+    'relegations': 'Relegations',
+}
+# Best-week row key -> column header
+BEST_WEEK_COLUMNS = {
+    'points': 'Points',
+    'team_name': 'Team',
+    'owner_name': 'Owner',
+    'tier_name': 'League',
+    'season': 'Season',
+    'week': 'Week',
+}
+MOVEMENT_MARKS = {'promoted': ' ▲', 'relegated': ' ▼'}
+
+
+def _tier_movement_dataframe(history_rows):
+    """Owners by season: the league and finish of each season, marked ▲/▼ when the owner moved tier into it."""
+    frame = pd.DataFrame(history_rows)
+    frame['cell'] = (
+        frame['tier_name'] + " #" + frame['rank'].astype(str) + frame['movement'].map(MOVEMENT_MARKS).fillna("")
+    )
+    table = frame.pivot_table(index='owner_id', columns='season', values='cell', aggfunc='first').fillna("")
+    # Owners ordered by the tier and finish of their latest season, current top tier first
+    latest = frame.sort_values('season').groupby('owner_id').last()
+    order = latest.sort_values(['season', 'tier', 'rank'], ascending=[False, True, True]).index
+    table = table.reindex(order)
+    table.columns = [str(season) for season in table.columns]
+    table.insert(0, 'Owner', latest['owner_name'].reindex(order))
+    return table.reset_index(drop=True)
+
+
+def display_history():
+    """All-time records, tier movement and best weeks from the multi-season archive (`python -m superleague.archive`).
+
+    Shown when the cache DB holds more than one archived season; each table is a single indexed query.
+    """
+    db = cache.get_db_connection()
+    archived = cache.load_archive_leagues(db) if db else None
+    if not archived or len({row['season'] for row in archived}) < 2:
+        return
+    st.header("📜 History")
+    records_tab, movement_tab, best_tab = st.tabs(["All-time records", "Tier movement", "Best weeks"])
+    with records_tab:
+        records = cache.load_all_time_records(db) or []
+        st.dataframe(
+            pd.DataFrame(records, columns=list(HISTORY_RECORD_COLUMNS)).rename(columns=HISTORY_RECORD_COLUMNS),
+            hide_index=True,
+        )
+    with movement_tab:
+        history_rows = cache.load_tier_history(db)
+        if history_rows:
+            st.dataframe(_tier_movement_dataframe(history_rows), hide_index=True)
+    with best_tab:
+        best = cache.load_best_weeks(db, 10) or []
+        st.dataframe(
+            pd.DataFrame(best, columns=list(BEST_WEEK_COLUMNS)).rename(columns=BEST_WEEK_COLUMNS),
+            hide_index=True,
+        )
+
+
+def display_debug_panel():
+    """`?debug=1`: fetch and stage metrics for this process and, with a cache DB, the totals in its metrics table."""
+    st.header("Debug: metrics")
+    sources = {"This process": metrics.REGISTRY.snapshot()}
+    db = cache.get_db_connection()
+    if db:
+        try:
+            sources["Cache database (all processes)"] = metrics.load_series(db)
+        except Exception as e:
+            st.caption(f"Could not read the metrics table: {e}")
+    for label, series in sources.items():
+        st.subheader(label)
+        if series:
+            st.dataframe(_metrics_dataframe(series), hide_index=True)
+        else:
+            st.caption("Nothing recorded yet.")
+    # Percentiles are bucket upper bounds; the export carries the full histograms
+    text = metrics.prometheus_text(list(sources.values())[-1])
+    st.download_button("Download Prometheus metrics", text, file_name="superleague.prom", mime="text/plain")
+    with st.expander("Prometheus text"):
+        st.code(text)
+
+
 def main():
+    stages = metrics.StageTimer()
     st.title("🏈 316 Super League")
     # Display last-updated time in US Eastern Time
     try:
@@ -1246,12 +971,29 @@ def main():
         st.info("Streamlit secrets are the recommended option for deployments.")
         return
 
-    # Collect rosters/users (cached) for all leagues once (needed by weekly and season highlights)
-    league_rosters = {}
-    league_users = {}
-    for league_name, league_id in LEAGUES.items():
-        league_rosters[league_name] = fetch_rosters(league_id) or []
-        league_users[league_name] = fetch_users(league_id) or []
+    # Try to determine the latest completed week using the NFL state endpoint (fast)
+    state = None
+    try:
+        state = fetch_nfl_state()
+    except Exception:
+        state = None
+
+    # Fetch everything this render needs (league info, rosters, users, highlight + season weeks) concurrently
+    # up front; the per-league calls below are then served from cache.
+    candidate_weeks = _highlight_candidate_weeks(state)
+    max_completed_week = _season_week_limit(state)
+    prefetch_weeks = list(candidate_weeks)
+    if max_completed_week != 0:
+        prefetch_weeks.extend(range(1, (max_completed_week or MAX_SEASON_WEEKS) + 1))
+    odds_weeks = None
+    if max_completed_week and config.ODDS_SIMULATIONS > 0:
+        # The odds columns also read the rest of each league's regular season
+        odds_weeks = partial(_remaining_regular_season, max_completed_week)
+    prefetch_league_data(LEAGUES.values(), prefetch_weeks, odds_weeks)
+
+    # Team-name indexes (cached per rosters/users refresh) for all leagues, shared by weekly and season highlights
+    league_teams = {league_name: fetch_team_index(league_id) for league_name, league_id in LEAGUES.items()}
+    stages.lap('prefetch')
 
     # Helper to consistently render HTML blocks (dedent then allow unsafe HTML)
     def render_html_block(html_block: str):
@@ -1264,249 +1006,105 @@ def main():
     # Season highlights (single-week extremes across the season)
     # ...season highlights moved below weekly highlights...
 
+    # SL_RENDER_MODE=combined_highlights collects the cards for the single combined iframe below the highlights
+    # instead of laying them out in st.columns here
+    card_sections = [] if RENDER_MODE == "combined_highlights" else None
+
+    def card_columns(count):
+        if card_sections is not None:
+            return [contextlib.nullcontext() for _ in range(count)]
+        return st.columns(count)
+
+    def show_card(section, card_html):
+        if card_sections is None:
+            render_html_block(card_html)
+            return
+        if not card_sections or card_sections[-1][0] != section:
+            card_sections.append((section, []))
+        card_sections[-1][1].append(card_html)
+
+    # Card styles are emitted once for the whole page; each card below is plain markup
+    if card_sections is None:
+        st.markdown(render.HIGHLIGHT_CSS, unsafe_allow_html=True)
+
     # Weekly highlights (across all leagues) - moved to top so users see highlights first
     st.markdown("---")
-    st.header("Weekly highlights")
-
-    # Try to determine the latest completed week using the NFL state endpoint (fast)
-    state = None
-    try:
-        state = fetch_nfl_state()
-    except Exception:
-        state = None
+    if card_sections is None:
+        st.header("Weekly highlights")
 
     if not state or 'week' not in state:
         st.info("Could not determine current NFL week from Sleeper; weekly highlights may be limited.")
 
-    # Candidate weeks: start at reported NFL week and step back up to 4 weeks
-    candidate_weeks = []
-    if state and isinstance(state.get('week'), int):
-        current_week = state.get('week')
-        # start from the previous week (most recently completed week), not the current in-progress week
-        start_week = max(current_week - 1, 1)
-        for w in range(start_week, max(start_week - 4, 0), -1):
-            candidate_weeks.append(w)
-    else:
-        # Fallback: try recent weeks 18..1 (but keep short to avoid probing too many)
-        candidate_weeks = list(range(18, 14, -1))
+    # While games are on (or with SL_LIVE_MODE=on) the current week gets a section that reruns on its own timer;
+    # Streamlit releases without st.fragment render it once per full run instead.
+    if card_sections is None and live.live_mode_active(state):
+        live_week = cache.to_int(state.get('week'))
+        fragment = getattr(st, 'fragment', None)
+        if fragment is not None:
+            fragment(run_every=LIVE_POLL_SECONDS)(display_live_week)(live_week, league_teams)
+        else:
+            display_live_week(live_week, league_teams)
+        st.divider()
+        stages.lap('live')
 
     completeness_threshold = 0.8
     selected_week = None
-    flat_entries = []
+    df_all = highlights.build_frame([])
+
+    def _with_team(row):
+        return _attach_team(row, league_teams)
 
     # Collect entries per candidate week so we can pick a sensible fallback if no week meets the threshold
-    week_to_entries = {}
+    week_frames = {}
 
     for w in candidate_weeks:
-        week_entries = []
-        total_matchups = 0
-        complete_matchups = 0
+        week_records = []
         # Fetch matchups for this week across leagues (fast: single-week endpoints)
         for league_name, league_id in LEAGUES.items():
             raw = fetch_matchups(league_id, week=w) or []
-            entries = _extract_entries_from_matchups(raw)
-            # Add league name and collect; also resolve team names from roster_id
-            for e in entries:
-                e_copy = dict(e)
-                e_copy['league'] = league_name
-                # Resolve team display name if possible
-                roster_id = e_copy.get('roster_id')
-                if roster_id is not None:
-                    e_copy['team'] = resolve_team_name_from_roster_id(roster_id, league_name, league_rosters, league_users)
-                week_entries.append(e_copy)
-
-            # compute matchup completeness per league
-            # group by matchup_id
-            mids = {}
-            for e in entries:
-                mid = e.get('matchup_id')
-                if mid is None:
-                    continue
-                mids.setdefault(mid, []).append(e)
-            for grp in mids.values():
-                total_matchups += 1
-                if all((ent.get('points') is not None) for ent in grp):
-                    complete_matchups += 1
-
-        week_to_entries[w] = week_entries
-
-        frac = (complete_matchups / total_matchups) if total_matchups > 0 else 0.0
+            for e in _extract_entries_from_matchups(raw):
+                e['league'] = league_name
+                week_records.append(e)
+        week_frame = highlights.build_frame(week_records)
+        week_frames[w] = week_frame
+
+        # A week counts once enough of its (league, matchup) groups have every score in
+        fractions = highlights.week_completeness(week_frame.assign(week=w))
+        frac = float(fractions.get(w, 0.0)) if not fractions.empty else 0.0
         if frac >= completeness_threshold:
             selected_week = w
-            flat_entries = week_entries
+            df_all = week_frame
             break
 
     # If none of the candidate weeks met threshold, fall back to the most recent candidate week that has any data
     if selected_week is None:
-        non_empty_weeks = [w for w, entries in week_to_entries.items() if entries]
+        non_empty_weeks = [w for w, frame in week_frames.items() if not frame.empty]
         if non_empty_weeks:
             # pick the most recent week (highest number) among those with data
             selected_week = max(non_empty_weeks)
-            flat_entries = week_to_entries[selected_week]
+            df_all = week_frames[selected_week]
             st.caption(f"Showing most recent week with data (may be in-progress): {selected_week}")
         else:
             st.info("No matchup data available for recent weeks to compute weekly highlights.")
-            flat_entries = []
 
     # Render weekly highlights (always visible if data exists)
-    if flat_entries:
-        df_all = pd.DataFrame(flat_entries)
-
+    if not df_all.empty:
         # Subtitle showing the selected week
-        if selected_week is not None:
+        weekly_title = f"Weekly highlights: Week {selected_week}" if selected_week is not None else "Weekly highlights"
+        if selected_week is not None and card_sections is None:
             st.subheader(f"Week {selected_week}")
 
-        # Highest scoring team
-        try:
-            top = df_all.loc[df_all['points'].idxmax()]
-        except Exception:
-            top = None
-        # Lowest scoring team
-        try:
-            bottom = df_all.loc[df_all['points'].idxmin()]
-        except Exception:
-            bottom = None
-
-        # Closest matchup: find pairs with same matchup_id and minimal abs diff
-        closest = None
-        # group by matchup_id
-        for mid, group in df_all.groupby('matchup_id'):
-            if len(group) < 2:
-                continue
-            pts = group['points'].tolist()
-            if len(pts) >= 2:
-                # compute min diff across pairs
-                pts_sorted = sorted(pts)
-                min_diff = min(abs(a - b) for a, b in zip(pts_sorted, pts_sorted[1:]))
-                if closest is None or min_diff < closest['diff']:
-                    # store the pair with min diff
-                    closest = {'matchup_id': mid, 'diff': min_diff, 'group': group}
-
-        col1, col2, col3 = st.columns(3)
-        # Defensive getters and display preparation
-        if top is not None:
-            top_team = top.get('team', None) if hasattr(top, 'get') else (top['team'] if 'team' in top else None)
-            top_league = top.get('league', '') if hasattr(top, 'get') else top.get('league', '')
-            top_points = top.get('points', 0.0) if hasattr(top, 'get') else top.get('points', 0.0)
-        else:
-            top_team = None
-            top_league = ''
-            top_points = 0.0
-
-        if bottom is not None:
-            bottom_team = bottom.get('team', None) if hasattr(bottom, 'get') else (bottom['team'] if 'team' in bottom else None)
-            bottom_league = bottom.get('league', '') if hasattr(bottom, 'get') else bottom.get('league', '')
-            bottom_points = bottom.get('points', 0.0) if hasattr(bottom, 'get') else bottom.get('points', 0.0)
-        else:
-            bottom_team = None
-            bottom_league = ''
-            bottom_points = 0.0
-
-        # Prepare closest matchup display
-        closest_display = None
-        if closest is not None:
-            grp = closest['group']
-            teams = []
-            for _, r in grp.iterrows():
-                t = r.get('team', None) if hasattr(r, 'get') else (r['team'] if 'team' in r else None)
-                pts = r.get('points', 0.0) if hasattr(r, 'get') else r.get('points', 0.0)
-                teams.append({'team': t or f"Team {r.get('roster_id', '?')}", 'points': float(pts)})
-            if len(teams) >= 2:
-                closest_display = (teams[0]['team'], teams[1]['team'], closest['diff'])
-
-        # Render each highlighted box with larger subheading and league on its own line
-        with col1:
-            display_top = top_team or (f"Team {int(top.get('roster_id'))}" if top is not None and top.get('roster_id') is not None else "Team ?")
-            inline_css = """
-            <style>
-            .sl-hl-primary{color:var(--sl-primary,#000000);}
-            .sl-hl-muted{color:var(--sl-muted,#6c757d);}
-            .sl-hl-success{color:var(--sl-success,#1e7e34);font-weight:600}
-            @media (prefers-color-scheme: dark){
-              .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
-              .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-              .sl-hl-success{color:var(--sl-success,rgba(38,166,91,0.95)) !important}
-            }
-            </style>
-            """
-            html_top = f"""
-            {inline_css}
-            <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Highest scoring team</div>
-            <div class='sl-hl-primary' style='font-size:20px;font-weight:600'>{_html.escape(str(display_top))}</div>
-            <div class='sl-hl-muted' style='font-size:13px'>{_html.escape(str(top_league))}</div>
-            <div class='sl-hl-success' style='font-size:20px;margin-top:6px'>{float(top_points):.2f} pts</div>
-            """
-            st.markdown(html_top, unsafe_allow_html=True)
+        for column, card in zip(card_columns(3), weekly_highlight_cards(df_all, league_teams)):
+            with column:
+                show_card(weekly_title, card)
 
-        with col2:
-            display_bottom = bottom_team or (f"Team {int(bottom.get('roster_id'))}" if bottom is not None and bottom.get('roster_id') is not None else "Team ?")
-            inline_css_bottom = """
-            <style>
-            .sl-hl-primary{color:var(--sl-primary,#000000);}
-            .sl-hl-muted{color:var(--sl-muted,#6c757d);}
-            .sl-hl-danger{color:var(--sl-danger,#e53935);font-weight:600}
-            @media (prefers-color-scheme: dark){
-              .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
-              .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-              .sl-hl-danger{color:var(--sl-danger,rgba(239,83,80,0.95)) !important}
-            }
-            </style>
-            """
-            html_bottom = f"""
-            {inline_css_bottom}
-            <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Lowest scoring team</div>
-            <div class='sl-hl-primary' style='font-size:20px;font-weight:600'>{_html.escape(str(display_bottom))}</div>
-            <div class='sl-hl-muted' style='font-size:13px'>{_html.escape(str(bottom_league))}</div>
-            <div class='sl-hl-danger' style='font-size:20px;margin-top:6px'>{float(bottom_points):.2f} pts</div>
-            """
-            st.markdown(html_bottom, unsafe_allow_html=True)
-
-        with col3:
-            if closest_display is not None:
-                t1, t2, diff = closest_display
-                inline_css_closest = """
-                <style>
-                .sl-hl-primary{color:var(--sl-primary,#000000);font-weight:600}
-                .sl-hl-muted{color:var(--sl-muted,#6c757d)}
-                @media (prefers-color-scheme: dark){
-                  .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
-                  .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-                }
-                </style>
-                """
-                html_closest = f"""
-                {inline_css_closest}
-                <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Closest matchup</div>
-                <div class='sl-hl-primary' style='font-size:20px'>{_html.escape(str(t1))}</div>
-                <div class='sl-hl-muted' style='font-size:13px'>vs</div>
-                <div class='sl-hl-primary' style='font-size:20px'>{_html.escape(str(t2))}</div>
-                <div class='sl-hl-primary' style='font-size:20px;margin-top:6px'>Δ {float(diff):.2f} pts</div>
-                """
-                st.markdown(html_closest, unsafe_allow_html=True)
-            else:
-                inline_css_closest = """
-                <style>
-                .sl-hl-muted{color:var(--sl-muted,#6c757d)}
-                @media (prefers-color-scheme: dark){
-                  .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-                }
-                </style>
-                """
-                html_closest = f"""
-                {inline_css_closest}
-                <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Closest matchup</div>
-                <div class='sl-hl-muted' style='font-size:14px'>No close matchups found</div>
-                """
-                st.markdown(html_closest, unsafe_allow_html=True)
-
-        st.divider()
-    st.header("Season highlights")
-
-    # Determine the latest completed week once so we can limit season fetches
-    max_completed_week = None
-    if state and isinstance(state.get('week'), int):
-        max_completed_week = max(state.get('week') - 1, 0)
+        if card_sections is None:
+            st.divider()
+    stages.lap('weekly_highlights')
+    if card_sections is None:
+        st.header("Season highlights")
 
+    # max_completed_week was determined from the NFL state up front so season fetches stay limited
     if max_completed_week is None:
         try:
             nfl_state = fetch_nfl_state()
@@ -1516,32 +1114,25 @@ def main():
             max_completed_week = max(nfl_state.get('week') - 1, 0)
 
     # Collect season entries across all leagues (probe only completed weeks when known)
-    season_entries = []
+    df_season = highlights.build_frame([])
     if max_completed_week == 0:
         st.info("No completed-week season data available to compute season highlights.")
     else:
         fetch_limit = max_completed_week if max_completed_week not in (None, 0) else None
+        season_records = []
         for league_name, league_id in LEAGUES.items():
             raw = fetch_matchups(league_id, max_week=fetch_limit) or []
-            entries = _extract_entries_from_matchups(raw)
-            for e in entries:
-                pts = e.get('points')
-                if pts is None:
-                    continue
-                e_copy = dict(e)
-                e_copy['league'] = league_name
-                roster_id = e_copy.get('roster_id')
-                if roster_id is not None:
-                    e_copy['team'] = resolve_team_name_from_roster_id(roster_id, league_name, league_rosters, league_users)
-                season_entries.append(e_copy)
-
-        if not season_entries:
+            for e in _extract_entries_from_matchups(raw):
+                e['league'] = league_name
+                season_records.append(e)
+        df_season = highlights.scored(highlights.build_frame(season_records))
+
+        if df_season.empty:
             st.info("No season matchup data available to compute season highlights.")
         else:
-            if max_completed_week is None:
-                weeks_with_points = [e.get('week') for e in season_entries if e.get('week') is not None]
-                if weeks_with_points:
-                    max_completed_week = max(weeks_with_points)
+            weeks = pd.to_numeric(df_season['week'], errors='coerce')
+            if max_completed_week is None and weeks.notna().any():
+                max_completed_week = int(weeks.max())
 
             if max_completed_week is not None:
                 try:
@@ -1549,62 +1140,24 @@ def main():
                 except (TypeError, ValueError):
                     limit_int = None
                 if limit_int is not None:
-                    filtered_entries = []
-                    for entry in season_entries:
-                        try:
-                            wk = int(entry.get('week'))
-                        except (TypeError, ValueError):
-                            continue
-                        if wk <= limit_int:
-                            filtered_entries.append(entry)
-                    season_entries = filtered_entries
-
-            if not season_entries:
+                    df_season = df_season[weeks <= limit_int]
+
+            if df_season.empty:
                 st.info("No completed-week season data available to compute season highlights.")
-                season_entries = []
-        
-    if not season_entries:
+
+    if df_season.empty:
         # nothing to do further
         pass
     else:
-        import math
-        df_season = pd.DataFrame(season_entries)
-
         # Season-high and season-low (single-week)
-        try:
-            season_top = df_season.loc[df_season['points'].idxmax()]
-        except Exception:
-            season_top = None
-        try:
-            season_bottom = df_season.loc[df_season['points'].idxmin()]
-        except Exception:
-            season_bottom = None
-
-        # Season-closest single-week matchup: group by (league, week, matchup_id)
-        closest_season = None
-        groups = {}
-        for _, row in df_season.iterrows():
-            wk = row.get('week')
-            mid = row.get('matchup_id')
-            league = row.get('league')
-            if wk is None or mid is None:
-                continue
-            key = f"{league}:{wk}:{mid}"
-            groups.setdefault(key, []).append(row)
-
-        for grp in groups.values():
-            if len(grp) < 2:
-                continue
-            # extract points and compute minimal pairwise diff
-            pts = sorted([float(r.get('points', 0.0)) for r in grp])
-            if len(pts) < 2:
-                continue
-            min_diff = min(abs(a - b) for a, b in zip(pts, pts[1:]))
-            if closest_season is None or min_diff < closest_season['diff']:
-                closest_season = {'diff': min_diff, 'group': grp}
+        season_top = _with_team(highlights.top_score(df_season))
+        season_bottom = _with_team(highlights.bottom_score(df_season))
+
+        # Season-closest single-week matchup across every (league, week, matchup_id)
+        closest_season = highlights.closest_matchup(df_season)
 
         # Render season highlights using the same three-column layout and inline CSS used above
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3 = card_columns(3)
 
         # Prepare display values defensively
         if season_top is not None:
@@ -1632,135 +1185,71 @@ def main():
         # Closest season matchup display
         season_closest_display = None
         if closest_season is not None:
-            grp = closest_season['group']
+            first, second, diff = closest_season
             teams = []
-            for r in grp:
-                # r may be a Series or dict-like
-                try:
-                    name = r.get('team') if hasattr(r, 'get') else r['team']
-                    pts = float(r.get('points') if hasattr(r, 'get') else r['points'])
-                except Exception:
-                    name = None
-                    pts = 0.0
-                teams.append({'team': name or f"Team {r.get('roster_id', '?')}", 'points': pts, 'league': r.get('league'), 'week': r.get('week')})
-            if len(teams) >= 2:
-                season_closest_display = (teams[0], teams[1], closest_season['diff'])
+            for r in (_with_team(first), _with_team(second)):
+                teams.append({'team': r.get('team') or f"Team {r.get('roster_id', '?')}", 'points': float(r.get('points', 0.0)), 'league': r.get('league'), 'week': r.get('week')})
+            season_closest_display = (teams[0], teams[1], diff)
 
         # Render
         with col1:
             display_top = st_top_team or (f"Team {int(season_top.get('roster_id'))}" if season_top is not None and season_top.get('roster_id') is not None else "Team ?")
-            inline_css = """
-            <style>
-            .sl-hl-primary{color:var(--sl-primary,#000000);} 
-            .sl-hl-muted{color:var(--sl-muted,#6c757d);} 
-            .sl-hl-success{color:var(--sl-success,#1e7e34);font-weight:600}
-            @media (prefers-color-scheme: dark){
-              .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
-              .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-              .sl-hl-success{color:var(--sl-success,rgba(38,166,91,0.95)) !important}
-            }
-            </style>
-            """
             wk_label = f" (Week {st_top_week})" if st_top_week is not None else ""
-            html_top = f"""
-            {inline_css}
-            <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Season highest single-week team</div>
-            <div class='sl-hl-primary' style='font-size:20px;font-weight:600'>{_html.escape(str(display_top))}</div>
-            <div class='sl-hl-muted' style='font-size:13px'>{_html.escape(str(st_top_league))}{wk_label}</div>
-            <div class='sl-hl-success' style='font-size:20px;margin-top:6px'>{st_top_points:.2f} pts</div>
-            """
-            render_html_block(html_top)
+            show_card("Season highlights", render.highlight_card("Season highest single-week team", [
+                ('sl-hl-primary', 'font-size:20px;font-weight:600', display_top),
+                ('sl-hl-muted', 'font-size:13px', f"{st_top_league}{wk_label}"),
+                ('sl-hl-success', 'font-size:20px;margin-top:6px', f"{st_top_points:.2f} pts"),
+            ]))
 
         with col2:
             display_bottom = st_bottom_team or (f"Team {int(season_bottom.get('roster_id'))}" if season_bottom is not None and season_bottom.get('roster_id') is not None else "Team ?")
-            inline_css_bottom = """
-            <style>
-            .sl-hl-primary{color:var(--sl-primary,#000000);} 
-            .sl-hl-muted{color:var(--sl-muted,#6c757d);} 
-            .sl-hl-danger{color:var(--sl-danger,#e53935);font-weight:600}
-            @media (prefers-color-scheme: dark){
-              .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
-              .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-              .sl-hl-danger{color:var(--sl-danger,rgba(239,83,80,0.95)) !important}
-            }
-            </style>
-            """
             wk_label_b = f" (Week {st_bottom_week})" if st_bottom_week is not None else ""
-            html_bottom = f"""
-            {inline_css_bottom}
-            <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Season lowest single-week team</div>
-            <div class='sl-hl-primary' style='font-size:20px;font-weight:600'>{_html.escape(str(display_bottom))}</div>
-            <div class='sl-hl-muted' style='font-size:13px'>{_html.escape(str(st_bottom_league))}{wk_label_b}</div>
-            <div class='sl-hl-danger' style='font-size:20px;margin-top:6px'>{st_bottom_points:.2f} pts</div>
-            """
-            render_html_block(html_bottom)
+            show_card("Season highlights", render.highlight_card("Season lowest single-week team", [
+                ('sl-hl-primary', 'font-size:20px;font-weight:600', display_bottom),
+                ('sl-hl-muted', 'font-size:13px', f"{st_bottom_league}{wk_label_b}"),
+                ('sl-hl-danger', 'font-size:20px;margin-top:6px', f"{st_bottom_points:.2f} pts"),
+            ]))
 
         with col3:
             if season_closest_display is not None:
                 left, right, diff = season_closest_display
-                inline_css_closest = """
-                <style>
-                .sl-hl-primary{color:var(--sl-primary,#000000);font-weight:600}
-                .sl-hl-muted{color:var(--sl-muted,#6c757d)}
-                @media (prefers-color-scheme: dark){
-                  .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
-                  .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-                }
-                </style>
-                """
                 wk_label_l = f" (Week {left.get('week')})" if left.get('week') is not None else ""
-                html_closest = f"""
-                {inline_css_closest}
-                <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Season closest single-week matchup</div>
-                <div class='sl-hl-primary' style='font-size:20px'>{_html.escape(str(left.get('team')))}</div>
-                <div class='sl-hl-muted' style='font-size:13px'>vs {left.get('league')}{wk_label_l}</div>
-                <div class='sl-hl-primary' style='font-size:20px'>{_html.escape(str(right.get('team')))}</div>
-                <div class='sl-hl-primary' style='font-size:20px;margin-top:6px'>Δ {float(diff):.2f} pts</div>
-                """
-                render_html_block(html_closest)
+                show_card("Season highlights", render.highlight_card("Season closest single-week matchup", [
+                    ('sl-hl-primary', 'font-size:20px', left.get('team')),
+                    ('sl-hl-muted', 'font-size:13px', f"vs {left.get('league')}{wk_label_l}"),
+                    ('sl-hl-primary', 'font-size:20px', right.get('team')),
+                    ('sl-hl-primary', 'font-size:20px;margin-top:6px', f"Δ {float(diff):.2f} pts"),
+                ]))
             else:
-                html_closest = f"""
-                <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Season closest single-week matchup</div>
-                <div style='font-size:14px;color:var(--sl-muted,#6c757d)'>No season close matchups found</div>
-                """
-                render_html_block(html_closest)
+                show_card("Season highlights", render.highlight_card("Season closest single-week matchup", [
+                    ('', 'font-size:14px;color:var(--sl-muted,#6c757d)', 'No season close matchups found'),
+                ]))
 
         # Insert a small blank spacer to separate the two rows visually (no visible divider)
         try:
-            render_html_block("""
-            <div style='height:16px'></div>
-            """)
+            if card_sections is None:
+                render_html_block("""
+                <div style='height:16px'></div>
+                """)
         except Exception:
             pass
 
         # --- Additional season aggregate highlights (placed directly below the three single-week highlights)
         try:
-            # Work on a copy and ensure numeric points
-            df_totals = df_season.copy()
-            df_totals['points'] = df_totals['points'].astype(float)
-
-            # Compute points against per row by summing group points and subtracting own points
-            group_cols = ['league', 'week', 'matchup_id']
-            group_sum = df_totals.groupby(group_cols)['points'].transform('sum')
-            df_totals['points_against'] = group_sum - df_totals['points']
-
-            # Aggregate per roster/team across the season
-            agg = df_totals.groupby(['roster_id', 'team', 'league'], as_index=False).agg(
-                season_points_for=('points', 'sum'),
-                season_points_against=('points_against', 'sum')
-            )
+            # Season points for/against per roster; names are resolved only for the rows we display
+            agg = highlights.season_totals(df_season)
 
             if not agg.empty:
-                season_top_total = agg.loc[agg['season_points_for'].idxmax()]
-                season_bottom_total = agg.loc[agg['season_points_for'].idxmin()]
-                season_top_against = agg.loc[agg['season_points_against'].idxmax()]
+                season_top_total = _with_team(agg.loc[agg['season_points_for'].idxmax()].copy())
+                season_bottom_total = _with_team(agg.loc[agg['season_points_for'].idxmin()].copy())
+                season_top_against = _with_team(agg.loc[agg['season_points_against'].idxmax()].copy())
             else:
                 season_top_total = season_bottom_total = season_top_against = None
         except Exception:
             season_top_total = season_bottom_total = season_top_against = None
 
         # Render the three aggregated highlights directly below the single-week season highlights
-        col1b, col2b, col3b = st.columns(3)
+        col1b, col2b, col3b = card_columns(3)
 
         with col1b:
             # Season highest total points (green)
@@ -1773,26 +1262,11 @@ def main():
                 display_league = ''
                 display_points = 0.0
 
-            inline_css = """
-            <style>
-            .sl-hl-primary{color:var(--sl-primary,#000000);}
-            .sl-hl-muted{color:var(--sl-muted,#6c757d);} 
-            .sl-hl-success{color:var(--sl-success,#1e7e34);font-weight:600}
-            @media (prefers-color-scheme: dark){
-              .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
-              .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-              .sl-hl-success{color:var(--sl-success,rgba(38,166,91,0.95)) !important}
-            }
-            </style>
-            """
-            html_top_total = f"""
-            {inline_css}
-            <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Season highest total points</div>
-            <div class='sl-hl-primary' style='font-size:20px;font-weight:600'>{_html.escape(str(display_team or 'Team ?'))}</div>
-            <div class='sl-hl-muted' style='font-size:13px'>{_html.escape(str(display_league))}</div>
-            <div class='sl-hl-success' style='font-size:20px;margin-top:6px'>{display_points:.2f} pts</div>
-            """
-            render_html_block(html_top_total)
+            show_card("Season highlights", render.highlight_card("Season highest total points", [
+                ('sl-hl-primary', 'font-size:20px;font-weight:600', display_team or 'Team ?'),
+                ('sl-hl-muted', 'font-size:13px', display_league),
+                ('sl-hl-success', 'font-size:20px;margin-top:6px', f"{display_points:.2f} pts"),
+            ]))
 
         with col2b:
             # Season lowest total points (red)
@@ -1805,26 +1279,11 @@ def main():
                 display_league = ''
                 display_points = 0.0
 
-            inline_css_bottom = """
-            <style>
-            .sl-hl-primary{color:var(--sl-primary,#000000);} 
-            .sl-hl-muted{color:var(--sl-muted,#6c757d);} 
-            .sl-hl-danger{color:var(--sl-danger,#e53935);font-weight:600}
-            @media (prefers-color-scheme: dark){
-              .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
-              .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-              .sl-hl-danger{color:var(--sl-danger,rgba(239,83,80,0.95)) !important}
-            }
-            </style>
-            """
-            html_bottom_total = f"""
-            {inline_css_bottom}
-            <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Season lowest total points</div>
-            <div class='sl-hl-primary' style='font-size:20px;font-weight:600'>{_html.escape(str(display_team or 'Team ?'))}</div>
-            <div class='sl-hl-muted' style='font-size:13px'>{_html.escape(str(display_league))}</div>
-            <div class='sl-hl-danger' style='font-size:20px;margin-top:6px'>{display_points:.2f} pts</div>
-            """
-            render_html_block(html_bottom_total)
+            show_card("Season highlights", render.highlight_card("Season lowest total points", [
+                ('sl-hl-primary', 'font-size:20px;font-weight:600', display_team or 'Team ?'),
+                ('sl-hl-muted', 'font-size:13px', display_league),
+                ('sl-hl-danger', 'font-size:20px;margin-top:6px', f"{display_points:.2f} pts"),
+            ]))
 
         with col3b:
             # Season highest points against (red)
@@ -1837,37 +1296,41 @@ def main():
                 display_league = ''
                 display_points = 0.0
 
-            inline_css_against = """
-            <style>
-            .sl-hl-primary{color:var(--sl-primary,#000000);font-weight:600}
-            .sl-hl-muted{color:var(--sl-muted,#6c757d)}
-            .sl-hl-danger{color:var(--sl-danger,#e53935);font-weight:600}
-            @media (prefers-color-scheme: dark){
-              .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
-              .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
-              .sl-hl-danger{color:var(--sl-danger,rgba(239,83,80,0.95)) !important}
-            }
-            </style>
-            """
-            html_against_total = f"""
-            {inline_css_against}
-            <div style='font-size:18px;font-weight:700;margin-bottom:6px;'>Season highest points against</div>
-            <div class='sl-hl-primary' style='font-size:20px'>{_html.escape(str(display_team or 'Team ?'))}</div>
-            <div class='sl-hl-muted' style='font-size:13px'>{_html.escape(str(display_league))}</div>
-            <div class='sl-hl-danger' style='font-size:20px;margin-top:6px'>{display_points:.2f} pts</div>
-            """
-            render_html_block(html_against_total)
+            show_card("Season highlights", render.highlight_card("Season highest points against", [
+                ('sl-hl-primary', 'font-size:20px', display_team or 'Team ?'),
+                ('sl-hl-muted', 'font-size:13px', display_league),
+                ('sl-hl-danger', 'font-size:20px;margin-top:6px', f"{display_points:.2f} pts"),
+            ]))
 
+    stages.lap('season_highlights')
     st.divider()
     # Display all leagues (first entry in LEAGUES is the top league)
-    for idx, (league_name, league_id) in enumerate(LEAGUES.items()):
-        display_league_standings(league_name, league_id, league_index=idx, total_leagues=len(LEAGUES))
+    if RENDER_MODE == "per_league":
+        for idx, (league_name, league_id) in enumerate(LEAGUES.items()):
+            display_league_standings(league_name, league_id, league_index=idx, total_leagues=len(LEAGUES))
+            st.divider()
+    else:
+        display_combined_page(LEAGUES, card_sections or [])
         st.divider()
+    stages.lap('standings')
+
+    display_history()
+    stages.lap('history')
 
     # Footer
     st.markdown("---")
-    st.markdown("💡 **Tip:** Data updates automatically every 12 hours.")
+    st.markdown("💡 **Tip:** Scores update every minute while games are on; otherwise data refreshes every few hours.")
     st.markdown("📊 Built with Streamlit • Data from Sleeper API")
 
+    stages.finish()
+    debug = _debug_requested()
+    try:
+        # Once per SL_METRICS_FLUSH_SECONDS per process; the debug panel shows up-to-date database totals
+        metrics.flush_if_due(0 if debug else None)
+    except Exception:
+        pass
+    if debug:
+        display_debug_panel()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,6 @@
+"""Benchmarks for the fetch engine, cache and dashboard, run against recorded Sleeper responses.
+
+* `benchmarks.record` saves real Sleeper responses for the configured leagues into a fixture directory.
+* `benchmarks.fixture_server` replays a fixture directory over HTTP with configurable latency and injected errors.
+* `benchmarks.run` times the dashboard and engine scenarios against that server and reports peak memory.
+"""
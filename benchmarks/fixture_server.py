@@ -0,0 +1,184 @@
+"""Stand-in for the Sleeper API that replays a fixture directory over HTTP.
+
+A fixture directory mirrors the API's paths: `/v1/league/123/matchups/3` is served from
+`<dir>/v1/league/123/matchups/3.json`, and `manifest.json` at its root names the leagues it holds (see
+`benchmarks.record`). Responses carry an ETag and honor `If-None-Match`, like Sleeper's CDN. Latency and failures
+are injected per request: `latency` seconds (plus up to `jitter`), then with probability `error_rate` a 503, or
+with probability `drop_rate` a closed connection. `GET /__stats` returns request counts by status::
+
+    python -m benchmarks.fixture_server benchmarks/fixtures/recorded --port 8765 --latency 0.05
+    SL_SLEEPER_API_BASE=http://127.0.0.1:8765/v1 streamlit run app.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def load_manifest(fixture_dir: Any) -> Dict[str, Any]:
+    """The fixture directory's manifest: `{"leagues": {name: league_id}, ...}`."""
+    with open(Path(fixture_dir) / "manifest.json", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class FixtureServer:
+    """Serve a fixture directory on a background thread; use as a context manager or call `start`/`stop`."""
+
+    def __init__(
+        self,
+        fixture_dir: Any,
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.fixture_dir = Path(fixture_dir).resolve()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.stats: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies: Dict[str, Optional[bytes]] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        """Value for `SL_SLEEPER_API_BASE` / `config.SLEEPER_API_BASE`."""
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def _body(self, path: str) -> Optional[bytes]:
+        with self._lock:
+            if path not in self._bodies:
+                target = (self.fixture_dir / (path.strip("/") + ".json")).resolve()
+                inside = self.fixture_dir in target.parents
+                self._bodies[path] = target.read_bytes() if inside and target.is_file() else None
+            return self._bodies[path]
+
+    def _fault(self) -> Optional[str]:
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self._random.random()
+        if delay:
+            time.sleep(delay)
+        if roll < self.drop_rate:
+            return 'drop'
+        if roll < self.drop_rate + self.error_rate:
+            return 'error'
+        return None
+
+    def _count(self, key: Any) -> None:
+        with self._lock:
+            self.stats[str(key)] += 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/__stats":
+                    with server._lock:
+                        body = json.dumps(dict(server.stats)).encode()
+                    self._send(200, body, {"Content-Type": "application/json"})
+                    return
+                fault = server._fault()
+                if fault == 'drop':
+                    server._count('dropped')
+                    self.close_connection = True
+                    return
+                if fault == 'error':
+                    server._count(503)
+                    self._send(503, b"injected error")
+                    return
+                body = server._body(path)
+                if body is None:
+                    server._count(404)
+                    self._send(404, b"null", {"Content-Type": "application/json"})
+                    return
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    server._count(304)
+                    self._send(304, headers={"ETag": etag})
+                    return
+                server._count(200)
+                self._send(200, body, {"Content-Type": "application/json", "ETag": etag})
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sl-fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats.clear()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.fixture_server", description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", help="fixture directory (with manifest.json)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds, uniformly")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of connections closed without an answer")
+    parser.add_argument("--seed", type=int, help="seed for latency jitter and error injection")
+    args = parser.parse_args(argv)
+
+    server = FixtureServer(args.fixtures, args.port, args.latency, args.jitter, args.error_rate, args.drop_rate, args.seed)
+    leagues = load_manifest(args.fixtures).get("leagues", {})
+    print(f"Serving {len(leagues)} leagues from {server.fixture_dir} at {server.base_url}")
+    print(f"SL_LEAGUES='{json.dumps(leagues)}' SL_SLEEPER_API_BASE={server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,77 @@
+"""Record Sleeper responses for the configured leagues into a fixture directory for `benchmarks.fixture_server`.
+
+Leagues are resolved like the ingest resolves them (`.streamlit/secrets.toml`, `SL_LEAGUES`, then `leagues.json`)::
+
+    python -m benchmarks.record benchmarks/fixtures/recorded
+
+The raw response bodies are saved unchanged, so replays exercise the same parsing as live traffic.
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from superleague import config, sleeper
+
+
+def fixture_paths(leagues: Dict[str, str], max_week: int) -> list:
+    """API paths (relative to the base URL, without `/v1`) a full-season fixture holds."""
+    paths = ["/state/nfl"]
+    for league_id in leagues.values():
+        paths.extend(f"/league/{league_id}{suffix}" for suffix in ("", "/rosters", "/users"))
+        paths.extend(f"/league/{league_id}/matchups/{week}" for week in range(1, max_week + 1))
+    return paths
+
+
+def write_fixture(fixture_dir: Path, path: str, body: bytes) -> None:
+    target = fixture_dir / "v1" / (path.strip("/") + ".json")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(body)
+
+
+def write_manifest(fixture_dir: Path, leagues: Dict[str, str], source: str, **extra) -> None:
+    manifest = {"leagues": leagues, "source": source, "created_at": datetime.now(timezone.utc).isoformat(), **extra}
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+    (fixture_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def record(fixture_dir: Path, leagues: Dict[str, str], max_week: int) -> int:
+    """Download every fixture path from `config.SLEEPER_API_BASE`; returns the number of failed requests."""
+    session = sleeper.get_http_session()
+    failed = 0
+    for path in fixture_paths(leagues, max_week):
+        try:
+            response = session.get(config.SLEEPER_API_BASE + path, timeout=(config.HTTP_CONNECT_TIMEOUT, 10))
+        except Exception as exc:
+            print(f"{path}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        if response.status_code != 200:
+            print(f"{path}: status {response.status_code}", file=sys.stderr)
+            failed += 1
+            continue
+        write_fixture(fixture_dir, path, response.content)
+    write_manifest(fixture_dir, leagues, source=config.SLEEPER_API_BASE, max_week=max_week)
+    return failed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.record", description=__doc__.splitlines()[0])
+    parser.add_argument("out", help="fixture directory to write")
+    parser.add_argument("--max-week", type=int, default=config.MAX_SEASON_WEEKS, help="last matchup week to record")
+    args = parser.parse_args(argv)
+
+    leagues = config.load_leagues_headless()
+    if not leagues:
+        print("No leagues configured; see README for the supported sources.", file=sys.stderr)
+        return 2
+    failed = record(Path(args.out), leagues, args.max_week)
+    print(f"Recorded {len(leagues)} leagues into {args.out} ({failed} failed requests)")
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""Time the dashboard and engine against a fixture directory served by `benchmarks.fixture_server`.
+
+Scenarios:
+
+* `backfill` — `ingest.run_ingest` of every league and week into an empty cache database (forced, unconditional).
+* `cold_render` — one dashboard run (`streamlit.testing` AppTest) against an empty cache database.
+* `warm_render` — one dashboard run against a backfilled database, with Streamlit's caches cleared first.
+* `highlights` — the weekly and season highlight kernels over every cached matchup entry.
+* `standings_html` — per-league standings documents and the combined page, with the fragment cache cleared.
+
+Each scenario runs `--repeat` times untraced for timings, then once more under `tracemalloc` for peak memory.
+Results print as a table; `--json` saves them and `--compare` prints the change against a saved run::
+
+    python -m benchmarks.run benchmarks/fixtures/recorded --latency 0.02 --json before.json
+    python -m benchmarks.run benchmarks/fixtures/recorded --latency 0.02 --compare before.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.fixture_server import FixtureServer, load_manifest
+from superleague import cache, config, highlights, ingest, render, sleeper, throttle
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+APP_PATH = REPO_ROOT / "app.py"
+SCENARIOS = ('backfill', 'cold_render', 'warm_render', 'highlights', 'standings_html')
+
+# A scenario's setup runs before every repetition (untimed) and returns the zero-argument callable to time.
+Scenario = Callable[["BenchContext"], Callable[[], Any]]
+
+
+class BenchContext:
+    """Shared state for one benchmark session: the fixture server, its leagues and a scratch directory."""
+
+    def __init__(self, server: FixtureServer, leagues: Dict[str, str], max_week: int, workdir: Path):
+        self.server = server
+        self.leagues = leagues
+        self.max_week = max_week
+        self.workdir = workdir
+        self._databases = 0
+        self.warm_db: Optional[Path] = None
+
+    def fresh_db(self) -> Path:
+        """Point the cache at a new, empty database file."""
+        self._databases += 1
+        path = self.workdir / f"bench-{self._databases}.db"
+        use_db(path)
+        return path
+
+    def warm(self) -> Path:
+        """A backfilled database (built on first use, then reused) with the cache pointed at it."""
+        if self.warm_db is None:
+            self.warm_db = self.fresh_db()
+            ingest.run_ingest(self.leagues, max_week=self.max_week, force=True)
+        use_db(self.warm_db)
+        return self.warm_db
+
+
+def use_db(path: Path) -> None:
+    cache.close_db_connection()
+    cache.configure_cache_db_path(path)
+    # The freshness policy memoizes the NFL state of whichever database it read last
+    sleeper._policy_state['loaded_at'] = None
+
+
+def clear_streamlit_caches() -> None:
+    import streamlit as st
+
+    # Clearing outside a Streamlit server logs a "no runtime" warning per call
+    for name in ("streamlit.runtime.caching.cache_data_api", "streamlit.runtime.scriptrunner_utils.script_run_context"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    render.FRAGMENTS.clear()
+
+
+def _run_app() -> None:
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(APP_PATH), default_timeout=600)
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"dashboard raised: {app.exception[0].value}")
+
+
+def backfill(ctx: BenchContext) -> Callable[[], Any]:
+    ctx.fresh_db()
+    return lambda: ingest.run_ingest(ctx.leagues, max_week=ctx.max_week, force=True)
+
+
+def cold_render(ctx: BenchContext) -> Callable[[], Any]:
+    ctx.fresh_db()
+    clear_streamlit_caches()
+    return _run_app
+
+
+def warm_render(ctx: BenchContext) -> Callable[[], Any]:
+    ctx.warm()
+    clear_streamlit_caches()
+    return _run_app
+
+
+def _season_records(ctx: BenchContext) -> List[dict]:
+    db = cache.get_db_connection()
+    records = []
+    for league_name, league_id in ctx.leagues.items():
+        for week in range(1, ctx.max_week + 1):
+            for entry in cache.load_matchup_summaries(db, league_id, week) or []:
+                records.append(dict(entry, league=league_name))
+    return records
+
+
+def highlight_kernels(ctx: BenchContext) -> Callable[[], Any]:
+    ctx.warm()
+    records = _season_records(ctx)
+
+    def _kernels():
+        frame = highlights.build_frame(records)
+        for _, week_frame in frame.groupby('week', sort=False):
+            highlights.top_score(week_frame)
+            highlights.bottom_score(week_frame)
+            highlights.closest_matchup(week_frame)
+        highlights.week_completeness(frame)
+        highlights.season_totals(frame)
+        season = highlights.scored(frame)
+        return highlights.top_score(season), highlights.closest_matchup(season)
+
+    return _kernels
+
+
+def standings_html(ctx: BenchContext) -> Callable[[], Any]:
+    ctx.warm()
+    db = cache.get_db_connection()
+    tables = [cache.load_standings(db, league_id) or [] for league_id in ctx.leagues.values()]
+    columns = {'rank': 'Rank', 'team_name': 'Team', 'wins': 'W', 'losses': 'L', 'ties': 'T', 'points_for': 'PF', 'points_against': 'PA'}
+    render.FRAGMENTS.clear()
+
+    def _render():
+        sections = []
+        for index, rows in enumerate(tables):
+            render.standings_table(rows, columns, index > 0, index < len(tables) - 1)
+            sections.append((str(index), render.standings_markup(rows, columns, index > 0, index < len(tables) - 1)))
+        return render.combined_page(sections)
+
+    return _render
+
+
+SCENARIO_FUNCTIONS: Dict[str, Scenario] = {
+    'backfill': backfill,
+    'cold_render': cold_render,
+    'warm_render': warm_render,
+    'highlights': highlight_kernels,
+    'standings_html': standings_html,
+}
+
+
+def measure(ctx: BenchContext, scenario: Scenario, repeat: int) -> Dict[str, Any]:
+    timings = []
+    requests = 0
+    for _ in range(repeat):
+        work = scenario(ctx)
+        ctx.server.reset_stats()
+        started = time.perf_counter()
+        work()
+        timings.append(time.perf_counter() - started)
+        requests = sum(ctx.server.stats.values())
+
+    work = scenario(ctx)
+    tracemalloc.start()
+    try:
+        work()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'runs': [round(t, 4) for t in timings],
+        'median_s': round(statistics.median(timings), 4),
+        'min_s': round(min(timings), 4),
+        'peak_kib': round(peak / 1024, 1),
+        'requests': requests,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def format_results(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    header = f"{'scenario':<15} {'median ms':>10} {'min ms':>10} {'peak KiB':>10} {'requests':>8}"
+    if baseline:
+        header += f" {'base ms':>10} {'change':>8}"
+    lines = [header, "-" * len(header)]
+    for name, result in results.items():
+        line = (
+            f"{name:<15} {result['median_s'] * 1000:>10.1f} {result['min_s'] * 1000:>10.1f} "
+            f"{result['peak_kib']:>10.1f} {result['requests']:>8}"
+        )
+        base = (baseline or {}).get(name)
+        if base:
+            change = (result['median_s'] / base['median_s'] - 1) * 100 if base['median_s'] else 0.0
+            line += f" {base['median_s'] * 1000:>10.1f} {change:>+7.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def run(
+    fixtures: Path,
+    scenarios: Sequence[str],
+    repeat: int,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    seed: Optional[int] = 0,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """Run the scenarios against `fixtures`; returns (results per scenario, run metadata)."""
+    manifest = load_manifest(fixtures)
+    leagues = {str(name): str(league_id) for name, league_id in manifest.get('leagues', {}).items()}
+    max_week = int(manifest.get('max_week') or config.MAX_SEASON_WEEKS)
+    # Measure the engine, not the client-side rate limit or the game-day live section
+    config.HTTP_RATE = 0
+    throttle.get_rate_limiter.cache_clear()
+    config.LIVE_MODE = "off"
+    os.environ['SL_LEAGUES'] = json.dumps(leagues)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with FixtureServer(fixtures, latency=latency, jitter=jitter, error_rate=error_rate, seed=seed) as server, \
+            tempfile.TemporaryDirectory(prefix="sl-bench-") as workdir:
+        config.SLEEPER_API_BASE = server.base_url
+        ctx = BenchContext(server, leagues, max_week, Path(workdir))
+        try:
+            for name in scenarios:
+                results[name] = measure(ctx, SCENARIO_FUNCTIONS[name], repeat)
+                print(f"{name}: {results[name]['median_s'] * 1000:.1f} ms", file=sys.stderr)
+        finally:
+            cache.close_db_connection()
+            cache.configure_cache_db_path(None)
+    meta = {
+        'commit': _git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'fixtures': str(fixtures),
+        'leagues': len(leagues),
+        'max_week': max_week,
+        'latency': latency,
+        'jitter': jitter,
+        'error_rate': error_rate,
+        'repeat': repeat,
+    }
+    return results, meta
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", help="fixture directory (see benchmarks.record)")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="scenario to run (repeatable; default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scenario (default 3)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the fixture server adds to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 503")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="a previous --json file to compare against")
+    args = parser.parse_args(argv)
+
+    results, meta = run(
+        Path(args.fixtures), args.scenario or SCENARIOS, max(args.repeat, 1), args.latency, args.jitter, args.error_rate
+    )
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            saved = json.load(fh)
+        baseline = saved.get('results')
+        print(f"Baseline: commit {saved.get('meta', {}).get('commit')}")
+    print(f"Commit {meta['commit']}: {meta['leagues']} leagues, {meta['max_week']} weeks, latency {meta['latency']}s")
+    print(format_results(results, baseline))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({'meta': meta, 'results': results}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""Synthetic multi-tier federations for load-testing the engine beyond the real leagues.
+
+Generates Sleeper-shaped league, users, rosters and matchups payloads (and an NFL state) for `leagues` tiers of
+12–14 teams over one or more seasons. Seasons are chained through `previous_league_id`, and between seasons the
+top and bottom `config.STANDINGS_ZONE_SIZE` teams of neighbouring tiers swap places, so owners move between tiers
+the way the real federation's do. The output is either a fixture directory for `benchmarks.fixture_server` /
+`benchmarks.run`, or rows loaded straight into a cache database::
+
+    python -m benchmarks.synthetic --leagues 50 --seasons 3 --out-dir /tmp/federation
+    python -m benchmarks.run /tmp/federation --scenario backfill --scenario warm_render
+    python -m benchmarks.synthetic --leagues 500 --db /tmp/federation.db
+
+The same seed always produces the same federation.
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from benchmarks.record import write_fixture, write_manifest
+from superleague import cache, config, sleeper
+
+# (endpoint, league_id, week, raw payload) as Sleeper would serve it
+Payload = Tuple[str, Optional[str], Optional[int], Any]
+
+_ADJECTIVES = (
+    "Mighty", "Flying", "Iron", "Golden", "Savage", "Silent", "Crimson", "Electric", "Frozen", "Rogue",
+    "Lucky", "Thunder", "Wild", "Midnight", "Atomic", "Royal", "Salty", "Blitzing", "Hungry", "Burning",
+)
+_NOUNS = (
+    "Gridironers", "Touchdowns", "Bulldogs", "Stallions", "Waiver Wires", "Sleepers", "Fumblers", "Blitzers",
+    "Hail Marys", "Punters", "Kickers", "Linemen", "Audibles", "Red Zoners", "Two-Pointers", "Shotguns",
+)
+_PLAYER_POOL = 2500
+_ROSTER_SIZE = 16
+_STARTERS = 9
+
+
+class FederationSpec(NamedTuple):
+    leagues: int = 20
+    min_teams: int = 12
+    max_teams: int = 14
+    weeks: int = config.MAX_SEASON_WEEKS
+    seasons: int = 1
+    season: int = 2025
+    # Weeks before this one are scored in the latest season; it is half played; later weeks score 0 (as on Sleeper)
+    current_week: int = 10
+    seed: int = 316
+
+
+DEFAULT_SPEC = FederationSpec()
+
+
+def league_id_for(spec: FederationSpec, season: int, tier: int) -> str:
+    return f"9{spec.seed % 1000:03d}{season:04d}{tier:05d}".ljust(18, "0")
+
+
+def user_id_for(spec: FederationSpec, owner: int) -> str:
+    return f"8{spec.seed % 1000:03d}{owner:08d}".ljust(18, "0")
+
+
+def tier_name(tier: int) -> str:
+    return f"Tier {tier + 1}"
+
+
+def league_map(spec: FederationSpec, season: int) -> Dict[str, str]:
+    """Tier name -> league id for one season, top tier first (the order `LEAGUES` expects)."""
+    return {tier_name(tier): league_id_for(spec, season, tier) for tier in range(spec.leagues)}
+
+
+def round_robin(team_count: int, weeks: int) -> List[List[Tuple[int, Optional[int]]]]:
+    """Per week, (roster_id, matchup_id) pairs from the circle method; with an odd count one roster sits out."""
+    slots = list(range(1, team_count + 1)) + ([None] if team_count % 2 else [])
+    schedule = []
+    for _ in range(weeks):
+        pairs = []
+        half = len(slots) // 2
+        matchup_id = 0
+        for first, second in zip(slots[:half], reversed(slots[half:])):
+            if first is None or second is None:
+                pairs.append((first or second, None))
+                continue
+            matchup_id += 1
+            pairs.extend([(first, matchup_id), (second, matchup_id)])
+        schedule.append(pairs)
+        slots = [slots[0], slots[-1]] + slots[1:-1]
+    return schedule
+
+
+def nfl_state(spec: FederationSpec) -> dict:
+    week = spec.current_week
+    return {
+        "week": week, "leg": week, "display_week": week, "season": str(spec.season), "league_season": str(spec.season),
+        "previous_season": str(spec.season - 1), "season_type": "regular", "season_start_date": f"{spec.season}-09-04",
+    }
+
+
+def _team_name(rng: random.Random) -> str:
+    return f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)}"
+
+
+def generate(spec: FederationSpec) -> Iterator[Payload]:
+    """Yield every payload of the federation, oldest season first (lazily, so 100x federations stay in memory bounds)."""
+    rng = random.Random(spec.seed)
+    sizes = [rng.randint(spec.min_teams, spec.max_teams) for _ in range(spec.leagues)]
+    owners_by_tier: List[List[int]] = []
+    next_owner = 0
+    for size in sizes:
+        owners_by_tier.append(list(range(next_owner, next_owner + size)))
+        next_owner += size
+    # Owner strength persists across seasons: mean and spread of their weekly score
+    strength = {owner: (rng.uniform(95, 130), rng.uniform(14, 24)) for owner in range(next_owner)}
+    team_names = {owner: _team_name(rng) for owner in range(next_owner)}
+
+    yield ('nfl_state', None, None, nfl_state(spec))
+    first_season = spec.season - spec.seasons + 1
+    for season in range(first_season, spec.season + 1):
+        latest = season == spec.season
+        final_rank: List[List[int]] = []
+        for tier, owners in enumerate(owners_by_tier):
+            league_id = league_id_for(spec, season, tier)
+            yield from _league_season(spec, rng, season, tier, league_id, owners, strength, team_names, latest, final_rank)
+        # Promotion and relegation between neighbouring tiers for the next season
+        zone = config.STANDINGS_ZONE_SIZE
+        moved = [list(ranked) for ranked in final_rank]
+        for tier in range(1, len(moved)):
+            up, down = final_rank[tier][:zone], final_rank[tier - 1][-zone:]
+            moved[tier - 1] = [owner for owner in moved[tier - 1] if owner not in down] + up
+            moved[tier] = down + [owner for owner in moved[tier] if owner not in up]
+        owners_by_tier = moved
+
+
+def _league_season(
+    spec: FederationSpec,
+    rng: random.Random,
+    season: int,
+    tier: int,
+    league_id: str,
+    owners: List[int],
+    strength: Dict[int, Tuple[float, float]],
+    team_names: Dict[int, str],
+    latest: bool,
+    final_rank: List[List[int]],
+) -> Iterator[Payload]:
+    team_count = len(owners)
+    roster_owner = {roster_id: owners[roster_id - 1] for roster_id in range(1, team_count + 1)}
+    players = {
+        roster_id: [str(p) for p in rng.sample(range(1, _PLAYER_POOL), _ROSTER_SIZE)] for roster_id in roster_owner
+    }
+    record = {roster_id: {'wins': 0, 'losses': 0, 'ties': 0, 'fpts': 0.0, 'fpts_against': 0.0} for roster_id in roster_owner}
+    previous = league_id_for(spec, season - 1, tier) if season > spec.season - spec.seasons + 1 else None
+
+    yield ('league', league_id, None, {
+        "league_id": league_id, "name": f"Super League {tier_name(tier)}", "season": str(season), "sport": "nfl",
+        "status": "in_season" if latest else "complete", "season_type": "regular", "total_rosters": team_count,
+        "previous_league_id": previous, "draft_id": league_id[:-1] + "1",
+        "settings": {"num_teams": team_count, "playoff_week_start": 15, "leg": spec.current_week if latest else spec.weeks},
+        "scoring_settings": {"rec": 1.0, "pass_td": 4.0}, "roster_positions": ["QB", "RB", "RB", "WR", "WR", "TE", "FLEX", "K", "DEF"],
+    })
+    yield ('users', league_id, None, [
+        {
+            "user_id": user_id_for(spec, owner), "display_name": f"owner{owner}", "username": f"owner{owner}",
+            "league_id": league_id, "is_owner": roster_id == 1, "avatar": None,
+            "metadata": {"team_name": team_names[owner]},
+        }
+        for roster_id, owner in roster_owner.items()
+    ])
+
+    for week, pairs in enumerate(round_robin(team_count, spec.weeks), start=1):
+        played = not latest or week < spec.current_week
+        entries = []
+        for index, (roster_id, matchup_id) in enumerate(pairs):
+            scored = played or (week == spec.current_week and index < len(pairs) // 2)
+            mean, spread = strength[roster_owner[roster_id]]
+            points = round(max(rng.gauss(mean, spread), 30.0), 2) if scored and matchup_id is not None else 0.0
+            starters = players[roster_id][:_STARTERS]
+            starter_points = _split(rng, points, len(starters))
+            entries.append({
+                "roster_id": roster_id, "matchup_id": matchup_id, "points": points, "custom_points": None,
+                "players": players[roster_id], "starters": starters, "starters_points": starter_points,
+                "players_points": dict(zip(starters, starter_points)),
+            })
+        if played:
+            _tally(record, entries)
+        yield ('matchups', league_id, week, entries)
+
+    yield ('rosters', league_id, None, [
+        {
+            "roster_id": roster_id, "owner_id": user_id_for(spec, owner), "league_id": league_id,
+            "players": players[roster_id], "starters": players[roster_id][:_STARTERS], "reserve": None,
+            "settings": {
+                "wins": record[roster_id]['wins'], "losses": record[roster_id]['losses'], "ties": record[roster_id]['ties'],
+                "fpts": int(record[roster_id]['fpts']), "fpts_decimal": int(round(record[roster_id]['fpts'] % 1 * 100)),
+                "fpts_against": int(record[roster_id]['fpts_against']),
+                "fpts_against_decimal": int(round(record[roster_id]['fpts_against'] % 1 * 100)),
+            },
+        }
+        for roster_id, owner in roster_owner.items()
+    ])
+    ranked = sorted(roster_owner, key=lambda r: (-record[r]['wins'], -record[r]['fpts']))
+    final_rank.append([roster_owner[roster_id] for roster_id in ranked])
+
+
+def _split(rng: random.Random, total: float, parts: int) -> List[float]:
+    weights = [rng.random() + 0.2 for _ in range(parts)]
+    scale = total / sum(weights)
+    return [round(weight * scale, 2) for weight in weights]
+
+
+def _tally(record: Dict[int, Dict[str, float]], entries: List[dict]) -> None:
+    by_matchup: Dict[int, List[dict]] = {}
+    for entry in entries:
+        if entry['matchup_id'] is not None:
+            by_matchup.setdefault(entry['matchup_id'], []).append(entry)
+    for first, second in (pair for pair in by_matchup.values() if len(pair) == 2):
+        for own, other in ((first, second), (second, first)):
+            totals = record[own['roster_id']]
+            totals['fpts'] += own['points']
+            totals['fpts_against'] += other['points']
+            if own['points'] > other['points']:
+                totals['wins'] += 1
+            elif own['points'] < other['points']:
+                totals['losses'] += 1
+            else:
+                totals['ties'] += 1
+
+
+def write_fixture_dir(spec: FederationSpec, out_dir: Path) -> int:
+    """Write the federation as a fixture directory; returns the number of payloads written."""
+    count = 0
+    for endpoint, league_id, week, data in generate(spec):
+        path = sleeper.ENDPOINTS[endpoint].path.format(league_id=league_id, week=week)
+        write_fixture(out_dir, path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        count += 1
+    seasons = {str(season): league_map(spec, season) for season in range(spec.season - spec.seasons + 1, spec.season + 1)}
+    write_manifest(
+        out_dir, league_map(spec, spec.season), source="synthetic", max_week=spec.weeks, seasons=seasons,
+        spec=spec._asdict(),
+    )
+    return count
+
+
+def load_database(spec: FederationSpec, db: cache.CacheDatabase, batch_leagues: int = 10) -> int:
+    """Load the federation straight into a cache database with `cache.bulk_store`; returns the payload count."""
+    count = 0
+    batch: List[Payload] = []
+    leagues_in_batch = set()
+
+    def _flush():
+        log_rows = [(endpoint, cache.normalize_key(league_id), cache.normalize_key(week), 200, None) for endpoint, league_id, week, _ in batch]
+        cache.bulk_store(db, batch, log_rows)
+        batch.clear()
+        leagues_in_batch.clear()
+
+    for endpoint, league_id, week, data in generate(spec):
+        count += 1
+        if endpoint == 'nfl_state':
+            cache.store_nfl_state(db, None, None, data)
+            cache.record_fetch_log(db, 'nfl_state', cache.normalize_key(None), cache.normalize_key(None), 200)
+            continue
+        prepare = sleeper.ENDPOINTS[endpoint].prepare
+        batch.append((endpoint, league_id, week, prepare(data, week) if prepare else data))
+        leagues_in_batch.add(league_id)
+        if len(leagues_in_batch) > batch_leagues:
+            _flush()
+    if batch:
+        _flush()
+    return count
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out-dir", help="write a fixture directory for benchmarks.fixture_server / benchmarks.run")
+    target.add_argument("--db", help="load straight into this cache database")
+    parser.add_argument("--leagues", type=int, default=DEFAULT_SPEC.leagues, help="tiers per season (default 20)")
+    parser.add_argument("--teams", default="12-14", help="teams per league, N or MIN-MAX (default 12-14)")
+    parser.add_argument("--weeks", type=int, default=DEFAULT_SPEC.weeks, help="matchup weeks per season (default 18)")
+    parser.add_argument("--seasons", type=int, default=1, help="seasons, chained by previous_league_id (default 1)")
+    parser.add_argument("--season", type=int, default=DEFAULT_SPEC.season, help="latest season (default 2025)")
+    parser.add_argument("--current-week", type=int, default=DEFAULT_SPEC.current_week, help="NFL week of the latest season (default 10)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SPEC.seed)
+    args = parser.parse_args(argv)
+
+    low, _, high = args.teams.partition("-")
+    spec = FederationSpec(
+        leagues=max(args.leagues, 1), min_teams=max(int(low), 2), max_teams=max(int(high or low), int(low), 2),
+        weeks=max(args.weeks, 1), seasons=max(args.seasons, 1), season=args.season,
+        current_week=max(args.current_week, 1), seed=args.seed,
+    )
+    if args.out_dir:
+        count = write_fixture_dir(spec, Path(args.out_dir))
+        print(f"Wrote {count} payloads for {spec.leagues} leagues x {spec.seasons} seasons to {args.out_dir}")
+    else:
+        cache.configure_cache_db_path(args.db)
+        try:
+            count = load_database(spec, cache.get_db_connection())
+        finally:
+            cache.close_db_connection()
+        print(f"Loaded {count} payloads for {spec.leagues} leagues x {spec.seasons} seasons into {args.db}")
+    print(f"SL_LEAGUES='{json.dumps(league_map(spec, spec.season))}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
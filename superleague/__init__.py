@@ -0,0 +1,5 @@
+"""Streamlit-free data layer for the 316 Super League dashboard.
+
+`app.py` renders the UI. Everything that talks to Sleeper or to the SQLite cache lives in this package so it can
+also run headless, e.g. `python -m superleague.ingest` from a scheduled job.
+"""
@@ -0,0 +1,179 @@
+"""Multi-season archive: follow every tier's `previous_league_id` chain and backfill past seasons into the cache.
+
+Sleeper creates a new league each season and links it to the last one through `previous_league_id`. The archive
+walks that chain for every configured league (tier 0 is the first, top league), records each (season, tier,
+league) in the `archive_league` table and bulk-loads the past seasons' leagues, rosters, users and matchups, so
+all-time records, tier movement and best weeks are answered from indexed SQL (`cache.load_all_time_records`,
+`load_tier_history`, `load_best_weeks`) instead of walking the API::
+
+    SL_CACHE_DB_PATH=data/sleeper_cache.db python -m superleague.archive
+    python -m superleague.archive --db data/sleeper_cache.db --report records
+
+Past seasons' matchup weeks are finalized (pinned) as they are stored, so a re-run only revalidates what is not
+final yet, and a season that just finished or a download that failed is picked up by the next run. The current
+season is recorded but left to the dashboard and ingest.
+"""
+
+import argparse
+import sys
+import time
+from functools import partial
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+from superleague import cache, config, ingest, metrics, sleeper
+
+# Finished seasons are finalized as if it were the offseason: every complete week is final
+ARCHIVED_STATE = {'season_type': 'off'}
+REPORTS = ('records', 'movement', 'best-weeks')
+
+
+class ArchivedLeague(NamedTuple):
+    season: int
+    tier: int
+    tier_name: str
+    league_id: str
+    previous_league_id: Optional[str]
+
+
+def previous_league_id(league: Any) -> Optional[str]:
+    """The league's `previous_league_id`, or None at the start of the chain (Sleeper sends null or "0")."""
+    value = league.get('previous_league_id') if isinstance(league, Mapping) else None
+    value = str(value).strip() if value is not None else ''
+    return value if value and value != '0' else None
+
+
+def walk_chain(
+    tier: int, tier_name: str, league_id: str, known: Mapping[str, Mapping[str, Any]], max_seasons: Optional[int] = None
+) -> List[ArchivedLeague]:
+    """One tier's leagues, newest season first.
+
+    Each step reads `/league/{id}` through the cache; past leagues already in `known` (the archive_league rows) are
+    not read again, since a finished season's link never changes.
+    """
+    chain: List[ArchivedLeague] = []
+    seen = set()
+    current: Optional[str] = league_id
+    while current and current not in seen and (max_seasons is None or len(chain) < max_seasons):
+        seen.add(current)
+        row = known.get(current)
+        if row is not None and chain:
+            season, previous = row['season'], row['previous_league_id']
+        else:
+            league = sleeper.fetch_resource('league', current).data
+            season = cache.to_int(league.get('season')) if isinstance(league, Mapping) else None
+            if season is None:
+                break
+            previous = previous_league_id(league)
+        chain.append(ArchivedLeague(season, tier, tier_name, current, previous))
+        current = previous
+    return chain
+
+
+def discover(leagues: Dict[str, str], max_seasons: Optional[int] = None) -> List[ArchivedLeague]:
+    """Walk every tier's chain concurrently and record the result in `archive_league`."""
+    db = cache.get_db_connection()
+    known = {row['league_id']: row for row in (cache.load_archive_leagues(db) or [])} if db else {}
+    tiers = [
+        (tier, name, league_id) for tier, (name, league_id) in enumerate(leagues.items())
+        if league_id and not str(league_id).startswith("YOUR_")
+    ]
+    chains = sleeper.run_parallel(partial(walk_chain, tier, name, league_id, known, max_seasons) for tier, name, league_id in tiers)
+    archived = [league for chain in chains for league in chain or []]
+    if db and archived:
+        cache.store_archive_leagues(db, [
+            (league.league_id, league.season, league.tier, league.tier_name, league.previous_league_id) for league in archived
+        ])
+    return archived
+
+
+def backfill(archived: Sequence[ArchivedLeague], force: bool = False, workers: Optional[int] = None) -> List[ingest.IngestOutcome]:
+    """Bulk-load every past season's league, rosters, users and matchup weeks 1..MAX_SEASON_WEEKS.
+
+    The newest season of each tier is skipped (it is still being played). Keys that are fresh or pinned in the cache
+    are skipped by `ingest.fetch_and_store` unless `force` is set.
+    """
+    newest = {}
+    for league in archived:
+        newest[league.tier] = max(newest.get(league.tier, league.season), league.season)
+    past = [
+        league.league_id for league in archived if league.season < newest[league.tier]
+    ]
+    requests = ingest.plan_requests(past, config.MAX_SEASON_WEEKS)
+    return ingest.fetch_and_store(requests, force=force, workers=workers, state=ARCHIVED_STATE)
+
+
+def run_archive(
+    leagues: Dict[str, str], max_seasons: Optional[int] = None, force: bool = False, workers: Optional[int] = None
+) -> List[ingest.IngestOutcome]:
+    """Discover every tier's seasons, then backfill the past ones."""
+    return backfill(discover(leagues, max_seasons), force=force, workers=workers)
+
+
+def _format_table(rows: Sequence[Mapping[str, Any]], columns: Sequence[str]) -> str:
+    widths = [max(len(column), *(len(str(row.get(column, ''))) for row in rows)) for column in columns]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(str(row.get(column, '')).ljust(width) for column, width in zip(columns, widths)) for row in rows)
+    return "\n".join(lines)
+
+
+def format_report(db: cache.CacheDatabase, report: str, owner_id: Optional[str] = None, limit: int = 10) -> str:
+    """Plain-text table for one of `REPORTS`."""
+    if report == 'records':
+        rows = cache.load_all_time_records(db) or []
+        columns = ('owner_name', 'seasons', 'wins', 'losses', 'ties', 'points_for', 'first_places', 'top_tier_seasons', 'promotions', 'relegations')
+    elif report == 'movement':
+        rows = cache.load_tier_history(db, owner_id) or []
+        columns = ('owner_name', 'season', 'tier_name', 'rank', 'wins', 'losses', 'points_for', 'movement')
+    else:
+        rows = cache.load_best_weeks(db, limit) or []
+        columns = ('season', 'tier_name', 'week', 'owner_name', 'team_name', 'points')
+    if not rows:
+        return "Nothing archived yet; run `python -m superleague.archive` first."
+    return _format_table(rows, columns)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m superleague.archive", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help=f"cache database path (default: ${config.CACHE_ENV_VAR})")
+    parser.add_argument("--max-seasons", type=int, help="seasons to follow back per tier, including the current one (default: all)")
+    parser.add_argument("--force", action="store_true", help="download past seasons again even if they are cached")
+    parser.add_argument("--workers", type=int, help=f"concurrent requests (default: ${config.FETCH_WORKERS_ENV_VAR} or {config.DEFAULT_FETCH_WORKERS})")
+    parser.add_argument("--report", choices=REPORTS, help="print a report from the archive instead of updating it")
+    parser.add_argument("--owner", help="with --report movement: only this owner's user_id")
+    parser.add_argument("--limit", type=int, default=10, help="with --report best-weeks: number of weeks (default 10)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        cache.configure_cache_db_path(args.db)
+    db = cache.get_db_connection()
+    if db is None:
+        print(f"No cache database configured; pass --db or set {config.CACHE_ENV_VAR}.", file=sys.stderr)
+        return 2
+    if args.report:
+        print(format_report(db, args.report, args.owner, args.limit))
+        return 0
+
+    leagues = config.load_leagues_headless()
+    if not leagues:
+        print("No leagues configured; see README for the supported sources.", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    try:
+        outcomes = run_archive(leagues, max_seasons=args.max_seasons, force=args.force, workers=args.workers)
+        seasons = sorted({row['season'] for row in cache.load_archive_leagues(db) or []})
+    finally:
+        try:
+            metrics.flush()
+        except Exception:
+            pass
+        cache.close_db_connection()
+    print(f"Archived {len(leagues)} tiers, seasons {', '.join(map(str, seasons)) or 'none'}, into {cache.get_cache_db_path()}")
+    if outcomes:
+        print(ingest.format_stats(outcomes, time.perf_counter() - started))
+    return 0 if all(outcome.ok for outcome in outcomes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
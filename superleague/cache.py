@@ -0,0 +1,1322 @@
+"""SQLite cache for Sleeper payloads: schema, connection, typed loaders and write-through storers.
+
+Nothing in here imports Streamlit, so the dashboard and headless jobs (see `superleague.ingest`) share it.
+"""
+
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from superleague import config
+
+NULL_SENTINEL = "__NULL__"
+_VALIDATOR_COLUMNS = ("etag", "last_modified", "payload_hash")
+
+
+class Validators(NamedTuple):
+    """What a conditional request needs to revalidate a cached key, as stored in fetch_log."""
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    payload_hash: Optional[str] = None
+
+_db_path_override: Optional[Path] = None
+
+
+class CacheDatabase:
+    """One cache database file: a single serialized writer connection plus a pool of reader connections.
+
+    Writes go through `write()`, which holds the writer lock for the whole transaction. In WAL mode reads go
+    through `read()` on a pooled connection of their own, so viewers keep reading the last committed rows while a
+    fetch is writing. Without WAL (or with `SL_SQLITE_READERS=0`) reads share the writer and its lock, as before.
+    """
+
+    def __init__(self, path: Path, profile: Dict[str, Any], max_readers: int):
+        self.path = path
+        self.profile = dict(profile)
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._writer = self._connect()
+        with self._writer:
+            self._writer.execute("PRAGMA foreign_keys = ON;")
+        initialize_database(self._writer)
+        self.journal_mode = self._apply_journal_mode()
+        self.max_readers = max(int(max_readers), 0) if self.journal_mode == 'wal' else 0
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.profile.get('busy_timeout', 5000) / 1000)
+        conn.row_factory = sqlite3.Row
+        for pragma in ('synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout'):
+            value = self.profile.get(pragma)
+            if value is not None:
+                conn.execute(f"PRAGMA {pragma} = {value};")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON;")
+        return conn
+
+    def _apply_journal_mode(self) -> str:
+        requested = self.profile.get('journal_mode')
+        if requested:
+            with self._write_lock:
+                row = self._writer.execute(f"PRAGMA journal_mode = {requested};").fetchone()
+        else:
+            row = self._writer.execute("PRAGMA journal_mode;").fetchone()
+        return str(row[0]).lower() if row else ''
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._reader_lock:
+            if self._reader_count < self.max_readers:
+                self._reader_count += 1
+                try:
+                    return self._connect(read_only=True)
+                except Exception:
+                    self._reader_count -= 1
+                    raise
+        return self._readers.get()
+
+    @contextmanager
+    def read(self):
+        # Inside a write transaction, or with no reader pool, read through the writer so uncommitted rows are visible.
+        if self.max_readers == 0 or getattr(self._local, 'write_depth', 0):
+            with self._write_lock:
+                yield self._writer
+            return
+        reader = self._acquire_reader()
+        try:
+            yield reader
+        finally:
+            self._readers.put(reader)
+
+    @contextmanager
+    def write(self):
+        with self._write_lock:
+            self._local.write_depth = getattr(self._local, 'write_depth', 0) + 1
+            try:
+                with self._writer:
+                    yield self._writer
+            finally:
+                self._local.write_depth -= 1
+
+    def close(self) -> None:
+        """Close every connection; in WAL mode the last close checkpoints and removes the -wal/-shm files."""
+        with self._reader_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._reader_count = 0
+        with self._write_lock:
+            self._writer.close()
+
+
+@lru_cache(maxsize=None)
+def _open_db(db_path: str) -> CacheDatabase:
+    path_obj = Path(db_path)
+    try:
+        path_obj.parent.mkdir(parents=True, exist_ok=True)
+    except Exception:
+        pass
+    return CacheDatabase(path_obj, config.SQLITE_PROFILE, config.SQLITE_READERS)
+
+
+def configure_cache_db_path(path: Optional[Any]) -> None:
+    """Point the cache at a different database file than `SL_CACHE_DB_PATH` (used by the ingest CLI)."""
+    global _db_path_override
+    _db_path_override = config.resolve_cache_db_path(str(path)) if path else None
+
+
+def get_cache_db_path() -> Optional[Path]:
+    return _db_path_override or config.CACHE_DB_PATH
+
+
+def get_db_connection() -> Optional[CacheDatabase]:
+    """Return the process-wide cache database, or None when no cache database is configured."""
+    db_path = get_cache_db_path()
+    if db_path is None:
+        return None
+    return _open_db(str(db_path))
+
+
+def close_db_connection() -> None:
+    """Close the open cache database (if any) so its WAL is checkpointed back into the main file."""
+    db_path = get_cache_db_path()
+    if db_path is None or _open_db.cache_info().currsize == 0:
+        return
+    try:
+        _open_db(str(db_path)).close()
+    finally:
+        _open_db.cache_clear()
+
+
+def initialize_database(conn: sqlite3.Connection) -> None:
+    schema = """
+    CREATE TABLE IF NOT EXISTS league (
+        league_id TEXT PRIMARY KEY,
+        name TEXT,
+        season INTEGER,
+        status TEXT,
+        raw_payload TEXT NOT NULL,
+        fetched_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS user (
+        user_id TEXT PRIMARY KEY,
+        display_name TEXT,
+        username TEXT,
+        team_name TEXT,
+        avatar TEXT,
+        raw_payload TEXT NOT NULL,
+        fetched_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS league_user (
+        league_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        role TEXT,
+        is_owner INTEGER DEFAULT 0,
+        fetched_at TEXT NOT NULL,
+        PRIMARY KEY (league_id, user_id),
+        FOREIGN KEY (league_id) REFERENCES league(league_id) ON DELETE CASCADE,
+        FOREIGN KEY (user_id) REFERENCES user(user_id) ON DELETE CASCADE
+    );
+    CREATE TABLE IF NOT EXISTS roster (
+        league_id TEXT NOT NULL,
+        roster_id INTEGER NOT NULL,
+        owner_id TEXT,
+        wins INTEGER,
+        losses INTEGER,
+        ties INTEGER,
+        points_for REAL,
+        points_against REAL,
+        settings_json TEXT,
+        metadata_json TEXT,
+        raw_payload TEXT NOT NULL,
+        row_hash TEXT,
+        fetched_at TEXT NOT NULL,
+        PRIMARY KEY (league_id, roster_id)
+    );
+    CREATE TABLE IF NOT EXISTS matchup (
+        league_id TEXT NOT NULL,
+        week INTEGER NOT NULL,
+        matchup_id INTEGER NOT NULL,
+        roster_id INTEGER NOT NULL,
+        points REAL,
+        projected_points REAL,
+        is_playoff INTEGER,
+        is_consolation INTEGER,
+        players_json TEXT,
+        raw_payload TEXT NOT NULL,
+        row_hash TEXT,
+        fetched_at TEXT NOT NULL,
+        PRIMARY KEY (league_id, week, matchup_id, roster_id)
+    );
+    CREATE TABLE IF NOT EXISTS fetch_log (
+        endpoint TEXT NOT NULL,
+        league_key TEXT NOT NULL,
+        week_key TEXT NOT NULL,
+        status_code INTEGER,
+        error TEXT,
+        fetched_at TEXT NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        payload_hash TEXT,
+        changed_at TEXT,
+        PRIMARY KEY (endpoint, league_key, week_key)
+    );
+    CREATE TABLE IF NOT EXISTS matchup_week (
+        league_id TEXT NOT NULL,
+        week INTEGER NOT NULL,
+        is_final INTEGER NOT NULL DEFAULT 0,
+        finalized_at TEXT,
+        PRIMARY KEY (league_id, week)
+    );
+    CREATE TABLE IF NOT EXISTS nfl_state (
+        state_key TEXT PRIMARY KEY,
+        payload TEXT NOT NULL,
+        fetched_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS standings (
+        league_id TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        roster_id INTEGER NOT NULL,
+        team_name TEXT NOT NULL,
+        wins INTEGER NOT NULL,
+        losses INTEGER NOT NULL,
+        ties INTEGER NOT NULL,
+        points_for REAL NOT NULL,
+        points_against REAL NOT NULL,
+        promotion_zone INTEGER NOT NULL DEFAULT 0,
+        relegation_zone INTEGER NOT NULL DEFAULT 0,
+        computed_at TEXT NOT NULL,
+        PRIMARY KEY (league_id, rank)
+    );
+    CREATE TABLE IF NOT EXISTS all_play (
+        league_id TEXT NOT NULL,
+        week INTEGER NOT NULL,
+        roster_id INTEGER NOT NULL,
+        points REAL NOT NULL,
+        wins INTEGER NOT NULL,
+        losses INTEGER NOT NULL,
+        ties INTEGER NOT NULL,
+        expected_wins REAL NOT NULL,
+        computed_at TEXT NOT NULL,
+        PRIMARY KEY (league_id, week, roster_id)
+    );
+    CREATE TABLE IF NOT EXISTS metrics (
+        name TEXT NOT NULL,
+        labels TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        sample TEXT NOT NULL,
+        value REAL NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (name, labels, sample)
+    );
+    CREATE TABLE IF NOT EXISTS archive_league (
+        league_id TEXT PRIMARY KEY,
+        season INTEGER NOT NULL,
+        tier INTEGER NOT NULL,
+        tier_name TEXT NOT NULL,
+        previous_league_id TEXT,
+        archived_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_matchup_league_week ON matchup(league_id, week);
+    CREATE INDEX IF NOT EXISTS idx_matchup_points ON matchup(points);
+    CREATE INDEX IF NOT EXISTS idx_roster_league_owner ON roster(league_id, owner_id);
+    CREATE INDEX IF NOT EXISTS idx_roster_owner ON roster(owner_id);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_archive_season_tier ON archive_league(season, tier);
+    -- One row per team and archived season: its tier, final regular-season standing and owner
+    CREATE VIEW IF NOT EXISTS archive_team AS
+    SELECT a.season, a.tier, a.tier_name, a.league_id, s.rank, s.roster_id, r.owner_id, s.team_name,
+           s.wins, s.losses, s.ties, s.points_for, s.points_against
+    FROM archive_league a
+    JOIN standings s ON s.league_id = a.league_id
+    JOIN roster r ON r.league_id = s.league_id AND r.roster_id = s.roster_id;
+    """
+    with conn:
+        conn.executescript(schema)
+        # Tables created by older versions lack the validator and change-tracking columns
+        _add_missing_columns(conn, 'fetch_log', _VALIDATOR_COLUMNS + ('changed_at',))
+        _add_missing_columns(conn, 'roster', ('row_hash',))
+        _add_missing_columns(conn, 'matchup', ('row_hash',))
+        # Databases written before the standings table existed get it filled from their cached rosters
+        missing = [row[0] for row in conn.execute(
+            "SELECT DISTINCT league_id FROM roster WHERE league_id NOT IN (SELECT league_id FROM standings)"
+        )]
+        if missing:
+            _refresh_standings(conn, missing, now_iso())
+        # ...and the all-play rows of weeks finalized before that table existed
+        final_weeks = conn.execute(
+            "SELECT league_id, week FROM matchup_week mw WHERE is_final = 1 "
+            "AND NOT EXISTS (SELECT 1 FROM all_play ap WHERE ap.league_id = mw.league_id AND ap.week = mw.week)"
+        ).fetchall()
+        if final_weeks:
+            _refresh_all_play(conn, [(row[0], row[1]) for row in final_weeks], now_iso())
+
+
+def _add_missing_columns(conn: sqlite3.Connection, table: str, columns: Iterable[str]) -> None:
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for column in columns:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def parse_iso(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        return datetime.fromisoformat(value)
+    except Exception:
+        return None
+
+
+def is_fresh(fetched_at: Optional[str], ttl_seconds: int) -> bool:
+    stamp = parse_iso(fetched_at)
+    if stamp is None:
+        return False
+    return datetime.now(timezone.utc) - stamp <= timedelta(seconds=ttl_seconds)
+
+
+def normalize_key(value: Optional[Any]) -> str:
+    if value is None:
+        return NULL_SENTINEL
+    return str(value)
+
+
+# Fetches run on worker threads: every read and write transaction goes through these,
+# which hand out a pooled reader or the serialized writer connection.
+@contextmanager
+def db_read(db: CacheDatabase):
+    with db.read() as conn:
+        yield conn
+
+
+@contextmanager
+def db_write(db: CacheDatabase):
+    with db.write() as conn:
+        yield conn
+
+
+def get_cached_timestamp(db: CacheDatabase, endpoint: str, league_key: str, week_key: str) -> Optional[str]:
+    with db_read(db) as conn:
+        if endpoint == 'nfl_state':
+            cur = conn.execute("SELECT fetched_at FROM nfl_state WHERE state_key = ?", ('nfl',))
+        else:
+            cur = conn.execute(
+                "SELECT fetched_at FROM fetch_log WHERE endpoint = ? AND league_key = ? AND week_key = ?",
+                (endpoint, league_key, week_key),
+            )
+        row = cur.fetchone()
+    return row['fetched_at'] if row else None
+
+
+def get_validators(db: CacheDatabase, endpoint: str, league_key: str, week_key: str) -> Optional[Validators]:
+    """The validators of the last good response for a key, or None when there are none to send."""
+    with db_read(db) as conn:
+        row = conn.execute(
+            "SELECT etag, last_modified, payload_hash FROM fetch_log WHERE endpoint = ? AND league_key = ? AND week_key = ?",
+            (endpoint, league_key, week_key),
+        ).fetchone()
+    if not row or not any(row[column] for column in _VALIDATOR_COLUMNS):
+        return None
+    return Validators(row['etag'], row['last_modified'], row['payload_hash'])
+
+
+def payload_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+# Rows without a payload hash (failed fetches) keep the validators of the last good response.
+_FETCH_LOG_UPSERT_SQL = (
+    "INSERT INTO fetch_log (endpoint, league_key, week_key, status_code, error, etag, last_modified, payload_hash, fetched_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(endpoint, league_key, week_key) DO UPDATE SET status_code = excluded.status_code, error = excluded.error, "
+    "fetched_at = excluded.fetched_at, "
+    "etag = CASE WHEN excluded.payload_hash IS NULL THEN fetch_log.etag ELSE excluded.etag END, "
+    "last_modified = CASE WHEN excluded.payload_hash IS NULL THEN fetch_log.last_modified ELSE excluded.last_modified END, "
+    "payload_hash = COALESCE(excluded.payload_hash, fetch_log.payload_hash)"
+)
+
+
+def _write_fetch_log(conn: sqlite3.Connection, rows: Iterable[tuple], fetched_at: str) -> None:
+    """Rows are `(endpoint, league_key, week_key, status_code, error)`, optionally followed by the three validators."""
+    conn.executemany(
+        _FETCH_LOG_UPSERT_SQL,
+        [tuple(row) + (None,) * (8 - len(row)) + (fetched_at,) for row in rows],
+    )
+
+
+def record_fetch_log(
+    db: CacheDatabase,
+    endpoint: str,
+    league_key: str,
+    week_key: str,
+    status_code: Optional[int],
+    error: Optional[str] = None,
+    validators: Optional[Validators] = None,
+) -> None:
+    with db_write(db) as conn:
+        _write_fetch_log(conn, [(endpoint, league_key, week_key, status_code, error) + tuple(validators or Validators())], now_iso())
+
+
+def add_metric_samples(db: CacheDatabase, rows: Iterable[tuple]) -> None:
+    """Add `(name, labels_json, kind, sample, value)` deltas to the running totals in the metrics table."""
+    updated_at = now_iso()
+    with db_write(db) as conn:
+        conn.executemany(
+            "INSERT INTO metrics (name, labels, kind, sample, value, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name, labels, sample) DO UPDATE SET value = metrics.value + excluded.value, "
+            "kind = excluded.kind, updated_at = excluded.updated_at",
+            [tuple(row) + (updated_at,) for row in rows],
+        )
+
+
+def load_metric_samples(db: CacheDatabase) -> List[tuple]:
+    with db_read(db) as conn:
+        return [tuple(row) for row in conn.execute("SELECT name, labels, kind, sample, value FROM metrics")]
+
+
+def get_changed_at(db: CacheDatabase, endpoint: str, league_key: str, week_key: str) -> Optional[str]:
+    """When a key's cached rows last actually changed, or None for keys (and endpoints) without change tracking."""
+    with db_read(db) as conn:
+        row = conn.execute(
+            "SELECT changed_at FROM fetch_log WHERE endpoint = ? AND league_key = ? AND week_key = ?",
+            (endpoint, league_key, week_key),
+        ).fetchone()
+    return row['changed_at'] if row else None
+
+
+def _mark_changed(conn: sqlite3.Connection, endpoint: str, keys: Iterable[Tuple[Any, Any]], changed_at: str) -> None:
+    """Record that the rows behind `(league_id, week)` keys were rewritten (see `get_changed_at`)."""
+    conn.executemany(
+        "INSERT INTO fetch_log (endpoint, league_key, week_key, fetched_at, changed_at) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(endpoint, league_key, week_key) DO UPDATE SET changed_at = excluded.changed_at",
+        [(endpoint, normalize_key(league_id), normalize_key(week), changed_at, changed_at) for league_id, week in keys],
+    )
+
+
+def row_hash(raw_payload: str) -> str:
+    return hashlib.sha1(raw_payload.encode("utf-8")).hexdigest()
+
+
+def json_dumps(payload: Any) -> str:
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def _load_cached_json(db: CacheDatabase, query: str, params: Iterable[Any]) -> Optional[Any]:
+    try:
+        with db_read(db) as conn:
+            cur = conn.execute(query, tuple(params))
+            row = cur.fetchone()
+    except Exception:
+        return None
+    if not row:
+        return None
+    try:
+        payload = row["raw_payload"]
+    except Exception:
+        try:
+            payload = row[0]
+        except Exception:
+            return None
+    try:
+        return json.loads(payload)
+    except Exception:
+        return None
+
+
+def _load_cached_json_list(db: CacheDatabase, query: str, params: Iterable[Any]) -> Optional[list]:
+    try:
+        with db_read(db) as conn:
+            cur = conn.execute(query, tuple(params))
+            rows = cur.fetchall()
+    except Exception:
+        return None
+    if not rows:
+        return None
+    payloads = []
+    for row in rows:
+        try:
+            payloads.append(json.loads(row['raw_payload']))
+        except Exception:
+            continue
+    return payloads or None
+
+
+def to_int(value: Any) -> Optional[int]:
+    try:
+        if value is None:
+            return None
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_float(value: Any) -> Optional[float]:
+    try:
+        if value is None:
+            return None
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_bool(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in {"true", "1", "yes", "y", "t"}:
+            return True
+        if lowered in {"false", "0", "no", "n", "f"}:
+            return False
+    return None
+
+
+def load_cached_league(db: CacheDatabase, league_id: Optional[str], week: Optional[int] = None) -> Optional[Any]:
+    return _load_cached_json(
+        db,
+        "SELECT raw_payload FROM league WHERE league_id = ?",
+        (str(league_id),),
+    )
+
+
+def load_cached_rosters(db: CacheDatabase, league_id: Optional[str], week: Optional[int] = None) -> Optional[list]:
+    return _load_cached_json_list(
+        db,
+        "SELECT raw_payload FROM roster WHERE league_id = ? ORDER BY roster_id",
+        (str(league_id),),
+    )
+
+
+def load_cached_users(db: CacheDatabase, league_id: Optional[str], week: Optional[int] = None) -> Optional[list]:
+    return _load_cached_json_list(
+        db,
+        "SELECT u.raw_payload FROM league_user lu JOIN user u ON u.user_id = lu.user_id WHERE lu.league_id = ?",
+        (str(league_id),),
+    )
+
+
+def load_cached_matchups(db: CacheDatabase, league_id: str, week: int) -> Optional[list]:
+    return _load_cached_json_list(
+        db,
+        "SELECT raw_payload FROM matchup WHERE league_id = ? AND week = ? ORDER BY matchup_id, roster_id",
+        (str(league_id), int(week)),
+    )
+
+
+def _query_rows(db: CacheDatabase, query: str, params: Iterable[Any]) -> Optional[list]:
+    try:
+        with db_read(db) as conn:
+            rows = conn.execute(query, tuple(params)).fetchall()
+    except Exception:
+        return None
+    return rows or None
+
+
+def _as_number(value: Any) -> Any:
+    # REAL columns hand back whole numbers as floats; Sleeper sends fpts as integers, so keep them integral.
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _present(**fields: Any) -> dict:
+    # NULL columns are left out so callers' `.get(key, default)` fallbacks behave as they do on raw payloads.
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+# Summary loaders answer from the typed columns alone and return dicts shaped like the Sleeper payloads, limited to
+# the fields the dashboard reads, so the raw_payload JSON is only decoded by callers that need the full object.
+def load_roster_summaries(db: CacheDatabase, league_id: Optional[str], week: Optional[int] = None) -> Optional[list]:
+    rows = _query_rows(
+        db,
+        "SELECT roster_id, owner_id, wins, losses, ties, points_for, points_against FROM roster WHERE league_id = ? ORDER BY roster_id",
+        (str(league_id),),
+    )
+    if rows is None:
+        return None
+    return [
+        {
+            'roster_id': row['roster_id'],
+            'owner_id': row['owner_id'],
+            'settings': _present(
+                wins=row['wins'],
+                losses=row['losses'],
+                ties=row['ties'],
+                fpts=_as_number(row['points_for']),
+                fpts_against=_as_number(row['points_against']),
+            ),
+        }
+        for row in rows
+    ]
+
+
+def load_user_summaries(db: CacheDatabase, league_id: Optional[str], week: Optional[int] = None) -> Optional[list]:
+    rows = _query_rows(
+        db,
+        "SELECT u.user_id, u.display_name, u.username, u.team_name FROM league_user lu JOIN user u ON u.user_id = lu.user_id WHERE lu.league_id = ?",
+        (str(league_id),),
+    )
+    if rows is None:
+        return None
+    return [
+        dict(
+            _present(user_id=row['user_id'], display_name=row['display_name'], username=row['username']),
+            metadata=_present(team_name=row['team_name']),
+        )
+        for row in rows
+    ]
+
+
+def load_matchup_summaries(db: CacheDatabase, league_id: str, week: int) -> Optional[list]:
+    rows = _query_rows(
+        db,
+        "SELECT week, matchup_id, roster_id, points FROM matchup WHERE league_id = ? AND week = ? ORDER BY matchup_id, roster_id",
+        (str(league_id), int(week)),
+    )
+    if rows is None:
+        return None
+    return [
+        {'week': row['week'], 'matchup_id': row['matchup_id'], 'roster_id': row['roster_id'], 'points': row['points']}
+        for row in rows
+    ]
+
+
+def load_cached_nfl_state(db: CacheDatabase, league_id: Optional[str] = None, week: Optional[int] = None) -> Optional[Any]:
+    try:
+        with db_read(db) as conn:
+            cur = conn.execute("SELECT payload FROM nfl_state WHERE state_key = ?", ('nfl',))
+            row = cur.fetchone()
+    except Exception:
+        return None
+    if not row:
+        return None
+    try:
+        return json.loads(row['payload'])
+    except Exception:
+        return None
+
+
+# Upserts keep the existing row instead of deleting and re-inserting it: `INSERT OR REPLACE` on league or user
+# would cascade-delete the league_user rows that reference it.
+_LEAGUE_STUB_SQL = "INSERT OR IGNORE INTO league (league_id, name, season, status, raw_payload, fetched_at) VALUES (?, NULL, NULL, NULL, '{}', ?)"
+_LEAGUE_UPSERT_SQL = (
+    "INSERT INTO league (league_id, name, season, status, raw_payload, fetched_at) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(league_id) DO UPDATE SET name = excluded.name, season = excluded.season, status = excluded.status, "
+    "raw_payload = excluded.raw_payload, fetched_at = excluded.fetched_at"
+)
+_ROSTER_INSERT_SQL = "INSERT OR REPLACE INTO roster (league_id, roster_id, owner_id, wins, losses, ties, points_for, points_against, settings_json, metadata_json, raw_payload, row_hash, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+_USER_UPSERT_SQL = (
+    "INSERT INTO user (user_id, display_name, username, team_name, avatar, raw_payload, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET display_name = excluded.display_name, username = excluded.username, "
+    "team_name = excluded.team_name, avatar = excluded.avatar, raw_payload = excluded.raw_payload, fetched_at = excluded.fetched_at"
+)
+_LEAGUE_USER_INSERT_SQL = "INSERT OR REPLACE INTO league_user (league_id, user_id, role, is_owner, fetched_at) VALUES (?, ?, ?, ?, ?)"
+_MATCHUP_INSERT_SQL = "INSERT OR REPLACE INTO matchup (league_id, week, matchup_id, roster_id, points, projected_points, is_playoff, is_consolation, players_json, raw_payload, row_hash, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+_MATCHUP_WEEK_FINAL_SQL = "INSERT OR REPLACE INTO matchup_week (league_id, week, is_final, finalized_at) VALUES (?, ?, 1, ?)"
+
+
+def league_row(league_id: str, data: Any, fetched_at: str) -> tuple:
+    return (str(league_id), data.get('name'), data.get('season'), data.get('status'), json_dumps(data), fetched_at)
+
+
+def roster_rows(league_id: str, data: Iterable[Any], fetched_at: str) -> list:
+    rows = []
+    for roster in data:
+        if not isinstance(roster, dict):
+            continue
+        roster_id = to_int(roster.get('roster_id'))
+        if roster_id is None:
+            continue
+        settings = roster.get('settings') or {}
+        metadata = roster.get('metadata') or {}
+        raw_payload = json_dumps(roster)
+        rows.append((
+            str(league_id),
+            roster_id,
+            roster.get('owner_id'),
+            to_int(settings.get('wins')),
+            to_int(settings.get('losses')),
+            to_int(settings.get('ties')),
+            to_float(settings.get('fpts')),
+            to_float(settings.get('fpts_against')),
+            json_dumps(settings),
+            json_dumps(metadata),
+            raw_payload,
+            row_hash(raw_payload),
+            fetched_at,
+        ))
+    return rows
+
+
+def user_rows(league_id: str, data: Iterable[Any], fetched_at: str) -> Tuple[list, list]:
+    """Return `(user rows, league_user rows)` for one league's users payload, built in a single pass."""
+    users, memberships = [], []
+    for user in data:
+        if not isinstance(user, dict):
+            continue
+        user_id = user.get('user_id')
+        if not user_id:
+            continue
+        metadata = user.get('metadata') or {}
+        users.append((
+            str(user_id),
+            user.get('display_name'),
+            user.get('username'),
+            metadata.get('team_name'),
+            user.get('avatar'),
+            json_dumps(user),
+            fetched_at,
+        ))
+        is_owner = to_bool(metadata.get('is_owner'))
+        if is_owner is None:
+            is_owner = to_bool(user.get('is_owner'))
+        memberships.append((str(league_id), str(user_id), metadata.get('role'), 1 if is_owner else 0, fetched_at))
+    return users, memberships
+
+
+def matchup_rows(league_id: str, week: int, items: Iterable[Any], fetched_at: str) -> Tuple[list, list]:
+    """Return `(normalized entries, matchup rows)` for one league-week; entries without ids are dropped."""
+    normalized_items, rows = [], []
+    for entry in items:
+        if entry is None:
+            continue
+        normalized = dict(entry)
+        if normalized.get('week') is None:
+            normalized['week'] = int(week)
+        roster_id = to_int(normalized.get('roster_id'))
+        matchup_id = to_int(normalized.get('matchup_id'))
+        if roster_id is None or matchup_id is None:
+            continue
+        normalized_items.append(normalized)
+        players = normalized.get('players')
+        raw_payload = json_dumps(normalized)
+        rows.append((
+            str(league_id),
+            int(week),
+            matchup_id,
+            roster_id,
+            to_float(normalized.get('points')),
+            to_float(normalized.get('projected_points')),
+            1 if to_bool(normalized.get('is_playoff')) else 0,
+            1 if to_bool(normalized.get('is_consolation')) else 0,
+            json_dumps(players) if players is not None else None,
+            raw_payload,
+            row_hash(raw_payload),
+            fetched_at,
+        ))
+    return normalized_items, rows
+
+
+def _write_league_stubs(conn: sqlite3.Connection, league_ids: Iterable[str], fetched_at: str) -> None:
+    conn.executemany(_LEAGUE_STUB_SQL, [(str(league_id), fetched_at) for league_id in dict.fromkeys(league_ids)])
+
+
+def _diff_rows(existing: Dict[tuple, Optional[str]], rows: Iterable[tuple], key: Callable[[tuple], tuple]) -> list:
+    """Rows whose content hash (second to last column) differs from `existing`; the keys left in `existing` are gone."""
+    changed = []
+    for row in rows:
+        if existing.pop(key(row), None) != row[-2]:
+            changed.append(row)
+    return changed
+
+
+def _write_rosters(conn: sqlite3.Connection, payloads: Sequence[Tuple[str, Any]], fetched_at: str) -> List[str]:
+    """Write only the roster rows whose content changed; returns the leagues that had any change."""
+    rows, removed, changed_leagues = [], [], []
+    for league_id, data in payloads:
+        existing = {
+            (row['roster_id'],): row['row_hash']
+            for row in conn.execute("SELECT roster_id, row_hash FROM roster WHERE league_id = ?", (str(league_id),))
+        }
+        league_rows = _diff_rows(existing, roster_rows(league_id, data, fetched_at), lambda row: (row[1],))
+        if league_rows or existing:
+            changed_leagues.append(str(league_id))
+        rows.extend(league_rows)
+        removed.extend((str(league_id), roster_id) for (roster_id,) in existing)
+    _write_league_stubs(conn, (league_id for league_id, _ in payloads), fetched_at)
+    conn.executemany("DELETE FROM roster WHERE league_id = ? AND roster_id = ?", removed)
+    conn.executemany(_ROSTER_INSERT_SQL, rows)
+    _mark_changed(conn, 'rosters', [(league_id, None) for league_id in changed_leagues], fetched_at)
+    _refresh_standings(conn, changed_leagues, fetched_at)
+    return changed_leagues
+
+
+def _write_users(conn: sqlite3.Connection, payloads: Sequence[Tuple[str, Any]], fetched_at: str) -> List[str]:
+    """Write the users of leagues whose membership or user payloads changed; returns the leagues affected.
+
+    Users are shared between leagues, so a changed user also counts as a change for every other league it is in.
+    """
+    users, memberships, changed_leagues, changed_users = [], [], [], []
+    for league_id, data in payloads:
+        league_users, league_memberships = user_rows(league_id, data, fetched_at)
+        existing = {
+            row['user_id']: (row['raw_payload'], row['role'], row['is_owner'])
+            for row in conn.execute(
+                "SELECT lu.user_id, lu.role, lu.is_owner, u.raw_payload FROM league_user lu "
+                "JOIN user u ON u.user_id = lu.user_id WHERE lu.league_id = ?",
+                (str(league_id),),
+            )
+        }
+        incoming = {user[0]: (user[5], membership[2], membership[3]) for user, membership in zip(league_users, league_memberships)}
+        if incoming == existing:
+            continue
+        changed_leagues.append(str(league_id))
+        changed_users.extend(user_id for user_id, row in incoming.items() if existing.get(user_id, (None,))[0] != row[0])
+        users.extend(league_users)
+        memberships.extend(league_memberships)
+    if not changed_leagues:
+        return []
+    _write_league_stubs(conn, changed_leagues, fetched_at)
+    conn.executemany(_USER_UPSERT_SQL, users)
+    conn.executemany("DELETE FROM league_user WHERE league_id = ?", [(league_id,) for league_id in changed_leagues])
+    conn.executemany(_LEAGUE_USER_INSERT_SQL, memberships)
+    affected = dict.fromkeys(changed_leagues)
+    for user_id in dict.fromkeys(changed_users):
+        for row in conn.execute("SELECT league_id FROM league_user WHERE user_id = ?", (user_id,)):
+            affected.setdefault(row['league_id'])
+    # Team names in the standings come from the users
+    _mark_changed(conn, 'users', [(league_id, None) for league_id in affected], fetched_at)
+    _refresh_standings(conn, list(affected), fetched_at)
+    return list(affected)
+
+
+# Rank by wins, then points for (as displayed, to one decimal), then roster_id. Team names follow
+# `teams.team_name`: metadata team_name, display_name, username, then 'Team {roster_id}'.
+_STANDINGS_REFRESH_SQL = """
+INSERT INTO standings (league_id, rank, roster_id, team_name, wins, losses, ties, points_for, points_against, promotion_zone, relegation_zone, computed_at)
+SELECT league_id, rank, roster_id, team_name, wins, losses, ties, points_for, points_against,
+       rank <= :zone, rank > team_count - :zone, :computed_at
+FROM (
+    SELECT r.league_id,
+           r.roster_id,
+           COALESCE(NULLIF(u.team_name, ''), NULLIF(u.display_name, ''), u.username, 'Team ' || r.roster_id) AS team_name,
+           COALESCE(r.wins, 0) AS wins,
+           COALESCE(r.losses, 0) AS losses,
+           COALESCE(r.ties, 0) AS ties,
+           ROUND(COALESCE(r.points_for, 0), 1) AS points_for,
+           ROUND(COALESCE(r.points_against, 0), 1) AS points_against,
+           ROW_NUMBER() OVER (
+               PARTITION BY r.league_id
+               ORDER BY COALESCE(r.wins, 0) DESC, ROUND(COALESCE(r.points_for, 0), 1) DESC, r.roster_id
+           ) AS rank,
+           COUNT(*) OVER (PARTITION BY r.league_id) AS team_count
+    FROM roster r
+    LEFT JOIN league_user lu ON lu.league_id = r.league_id AND lu.user_id = r.owner_id
+    LEFT JOIN user u ON u.user_id = lu.user_id
+    WHERE r.league_id = :league_id
+)
+"""
+
+
+def _refresh_standings(conn: sqlite3.Connection, league_ids: Iterable[str], computed_at: str) -> None:
+    """Recompute the materialized standings of the given leagues from their roster and user rows."""
+    params = [
+        {'league_id': str(league_id), 'zone': config.STANDINGS_ZONE_SIZE, 'computed_at': computed_at}
+        for league_id in dict.fromkeys(league_ids)
+    ]
+    conn.executemany("DELETE FROM standings WHERE league_id = :league_id", [{'league_id': p['league_id']} for p in params])
+    conn.executemany(_STANDINGS_REFRESH_SQL, params)
+
+
+def load_standings(db: CacheDatabase, league_id: str) -> Optional[list]:
+    """Return a league's materialized standings rows in rank order, or None when none have been computed."""
+    rows = _query_rows(
+        db,
+        "SELECT rank, roster_id, team_name, wins, losses, ties, points_for, points_against, promotion_zone, relegation_zone "
+        "FROM standings WHERE league_id = ? ORDER BY rank",
+        (str(league_id),),
+    )
+    if rows is None:
+        return None
+    return [
+        dict(
+            row,
+            points_for=_as_number(row['points_for']),
+            points_against=_as_number(row['points_against']),
+            promotion_zone=bool(row['promotion_zone']),
+            relegation_zone=bool(row['relegation_zone']),
+        )
+        for row in rows
+    ]
+
+
+# All-play record of one league-week: every entry against every other scored entry. Wins count the teams scored
+# under (RANK ascending - 1), losses the teams scored over (RANK descending - 1); the rest are ties. Expected wins
+# are the share of the league beaten, ties counting half.
+_ALL_PLAY_REFRESH_SQL = """
+INSERT INTO all_play (league_id, week, roster_id, points, wins, losses, ties, expected_wins, computed_at)
+SELECT league_id, week, roster_id, points, wins, losses, team_count - 1 - wins - losses,
+       CASE WHEN team_count > 1 THEN (wins + 0.5 * (team_count - 1 - wins - losses)) / (team_count - 1) ELSE 0 END,
+       :computed_at
+FROM (
+    SELECT league_id, week, roster_id, points,
+           RANK() OVER (ORDER BY points) - 1 AS wins,
+           RANK() OVER (ORDER BY points DESC) - 1 AS losses,
+           COUNT(*) OVER () AS team_count
+    FROM matchup
+    WHERE league_id = :league_id AND week = :week AND points IS NOT NULL
+)
+"""
+
+
+def _refresh_all_play(conn: sqlite3.Connection, keys: Iterable[Tuple[str, int]], computed_at: str) -> None:
+    """Recompute the materialized all-play rows of the given (league, week) keys from their matchup rows."""
+    params = [
+        {'league_id': str(league_id), 'week': int(week), 'computed_at': computed_at}
+        for league_id, week in dict.fromkeys((str(league_id), int(week)) for league_id, week in keys)
+    ]
+    conn.executemany(
+        "DELETE FROM all_play WHERE league_id = :league_id AND week = :week",
+        [{'league_id': p['league_id'], 'week': p['week']} for p in params],
+    )
+    conn.executemany(_ALL_PLAY_REFRESH_SQL, params)
+
+
+def load_all_play(db: CacheDatabase, league_id: str, max_week: int) -> Optional[Tuple[List[dict], List[int]]]:
+    """Season all-play totals per roster over a league's finalized weeks up to `max_week`, and those weeks.
+
+    Rows are `{'roster_id', 'wins', 'losses', 'ties', 'expected_wins'}`. Returns None when no finalized week has
+    all-play rows yet.
+    """
+    params = (str(league_id), int(max_week))
+    try:
+        with db_read(db) as conn:
+            weeks = [row[0] for row in conn.execute(
+                "SELECT DISTINCT week FROM all_play WHERE league_id = ? AND week <= ? ORDER BY week", params
+            )]
+            rows = conn.execute(
+                "SELECT roster_id, SUM(wins) AS wins, SUM(losses) AS losses, SUM(ties) AS ties, "
+                "SUM(expected_wins) AS expected_wins FROM all_play WHERE league_id = ? AND week <= ? GROUP BY roster_id",
+                params,
+            ).fetchall()
+    except Exception:
+        return None
+    if not weeks:
+        return None
+    return [dict(row) for row in rows], weeks
+
+
+_ARCHIVE_LEAGUE_UPSERT_SQL = (
+    "INSERT INTO archive_league (league_id, season, tier, tier_name, previous_league_id, archived_at) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(league_id) DO UPDATE SET season = excluded.season, tier = excluded.tier, tier_name = excluded.tier_name, "
+    "previous_league_id = excluded.previous_league_id, archived_at = excluded.archived_at"
+)
+
+# Each owner's archived seasons in order, with the tier they played the season before (NULL in their first one)
+_OWNER_HISTORY_SQL = """
+WITH history AS (
+    SELECT t.*, LAG(t.tier) OVER (PARTITION BY t.owner_id ORDER BY t.season) AS previous_tier
+    FROM archive_team t
+    WHERE t.owner_id IS NOT NULL
+)
+"""
+_OWNER_NAME_SQL = "COALESCE(NULLIF(u.display_name, ''), u.username, h.owner_id)"
+
+
+def store_archive_leagues(db: CacheDatabase, rows: Iterable[Tuple[str, int, int, str, Optional[str]]]) -> None:
+    """Record `(league_id, season, tier, tier_name, previous_league_id)` rows; tier 0 is the top league."""
+    rows = list(rows)
+    archived_at = now_iso()
+    with db_write(db) as conn:
+        # A tier's league for a season can be re-resolved (e.g. after a league was recreated)
+        conn.executemany(
+            "DELETE FROM archive_league WHERE season = ? AND tier = ? AND league_id != ?",
+            [(season, tier, str(league_id)) for league_id, season, tier, _, _ in rows],
+        )
+        conn.executemany(_ARCHIVE_LEAGUE_UPSERT_SQL, [
+            (str(league_id), int(season), int(tier), tier_name, previous, archived_at)
+            for league_id, season, tier, tier_name, previous in rows
+        ])
+
+
+def load_archive_leagues(db: CacheDatabase) -> Optional[list]:
+    """Every archived league, newest season first, top tier first."""
+    rows = _query_rows(
+        db,
+        "SELECT league_id, season, tier, tier_name, previous_league_id FROM archive_league ORDER BY season DESC, tier",
+        (),
+    )
+    return [dict(row) for row in rows] if rows else None
+
+
+def load_all_time_records(db: CacheDatabase) -> Optional[list]:
+    """Career totals per owner across archived seasons: regular-season record, points, first places and moves."""
+    rows = _query_rows(
+        db,
+        _OWNER_HISTORY_SQL + f"""
+        SELECT h.owner_id, {_OWNER_NAME_SQL} AS owner_name, COUNT(*) AS seasons,
+               SUM(h.wins) AS wins, SUM(h.losses) AS losses, SUM(h.ties) AS ties,
+               ROUND(SUM(h.points_for), 1) AS points_for, ROUND(SUM(h.points_against), 1) AS points_against,
+               SUM(h.rank = 1) AS first_places, SUM(h.tier = 0) AS top_tier_seasons,
+               SUM(h.tier < h.previous_tier) AS promotions, SUM(h.tier > h.previous_tier) AS relegations
+        FROM history h
+        LEFT JOIN user u ON u.user_id = h.owner_id
+        GROUP BY h.owner_id
+        ORDER BY wins DESC, points_for DESC, h.owner_id
+        """,
+        (),
+    )
+    return [dict(row, points_for=_as_number(row['points_for']), points_against=_as_number(row['points_against'])) for row in rows] if rows else None
+
+
+def load_tier_history(db: CacheDatabase, owner_id: Optional[str] = None) -> Optional[list]:
+    """Per owner and archived season: tier, finish and movement ('promoted', 'relegated', 'stayed' or 'joined')."""
+    rows = _query_rows(
+        db,
+        _OWNER_HISTORY_SQL + f"""
+        SELECT h.owner_id, {_OWNER_NAME_SQL} AS owner_name, h.season, h.tier, h.tier_name, h.league_id, h.rank,
+               h.team_name, h.wins, h.losses, h.ties, h.points_for,
+               CASE WHEN h.previous_tier IS NULL THEN 'joined'
+                    WHEN h.tier < h.previous_tier THEN 'promoted'
+                    WHEN h.tier > h.previous_tier THEN 'relegated'
+                    ELSE 'stayed' END AS movement
+        FROM history h
+        LEFT JOIN user u ON u.user_id = h.owner_id
+        WHERE ? IS NULL OR h.owner_id = ?
+        ORDER BY h.owner_id, h.season
+        """,
+        (owner_id, owner_id),
+    )
+    return [dict(row, points_for=_as_number(row['points_for'])) for row in rows] if rows else None
+
+
+def load_best_weeks(db: CacheDatabase, limit: int = 10) -> Optional[list]:
+    """The highest single-week scores across every archived league and season (walks `idx_matchup_points`)."""
+    rows = _query_rows(
+        db,
+        """
+        SELECT a.season, a.tier, a.tier_name, m.league_id, m.week, m.roster_id, m.points, r.owner_id,
+               COALESCE(NULLIF(u.display_name, ''), u.username, r.owner_id) AS owner_name,
+               COALESCE(s.team_name, 'Team ' || m.roster_id) AS team_name
+        FROM matchup m INDEXED BY idx_matchup_points
+        JOIN archive_league a ON a.league_id = m.league_id
+        LEFT JOIN roster r ON r.league_id = m.league_id AND r.roster_id = m.roster_id
+        LEFT JOIN user u ON u.user_id = r.owner_id
+        LEFT JOIN standings s ON s.league_id = m.league_id AND s.roster_id = m.roster_id
+        WHERE m.points IS NOT NULL
+        ORDER BY m.points DESC
+        LIMIT ?
+        """,
+        (int(limit),),
+    )
+    return [dict(row) for row in rows] if rows else None
+
+
+def _write_matchups(conn: sqlite3.Connection, payloads: Sequence[Tuple[str, int, Any]], fetched_at: str) -> list:
+    """Sync every (league, week) in `payloads`, writing only changed entries and deleting vanished ones.
+
+    Returns `(league_id, week, normalized entries)` per payload.
+    """
+    stored, rows, removed, changed_weeks = [], [], [], []
+    for league_id, week, items in payloads:
+        normalized_items, week_rows = matchup_rows(league_id, week, items, fetched_at)
+        stored.append((league_id, int(week), normalized_items))
+        existing = {
+            (row['matchup_id'], row['roster_id']): row['row_hash']
+            for row in conn.execute(
+                "SELECT matchup_id, roster_id, row_hash FROM matchup WHERE league_id = ? AND week = ?", (str(league_id), int(week))
+            )
+        }
+        week_rows = _diff_rows(existing, week_rows, lambda row: (row[2], row[3]))
+        if week_rows or existing:
+            changed_weeks.append((str(league_id), int(week)))
+        rows.extend(week_rows)
+        removed.extend((str(league_id), int(week), matchup_id, roster_id) for matchup_id, roster_id in existing)
+    _write_league_stubs(conn, (league_id for league_id, _, _ in payloads), fetched_at)
+    conn.executemany("DELETE FROM matchup WHERE league_id = ? AND week = ? AND matchup_id = ? AND roster_id = ?", removed)
+    conn.executemany(_MATCHUP_INSERT_SQL, rows)
+    _mark_changed(conn, 'matchups', changed_weeks, fetched_at)
+    return stored
+
+
+def _write_final_weeks(conn: sqlite3.Connection, state: Any, stored: Iterable[Tuple[str, int, list]], fetched_at: str) -> None:
+    final = [(str(league_id), week) for league_id, week, items in stored if items and week_can_be_finalized(state, week, items)]
+    conn.executemany(_MATCHUP_WEEK_FINAL_SQL, [(league_id, week, fetched_at) for league_id, week in final])
+    _refresh_all_play(conn, final, fetched_at)
+
+
+def _write_unchanged(
+    conn: sqlite3.Connection, keys: Iterable[Tuple[str, Optional[str], Optional[int]]], fetched_at: str, state: Any = None
+) -> None:
+    """Side effects of revalidating `(endpoint, league_id, week)` keys whose payload did not change.
+
+    No payload rows are rewritten. The NFL state keeps its own fetched_at, and a matchup week that has since become
+    old enough is finalized from its cached scores, as `store_week_matchups` would have done, against `state`
+    (default: the cached NFL state).
+    """
+    weeks = []
+    for endpoint, league_id, week in keys:
+        if endpoint == 'nfl_state':
+            conn.execute("UPDATE nfl_state SET fetched_at = ? WHERE state_key = ?", (fetched_at, 'nfl'))
+        elif endpoint == 'matchups' and league_id is not None and week is not None:
+            weeks.append((str(league_id), int(week)))
+    if not weeks:
+        return
+    if state is None:
+        row = conn.execute("SELECT payload FROM nfl_state WHERE state_key = ?", ('nfl',)).fetchone()
+        try:
+            state = json.loads(row['payload']) if row else None
+        except Exception:
+            state = None
+    stored = []
+    for league_id, week in weeks:
+        items = [
+            {'matchup_id': item['matchup_id'], 'points': item['points']}
+            for item in conn.execute("SELECT matchup_id, points FROM matchup WHERE league_id = ? AND week = ?", (league_id, week))
+        ]
+        stored.append((league_id, week, items))
+    _write_final_weeks(conn, state, stored, fetched_at)
+
+
+def record_unchanged(
+    db: CacheDatabase,
+    endpoint: str,
+    league_id: Optional[str],
+    week: Optional[int],
+    status_code: Optional[int],
+    validators: Optional[Validators],
+) -> None:
+    """Mark a key as revalidated (HTTP 304 or an identical payload hash): bump fetched_at, keep every payload row."""
+    fetched_at = now_iso()
+    with db_write(db) as conn:
+        _write_unchanged(conn, [(endpoint, league_id, week)], fetched_at)
+        log_row = (endpoint, normalize_key(league_id), normalize_key(week), status_code, None) + tuple(validators or Validators())
+        _write_fetch_log(conn, [log_row], fetched_at)
+
+
+def store_league(db: CacheDatabase, league_id: str, week: Optional[int], data: Any) -> None:
+    if not data:
+        return None
+    with db_write(db) as conn:
+        conn.execute(_LEAGUE_UPSERT_SQL, league_row(league_id, data, now_iso()))
+    return None
+
+
+def store_rosters(db: CacheDatabase, league_id: str, week: Optional[int], data: Any) -> None:
+    if not isinstance(data, list):
+        return None
+    with db_write(db) as conn:
+        _write_rosters(conn, [(league_id, data)], now_iso())
+    return None
+
+
+def store_users(db: CacheDatabase, league_id: str, week: Optional[int], data: Any) -> None:
+    if not isinstance(data, list):
+        return None
+    with db_write(db) as conn:
+        _write_users(conn, [(league_id, data)], now_iso())
+    return None
+
+
+def store_matchups(db: CacheDatabase, league_id: str, week: int, items: Iterable[Any]) -> Optional[list]:
+    try:
+        with db_write(db) as conn:
+            ((_, _, normalized_items),) = _write_matchups(conn, [(league_id, int(week), items)], now_iso())
+    except Exception:
+        return None
+    return normalized_items or []
+
+
+def store_week_matchups(db: CacheDatabase, league_id: str, week: int, data: Any) -> Optional[list]:
+    stored = store_matchups(db, league_id, int(week), data)
+    if stored and week_can_be_finalized(load_cached_nfl_state(db), int(week), stored):
+        mark_week_final(db, league_id, int(week))
+    return stored
+
+
+def bulk_store(
+    db: CacheDatabase,
+    payloads: Iterable[Tuple[str, Optional[str], Optional[int], Any]],
+    log_rows: Iterable[tuple] = (),
+    unchanged: Iterable[Tuple[str, Optional[str], Optional[int]]] = (),
+    state: Any = None,
+) -> None:
+    """Write many fetched payloads in one transaction with one `executemany` per table.
+
+    `payloads` are `(endpoint, league_id, week, data)` for the league, rosters, users and matchups endpoints (as
+    returned by `prepare`); `log_rows` are fetch_log rows as taken by `record_fetch_log`; `unchanged` are
+    `(endpoint, league_id, week)` keys that revalidated without a new payload (see `record_unchanged`).
+    Matchup weeks are finalized against `state`, by default the cached NFL state, as in `store_week_matchups`.
+    """
+    grouped: Dict[str, list] = {'league': [], 'rosters': [], 'users': [], 'matchups': []}
+    for endpoint, league_id, week, data in payloads:
+        if endpoint == 'league' and data:
+            grouped['league'].append((league_id, data))
+        elif endpoint in ('rosters', 'users') and isinstance(data, list):
+            grouped[endpoint].append((league_id, data))
+        elif endpoint == 'matchups' and week is not None:
+            grouped['matchups'].append((league_id, int(week), data if isinstance(data, list) else []))
+
+    if state is None:
+        state = load_cached_nfl_state(db)
+    fetched_at = now_iso()
+    with db_write(db) as conn:
+        conn.executemany(_LEAGUE_UPSERT_SQL, [league_row(league_id, data, fetched_at) for league_id, data in grouped['league']])
+        if grouped['rosters']:
+            _write_rosters(conn, grouped['rosters'], fetched_at)
+        if grouped['users']:
+            _write_users(conn, grouped['users'], fetched_at)
+        if grouped['matchups']:
+            _write_final_weeks(conn, state, _write_matchups(conn, grouped['matchups'], fetched_at), fetched_at)
+        _write_unchanged(conn, unchanged, fetched_at, state)
+        _write_fetch_log(conn, log_rows, fetched_at)
+
+
+def week_is_complete(items: Iterable[Any]) -> bool:
+    """True when every matchup entry of a week has points and at least one team actually scored.
+
+    Sleeper reports `points: 0` for weeks that have not been played, so an all-zero week is not complete.
+    """
+    saw_points = False
+    count = 0
+    for item in items:
+        if not isinstance(item, dict) or item.get('matchup_id') is None:
+            continue
+        count += 1
+        points = to_float(item.get('points'))
+        if points is None:
+            return False
+        if points > 0:
+            saw_points = True
+    return count > 0 and saw_points
+
+
+def week_can_be_finalized(state: Any, week: int, items: Iterable[Any]) -> bool:
+    """Decide from the NFL state whether a freshly fetched week can no longer change.
+
+    During the season only the current and previous NFL weeks are still live (the previous one for stat
+    corrections); anything older is final once its scores are complete. In the offseason every complete
+    week is final.
+    """
+    if not isinstance(state, dict):
+        return False
+    if state.get('season_type') == 'off':
+        return week_is_complete(items)
+    current_week = to_int(state.get('week'))
+    if current_week is None or week > current_week - 2:
+        return False
+    return week_is_complete(items)
+
+
+def mark_week_final(db: CacheDatabase, league_id: str, week: int) -> None:
+    finalized_at = now_iso()
+    with db_write(db) as conn:
+        conn.execute(_MATCHUP_WEEK_FINAL_SQL, (str(league_id), int(week), finalized_at))
+        _refresh_all_play(conn, [(league_id, week)], finalized_at)
+
+
+def is_week_final(db: CacheDatabase, league_id: Optional[str], week: Optional[int]) -> bool:
+    if league_id is None or week is None:
+        return False
+    try:
+        with db_read(db) as conn:
+            row = conn.execute(
+                "SELECT is_final FROM matchup_week WHERE league_id = ? AND week = ?",
+                (str(league_id), int(week)),
+            ).fetchone()
+    except Exception:
+        return False
+    return bool(row and row['is_final'])
+
+
+def store_nfl_state(db: CacheDatabase, league_id: Optional[str], week: Optional[int], data: Any) -> None:
+    if data is None:
+        return None
+    with db_write(db) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO nfl_state (state_key, payload, fetched_at) VALUES (?, ?, ?)",
+            ('nfl', json_dumps(data), now_iso()),
+        )
+    return None
+
+
+def prepare_matchups(data: Any, week: Optional[int]) -> list:
+    list_data = data if isinstance(data, list) else []
+    week_int = to_int(week)
+    if week_int is not None:
+        for item in list_data:
+            if isinstance(item, dict) and item.get('week') is None:
+                item['week'] = week_int
+    return list_data
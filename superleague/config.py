@@ -0,0 +1,320 @@
+"""Configuration shared by the dashboard and headless jobs: league IDs, cache location and tuning knobs."""
+
+import json
+import os
+from collections.abc import Iterable as IterableABC, Mapping as MappingABC
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover - Python < 3.11
+    tomllib = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# League configuration
+LEAGUES_ENV_VAR = "SL_LEAGUES"
+LEAGUES_FILE_ENV_VAR = "SL_LEAGUES_FILE"
+DEFAULT_LEAGUES_FILENAME = "leagues.json"
+SECRETS_FILE_PATH = REPO_ROOT / ".streamlit" / "secrets.toml"
+
+CACHE_TTL_SECONDS = 43200
+NFL_STATE_TTL_SECONDS = 3600
+# Adaptive freshness (see superleague.ttl): current-week matchups while games are on, and on game days outside them
+LIVE_TTL_SECONDS = 60
+GAME_DAY_TTL_SECONDS = 900
+# The previous week can still get stat corrections
+RECENT_WEEK_TTL_SECONDS = 21600
+CACHE_ENV_VAR = "SL_CACHE_DB_PATH"
+SLEEPER_API_BASE_ENV_VAR = "SL_SLEEPER_API_BASE"
+DEFAULT_SLEEPER_API_BASE = "https://api.sleeper.app/v1"
+MAX_SEASON_WEEKS = 18
+# Teams per league in the promotion (top) and relegation (bottom) zones
+STANDINGS_ZONE_SIZE = 3
+FETCH_WORKERS_ENV_VAR = "SL_FETCH_WORKERS"
+DEFAULT_FETCH_WORKERS = 8
+HTTP_POOL_SIZE_ENV_VAR = "SL_HTTP_POOL_SIZE"
+DEFAULT_HTTP_POOL_SIZE = 16
+HTTP_CONNECT_TIMEOUT = 3.05
+# Client-side limits for Sleeper (which asks for fewer than 1000 calls a minute): a token bucket shared by every
+# request in the process (0 disables it), bounded retries with jittered exponential backoff on 429/5xx/timeouts,
+# and a circuit breaker that stops calling Sleeper for a cooldown after consecutive failures.
+HTTP_RATE_ENV_VAR = "SL_HTTP_RATE"
+DEFAULT_HTTP_RATE = 15.0
+HTTP_BURST_ENV_VAR = "SL_HTTP_BURST"
+DEFAULT_HTTP_BURST = 100
+HTTP_RETRIES_ENV_VAR = "SL_HTTP_RETRIES"
+DEFAULT_HTTP_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_BACKOFF_MAX_SECONDS = 4.0
+BREAKER_THRESHOLD_ENV_VAR = "SL_BREAKER_THRESHOLD"
+DEFAULT_BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN_ENV_VAR = "SL_BREAKER_COOLDOWN_SECONDS"
+DEFAULT_BREAKER_COOLDOWN_SECONDS = 30
+SWR_ENV_VAR = "SL_STALE_WHILE_REVALIDATE"
+SQLITE_PROFILE_ENV_VAR = "SL_SQLITE_PROFILE"
+DEFAULT_SQLITE_PROFILE = "wal"
+SQLITE_READERS_ENV_VAR = "SL_SQLITE_READERS"
+DEFAULT_SQLITE_READERS = 4
+RENDER_MODE_ENV_VAR = "SL_RENDER_MODE"
+# per_league: one components.html iframe per standings table; combined: every standings table in one iframe;
+# combined_highlights: the highlight cards and every standings table in one iframe.
+RENDER_MODES = ("per_league", "combined", "combined_highlights")
+DEFAULT_RENDER_MODE = "per_league"
+LIVE_MODE_ENV_VAR = "SL_LIVE_MODE"
+# auto: live scoring section during game windows in season; on: always (when the NFL week is known); off: never
+LIVE_MODES = ("auto", "on", "off")
+DEFAULT_LIVE_MODE = "auto"
+LIVE_POLL_SECONDS_ENV_VAR = "SL_LIVE_POLL_SECONDS"
+ODDS_SIMULATIONS_ENV_VAR = "SL_ODDS_SIMULATIONS"
+# Simulated seasons behind the promotion/relegation odds columns; 0 hides the columns
+DEFAULT_ODDS_SIMULATIONS = 20000
+METRICS_FLUSH_SECONDS_ENV_VAR = "SL_METRICS_FLUSH_SECONDS"
+# Minimum seconds between the app's metrics flushes per process; 0 flushes after every run
+DEFAULT_METRICS_FLUSH_SECONDS = 60
+
+# Pragma profiles for the cache database. `wal` lets readers run alongside the single writer and trades
+# per-commit fsyncs for speed (a crash can lose the last commits, never corrupt the file); `durable` keeps WAL
+# but fsyncs every commit; `compat` keeps the classic rollback journal for filesystems without shared-memory
+# support (network mounts), where all access is serialized on one connection.
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32768,
+        "mmap_size": 134217728,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8192,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    "compat": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+}
+
+
+def normalize_league_mapping(raw: Any) -> Dict[str, str]:
+    if isinstance(raw, MappingABC):
+        result: Dict[str, str] = {}
+        for name, league_id in raw.items():
+            if league_id is None:
+                continue
+            league_id_str = str(league_id).strip()
+            if not league_id_str:
+                continue
+            result[str(name)] = league_id_str
+        return result
+    if isinstance(raw, IterableABC) and not isinstance(raw, (str, bytes, bytearray)):
+        normalized: Dict[str, str] = {}
+        for item in raw:
+            if isinstance(item, MappingABC):
+                name = item.get("name") or item.get("league") or item.get("label")
+                league_id = item.get("id") or item.get("league_id")
+                if name and league_id:
+                    league_id_str = str(league_id).strip()
+                    if league_id_str:
+                        normalized[str(name)] = league_id_str
+            elif isinstance(item, (list, tuple)) and len(item) >= 2:
+                name, league_id = item[0], item[1]
+                if league_id:
+                    league_id_str = str(league_id).strip()
+                    if league_id_str:
+                        normalized[str(name)] = league_id_str
+        return normalized
+    return {}
+
+
+def load_leagues_from_env_var() -> Dict[str, str]:
+    try:
+        raw_json = os.environ.get(LEAGUES_ENV_VAR)
+    except Exception:
+        raw_json = None
+    if not raw_json:
+        return {}
+    try:
+        data = json.loads(raw_json)
+    except Exception:
+        return {}
+    return normalize_league_mapping(data)
+
+
+def load_leagues_from_file() -> Dict[str, str]:
+    candidates = []
+    try:
+        env_path = os.environ.get(LEAGUES_FILE_ENV_VAR)
+    except Exception:
+        env_path = None
+    if env_path:
+        try:
+            candidate = Path(env_path).expanduser()
+            if not candidate.is_absolute():
+                candidate = Path.cwd() / candidate
+            candidates.append(candidate)
+        except Exception:
+            pass
+    default_path = REPO_ROOT / DEFAULT_LEAGUES_FILENAME
+    if default_path.exists():
+        candidates.append(default_path)
+    seen = set()
+    for candidate in candidates:
+        try:
+            resolved = candidate.resolve()
+        except Exception:
+            resolved = candidate
+        if resolved in seen:
+            continue
+        seen.add(resolved)
+        try:
+            with candidate.open("r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            continue
+        except Exception:
+            continue
+        normalized = normalize_league_mapping(data)
+        if normalized:
+            return normalized
+    return {}
+
+
+def load_leagues_from_secrets_file(path: Optional[Path] = None) -> Dict[str, str]:
+    """Read the `leagues` table from `.streamlit/secrets.toml` without going through Streamlit."""
+    if tomllib is None:
+        return {}
+    secrets_path = path or SECRETS_FILE_PATH
+    try:
+        with Path(secrets_path).open("rb") as handle:
+            data = tomllib.load(handle)
+    except Exception:
+        return {}
+    raw = data.get("leagues") if isinstance(data, MappingABC) else None
+    if raw is None:
+        return {}
+    return normalize_league_mapping(raw)
+
+
+def load_leagues_headless() -> Dict[str, str]:
+    """Resolve the league mapping for scripts that run outside Streamlit (same precedence as the app)."""
+    loaders = (load_leagues_from_secrets_file, load_leagues_from_env_var, load_leagues_from_file)
+    for loader in loaders:
+        try:
+            leagues = loader()
+        except Exception:
+            leagues = {}
+        if leagues:
+            return leagues
+    return {}
+
+
+def read_int_env(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        raw = os.environ.get(name)
+    except Exception:
+        raw = None
+    if not raw:
+        return default
+    try:
+        return max(int(raw), minimum)
+    except (TypeError, ValueError):
+        return default
+
+
+def read_float_env(name: str, default: float, minimum: float = 0.0) -> float:
+    try:
+        raw = os.environ.get(name)
+    except Exception:
+        raw = None
+    if not raw:
+        return default
+    try:
+        return max(float(raw), minimum)
+    except (TypeError, ValueError):
+        return default
+
+
+def read_bool_env(name: str, default: bool) -> bool:
+    try:
+        raw = os.environ.get(name)
+    except Exception:
+        raw = None
+    if not raw:
+        return default
+    lowered = raw.strip().lower()
+    if lowered in {"true", "1", "yes", "y", "on"}:
+        return True
+    if lowered in {"false", "0", "no", "n", "off"}:
+        return False
+    return default
+
+
+def read_sqlite_profile() -> Dict[str, Any]:
+    """Return the pragma profile named by `SL_SQLITE_PROFILE`, falling back to the default for unknown names."""
+    try:
+        raw = os.environ.get(SQLITE_PROFILE_ENV_VAR)
+    except Exception:
+        raw = None
+    name = (raw or DEFAULT_SQLITE_PROFILE).strip().lower()
+    return dict(SQLITE_PROFILES.get(name) or SQLITE_PROFILES[DEFAULT_SQLITE_PROFILE])
+
+
+def read_choice_env(name: str, choices: Sequence[str], default: str) -> str:
+    """Return the environment value if it is one of `choices` (case-insensitive), else `default`."""
+    try:
+        raw = os.environ.get(name)
+    except Exception:
+        raw = None
+    value = (raw or default).strip().lower()
+    return value if value in choices else default
+
+
+def resolve_cache_db_path(value: Optional[str]) -> Optional[Path]:
+    if not value:
+        return None
+    try:
+        candidate = Path(value).expanduser()
+        if not candidate.is_absolute():
+            candidate = Path.cwd() / candidate
+        return candidate
+    except Exception:
+        return None
+
+
+FETCH_MAX_WORKERS = read_int_env(FETCH_WORKERS_ENV_VAR, DEFAULT_FETCH_WORKERS)
+HTTP_POOL_SIZE = read_int_env(HTTP_POOL_SIZE_ENV_VAR, DEFAULT_HTTP_POOL_SIZE)
+try:
+    SLEEPER_API_BASE = (os.environ.get(SLEEPER_API_BASE_ENV_VAR) or DEFAULT_SLEEPER_API_BASE).rstrip("/")
+except Exception:
+    SLEEPER_API_BASE = DEFAULT_SLEEPER_API_BASE
+HTTP_RATE = read_float_env(HTTP_RATE_ENV_VAR, DEFAULT_HTTP_RATE)
+HTTP_BURST = read_int_env(HTTP_BURST_ENV_VAR, DEFAULT_HTTP_BURST)
+HTTP_RETRIES = read_int_env(HTTP_RETRIES_ENV_VAR, DEFAULT_HTTP_RETRIES, minimum=0)
+BREAKER_THRESHOLD = read_int_env(BREAKER_THRESHOLD_ENV_VAR, DEFAULT_BREAKER_THRESHOLD)
+BREAKER_COOLDOWN_SECONDS = read_int_env(BREAKER_COOLDOWN_ENV_VAR, DEFAULT_BREAKER_COOLDOWN_SECONDS)
+STALE_WHILE_REVALIDATE = read_bool_env(SWR_ENV_VAR, True)
+SQLITE_PROFILE = read_sqlite_profile()
+SQLITE_READERS = read_int_env(SQLITE_READERS_ENV_VAR, DEFAULT_SQLITE_READERS, minimum=0)
+RENDER_MODE = read_choice_env(RENDER_MODE_ENV_VAR, RENDER_MODES, DEFAULT_RENDER_MODE)
+LIVE_MODE = read_choice_env(LIVE_MODE_ENV_VAR, LIVE_MODES, DEFAULT_LIVE_MODE)
+LIVE_POLL_SECONDS = read_int_env(LIVE_POLL_SECONDS_ENV_VAR, LIVE_TTL_SECONDS, minimum=10)
+ODDS_SIMULATIONS = read_int_env(ODDS_SIMULATIONS_ENV_VAR, DEFAULT_ODDS_SIMULATIONS, minimum=0)
+METRICS_FLUSH_SECONDS = read_int_env(METRICS_FLUSH_SECONDS_ENV_VAR, DEFAULT_METRICS_FLUSH_SECONDS, minimum=0)
+
+try:
+    _CACHE_DB_PATH_VALUE = os.environ.get(CACHE_ENV_VAR)
+except Exception:
+    _CACHE_DB_PATH_VALUE = None
+
+CACHE_DB_PATH: Optional[Path] = resolve_cache_db_path(_CACHE_DB_PATH_VALUE)
@@ -0,0 +1,146 @@
+"""Vectorized highlight kernels over a columnar frame of matchup entries.
+
+Every kernel takes a DataFrame with one row per (league, week, matchup_id, roster_id) and a float `points`
+column (NaN when a score is missing), as produced by `build_frame`. They only use sort/groupby operations, so
+they scale to multi-season archives with hundreds of thousands of rows. Team names are not part of the frame;
+callers resolve them for the handful of rows a kernel returns.
+"""
+
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+import pandas as pd
+
+COLUMNS = ['league', 'week', 'matchup_id', 'roster_id', 'points']
+MATCHUP_KEYS = ['league', 'week', 'matchup_id']
+
+
+def build_frame(records: Iterable[Mapping[str, Any]]) -> pd.DataFrame:
+    """Build the columnar entry frame from dict records (extra keys are ignored, missing ones become NaN)."""
+    df = pd.DataFrame.from_records(list(records), columns=COLUMNS)
+    df['points'] = pd.to_numeric(df['points'], errors='coerce').astype(float)
+    return df.reset_index(drop=True)
+
+
+def scored(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows that have a numeric score."""
+    return df[df['points'].notna()]
+
+
+def top_score(df: pd.DataFrame) -> Optional[pd.Series]:
+    """Highest single score, or None when nothing has been scored."""
+    points = df['points']
+    if points.notna().sum() == 0:
+        return None
+    return df.loc[points.idxmax()].copy()
+
+
+def bottom_score(df: pd.DataFrame) -> Optional[pd.Series]:
+    """Lowest single score, or None when nothing has been scored."""
+    points = df['points']
+    if points.notna().sum() == 0:
+        return None
+    return df.loc[points.idxmin()].copy()
+
+
+def closest_matchup(df: pd.DataFrame) -> Optional[Tuple[pd.Series, pd.Series, float]]:
+    """Return the two entries of the closest matchup and their score gap.
+
+    Entries are sorted by (league, week, matchup_id, points) so the smallest gap inside any matchup is between
+    neighbours; the pair is returned in the order the entries appear in `df`.
+    """
+    ranked = scored(df).dropna(subset=['matchup_id'])
+    if len(ranked) < 2:
+        return None
+    ranked = ranked.sort_values(MATCHUP_KEYS + ['points'], kind='mergesort')
+    previous = ranked.groupby(MATCHUP_KEYS, sort=False)['points'].shift()
+    gaps = (ranked['points'] - previous).to_numpy()
+    valid = ~pd.isna(gaps)
+    if not valid.any():
+        return None
+    pos = int(pd.Series(gaps).where(valid).idxmin())
+    first, second = ranked.iloc[pos - 1].copy(), ranked.iloc[pos].copy()
+    if first.name > second.name:
+        first, second = second, first
+    return first, second, float(gaps[pos])
+
+
+def matchup_completeness(df: pd.DataFrame) -> pd.Series:
+    """Boolean per (week, league, matchup_id): True when every entry of the matchup has a score."""
+    keyed = df.dropna(subset=['week'])
+    return keyed['points'].notna().groupby([keyed['week'], keyed['league'], keyed['matchup_id']], dropna=False).all()
+
+
+def week_completeness(df: pd.DataFrame) -> pd.Series:
+    """Fraction of complete matchups per week, indexed by week."""
+    per_matchup = matchup_completeness(df)
+    if per_matchup.empty:
+        return pd.Series(dtype=float)
+    return per_matchup.groupby(level=0).mean()
+
+
+def latest_completed_week(df: pd.DataFrame, completeness_threshold: float = 0.8) -> Optional[Any]:
+    """Return the latest week whose fraction of complete matchups meets the threshold.
+
+    Falls back to the week with the highest (non-zero) fraction, or None when no week has any complete matchup.
+    """
+    fractions = week_completeness(df)
+    if fractions.empty:
+        return None
+    complete = fractions[fractions >= completeness_threshold]
+    if not complete.empty:
+        return complete.index.max()
+    if fractions.max() <= 0:
+        return None
+    return fractions.idxmax()
+
+
+def season_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """Season points for/against per (league, roster_id).
+
+    Points against are the other entries' points in the same matchup (group sum minus own points).
+    """
+    totals = scored(df)
+    if totals.empty:
+        return pd.DataFrame(columns=['league', 'roster_id', 'season_points_for', 'season_points_against'])
+    group_sum = totals.groupby(MATCHUP_KEYS, dropna=False)['points'].transform('sum')
+    totals = totals.assign(points_against=group_sum - totals['points'])
+    return totals.groupby(['league', 'roster_id'], as_index=False, sort=False).agg(
+        season_points_for=('points', 'sum'),
+        season_points_against=('points_against', 'sum'),
+    )
+
+
+def all_play_weeks(df: pd.DataFrame) -> pd.DataFrame:
+    """All-play record per scored entry: its score against every other scored entry of the same league and week.
+
+    Wins count the entries it outscored and losses the ones that outscored it (from min/max ranks within the
+    group); the rest are ties. Expected wins are the share of the league beaten, ties counting half. Entries
+    without a numeric matchup_id or roster_id (byes) are left out, as `cache.matchup_rows` does, so this matches
+    the cache's materialized `all_play` rows.
+    """
+    played = scored(df)
+    played = played[
+        pd.to_numeric(played['matchup_id'], errors='coerce').notna() & pd.to_numeric(played['roster_id'], errors='coerce').notna()
+    ]
+    group = played.groupby(['league', 'week'], dropna=False, sort=False)['points']
+    count = group.transform('size')
+    wins = group.rank(method='min') - 1
+    losses = count - group.rank(method='max')
+    ties = count - 1 - wins - losses
+    opponents = (count - 1).where(count > 1)
+    return pd.DataFrame({
+        'league': played['league'],
+        'week': played['week'],
+        'roster_id': played['roster_id'],
+        'wins': wins.astype(int),
+        'losses': losses.astype(int),
+        'ties': ties.astype(int),
+        'expected_wins': ((wins + 0.5 * ties) / opponents).fillna(0.0),
+    })
+
+
+def all_play_totals(weekly: pd.DataFrame) -> pd.DataFrame:
+    """Sum `all_play_weeks` rows per (league, roster_id)."""
+    return weekly.groupby(['league', 'roster_id'], as_index=False, sort=False, dropna=False)[
+        ['wins', 'losses', 'ties', 'expected_wins']
+    ].sum()
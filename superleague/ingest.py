@@ -0,0 +1,229 @@
+"""Headless ingest: pre-warm the SQLite cache for every configured league and week.
+
+Run it from a scheduled job so the Streamlit app only ever reads from a warm database::
+
+    SL_CACHE_DB_PATH=data/sleeper_cache.db python -m superleague.ingest
+
+Leagues are resolved the same way the app resolves them (`.streamlit/secrets.toml`, `SL_LEAGUES`, then
+`leagues.json`). The exit status is 0 when every request succeeded or was already fresh, 1 when any request
+failed, and 2 when there is nothing to do (no leagues or no cache database).
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from functools import partial
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from superleague import cache, config, metrics, sleeper, ttl
+
+LEAGUE_ENDPOINTS = ('league', 'rosters', 'users')
+
+
+class IngestRequest(NamedTuple):
+    endpoint: str
+    league_id: Optional[str] = None
+    week: Optional[int] = None
+
+
+class IngestOutcome(NamedTuple):
+    request: IngestRequest
+    source: str
+    ok: bool
+    elapsed: float
+
+
+def plan_requests(
+    league_ids: Iterable[str], max_week: int, last_weeks: Optional[Mapping[str, int]] = None
+) -> List[IngestRequest]:
+    """Return every (endpoint, league, week) request needed to warm the cache for the given leagues.
+
+    Matchup weeks run from 1 to `max_week`, or to the league's entry in `last_weeks` when that is later.
+    """
+    plan = []
+    for league_id in league_ids:
+        if not league_id or str(league_id).startswith("YOUR_"):
+            continue
+        for endpoint in LEAGUE_ENDPOINTS:
+            plan.append(IngestRequest(endpoint, league_id))
+        last_week = max(max_week, (last_weeks or {}).get(league_id) or 0)
+        for week in range(1, min(last_week, config.MAX_SEASON_WEEKS) + 1):
+            plan.append(IngestRequest('matchups', league_id, week))
+    return plan
+
+
+def _succeeded(result: sleeper.FetchResult) -> bool:
+    return result.source in ('cache', 'network', 'revalidated') and result.error is None
+
+
+def _download(request: IngestRequest, conditional: bool = True) -> Tuple[sleeper.FetchResult, float]:
+    started = time.perf_counter()
+    validators = None
+    db = cache.get_db_connection()
+    if conditional and db:
+        try:
+            validators = cache.get_validators(db, request.endpoint, cache.normalize_key(request.league_id), cache.normalize_key(request.week))
+        except Exception:
+            validators = None
+    result = sleeper.download_resource(request.endpoint, request.league_id, request.week, validators)
+    return result, time.perf_counter() - started
+
+
+def _log_row(request: IngestRequest, result: sleeper.FetchResult) -> tuple:
+    if result.status_code == 200:
+        error = None
+    elif result.error is not None:
+        error = str(result.error)
+    else:
+        error = f'status {result.status_code}'
+    key = (request.endpoint, cache.normalize_key(request.league_id), cache.normalize_key(request.week))
+    return key + (result.status_code, error) + tuple(result.validators or cache.Validators())
+
+
+def fetch_and_store(
+    requests: Iterable[IngestRequest], force: bool = False, workers: Optional[int] = None, state: Any = None
+) -> List[IngestOutcome]:
+    """Download every request that is not fresh in the cache concurrently and bulk-load them in one transaction.
+
+    Keys that are still fresh (or pinned) are skipped, and expired ones are revalidated with conditional requests,
+    unless `force` is set. Matchup weeks are finalized against `state` (default: the cached NFL state).
+    """
+    pending = []
+    outcomes = []
+    for request in requests:
+        started = time.perf_counter()
+        cached = None if force else sleeper.lookup_cached(request.endpoint, request.league_id, request.week)
+        if cached is not None:
+            outcomes.append(IngestOutcome(request, 'cache', True, time.perf_counter() - started))
+        else:
+            pending.append(request)
+
+    downloads = sleeper.run_parallel((partial(_download, request, not force) for request in pending), max_workers=workers)
+    payloads, log_rows, unchanged = [], [], []
+    for request, downloaded in zip(pending, downloads):
+        result, elapsed = downloaded if downloaded is not None else (sleeper.FetchResult(None, None, RuntimeError('download failed')), 0.0)
+        log_rows.append(_log_row(request, result))
+        if result.source == 'revalidated':
+            unchanged.append(request)
+            outcomes.append(IngestOutcome(request, 'revalidated', True, elapsed))
+        elif result.status_code == 200:
+            payloads.append((request.endpoint, request.league_id, request.week, result.data))
+            outcomes.append(IngestOutcome(request, 'network', True, elapsed))
+        else:
+            outcomes.append(IngestOutcome(request, 'fallback', False, elapsed))
+
+    db = cache.get_db_connection()
+    if db and log_rows:
+        try:
+            cache.bulk_store(db, payloads, log_rows, unchanged, state=state)
+        except Exception as exc:
+            print(f"Bulk load failed, nothing was written: {exc}", file=sys.stderr)
+            outcomes = [outcome._replace(ok=False) if outcome.source in ('network', 'revalidated') else outcome for outcome in outcomes]
+    return outcomes
+
+
+def _regular_season_ends(leagues: Dict[str, str], force: bool, workers: Optional[int]) -> Tuple[List[IngestOutcome], Dict[str, int]]:
+    """Warm every league's info first and read its last regular-season week (see `ttl.regular_season_end`)."""
+    league_ids = [league_id for league_id in leagues.values() if league_id and not str(league_id).startswith("YOUR_")]
+    outcomes = fetch_and_store([IngestRequest('league', league_id) for league_id in league_ids], force=force, workers=workers)
+    last_weeks = {}
+    for league_id in league_ids:
+        cached = sleeper.lookup_cached('league', league_id, allow_stale=True)
+        last_weeks[league_id] = ttl.regular_season_end(cached.data if cached is not None else None)
+    return outcomes, last_weeks
+
+
+def run_ingest(leagues: Dict[str, str], max_week: Optional[int] = None, force: bool = False, workers: Optional[int] = None) -> List[IngestOutcome]:
+    """Fetch the NFL state, then download every planned request concurrently and bulk-load them into the cache.
+
+    See `fetch_and_store`. All downloaded payloads and their fetch_log rows are written in a single transaction with
+    one `executemany` per table; keys whose payload did not change only get their fetched_at bumped. Without an
+    explicit `max_week` and with odds enabled, each league's remaining regular-season weeks are planned as well,
+    since the dashboard's odds columns read that schedule.
+    """
+    state_request = IngestRequest('nfl_state')
+    started = time.perf_counter()
+    if force:
+        state_result = sleeper.refresh_resource('nfl_state')
+    else:
+        state_result = sleeper.fetch_resource('nfl_state', allow_stale=False)
+    outcomes = [IngestOutcome(state_request, state_result.source, _succeeded(state_result), time.perf_counter() - started)]
+
+    last_weeks = None
+    if max_week is None:
+        state = state_result.data
+        state_week = cache.to_int(state.get('week')) if isinstance(state, dict) else None
+        max_week = state_week if state_week else config.MAX_SEASON_WEEKS
+        if state_week and config.ODDS_SIMULATIONS > 0:
+            league_outcomes, last_weeks = _regular_season_ends(leagues, force, workers)
+            outcomes += league_outcomes
+    max_week = max(0, min(int(max_week), config.MAX_SEASON_WEEKS))
+
+    plan = plan_requests(leagues.values(), max_week, last_weeks)
+    if last_weeks is not None:
+        # League info was already stored above
+        plan = [request for request in plan if request.endpoint != 'league']
+    return outcomes + fetch_and_store(plan, force=force, workers=workers)
+
+
+def format_stats(outcomes: Sequence[IngestOutcome], elapsed: float) -> str:
+    """Render per-endpoint counts (by source), failures and latency as a plain-text table."""
+    rows: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for outcome in outcomes:
+        row = rows[outcome.request.endpoint]
+        row['requests'] += 1
+        row[outcome.source] += 1
+        row['failed'] += 0 if outcome.ok else 1
+        row['seconds'] += outcome.elapsed
+        row['max'] = max(row['max'], outcome.elapsed)
+
+    header = f"{'endpoint':<10} {'requests':>8} {'network':>8} {'unchanged':>9} {'cache':>6} {'fallback':>8} {'failed':>6} {'avg ms':>8} {'max ms':>8}"
+    lines = [header, "-" * len(header)]
+    for endpoint in sorted(rows):
+        row = rows[endpoint]
+        count = row['requests'] or 1
+        lines.append(
+            f"{endpoint:<10} {int(row['requests']):>8} {int(row['network']):>8} {int(row['revalidated']):>9} {int(row['cache']):>6} "
+            f"{int(row['fallback']):>8} {int(row['failed']):>6} {row['seconds'] / count * 1000:>8.1f} {row['max'] * 1000:>8.1f}"
+        )
+    lines.append(f"{len(outcomes)} requests in {elapsed:.2f}s")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m superleague.ingest", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help=f"cache database path (default: ${config.CACHE_ENV_VAR})")
+    parser.add_argument("--max-week", type=int, help="last week to fetch (default: current NFL week, capped at 18)")
+    parser.add_argument("--force", action="store_true", help="refetch every key even if its cache entry is still fresh")
+    parser.add_argument("--workers", type=int, help=f"concurrent requests (default: ${config.FETCH_WORKERS_ENV_VAR} or {config.DEFAULT_FETCH_WORKERS})")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        cache.configure_cache_db_path(args.db)
+    if cache.get_db_connection() is None:
+        print(f"No cache database configured; pass --db or set {config.CACHE_ENV_VAR}.", file=sys.stderr)
+        return 2
+
+    leagues = config.load_leagues_headless()
+    if not leagues:
+        print("No leagues configured; see README for the supported sources.", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    try:
+        outcomes = run_ingest(leagues, max_week=args.max_week, force=args.force, workers=args.workers)
+    finally:
+        try:
+            metrics.flush()
+        except Exception:
+            pass
+        # Fold the WAL back into the database file so a committed snapshot is self-contained
+        cache.close_db_connection()
+    print(f"Ingested {len(leagues)} leagues into {cache.get_cache_db_path()}")
+    print(format_stats(outcomes, time.perf_counter() - started))
+    return 0 if all(outcome.ok for outcome in outcomes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
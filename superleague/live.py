@@ -0,0 +1,88 @@
+"""Live scoring: poll the current week's matchups on a short interval and diff them against the last snapshot.
+
+The dashboard's live section reruns on its own every `config.LIVE_POLL_SECONDS` while games are on. Each rerun asks
+`WeekPoller` for the current week; the poller is shared by every session in the process and refreshes a league's
+`/matchups/{week}` at most once per interval, whoever asks first. `diff_scores` then tells a session which scores
+moved since its previous snapshot.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache, partial
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from superleague import cache, config, sleeper, ttl
+
+# (league, matchup_id, roster_id) -> points
+ScoreKey = Tuple[Any, Any, Any]
+
+
+def live_mode_active(state: Any, now: Optional[datetime] = None) -> bool:
+    """Whether the live section should run: forced by `SL_LIVE_MODE`, or in season during a game window."""
+    if config.LIVE_MODE == "off":
+        return False
+    week = cache.to_int(state.get('week')) if isinstance(state, dict) else None
+    if week is None:
+        return False
+    if config.LIVE_MODE == "on":
+        return True
+    return ttl.in_season(state) and ttl.in_game_window(now or datetime.now(timezone.utc), week)
+
+
+class WeekPoller:
+    """Latest matchups per (league, week), refreshed from Sleeper at most once per interval across sessions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest: Dict[Tuple[str, int], list] = {}
+        self._polled_at: Dict[Tuple[str, int], float] = {}
+
+    def _claim(self, league_ids: Iterable[str], week: int, interval: float) -> List[str]:
+        """League ids this caller should refresh now; claiming them keeps concurrent sessions from doing it too."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for league_id in league_ids:
+                key = (str(league_id), week)
+                if now - self._polled_at.get(key, float('-inf')) >= interval:
+                    self._polled_at[key] = now
+                    due.append(str(league_id))
+        return due
+
+    def _refresh(self, league_id: str, week: int) -> None:
+        result = sleeper.refresh_resource('matchups', league_id, week)
+        if isinstance(result.data, list):
+            with self._lock:
+                self._latest[(league_id, week)] = result.data
+
+    def poll(self, league_ids: Iterable[str], week: int, interval: float) -> Dict[str, list]:
+        """Refresh the leagues that are due (concurrently) and return the latest matchups for every league."""
+        league_ids = [str(league_id) for league_id in league_ids if league_id and not str(league_id).startswith("YOUR_")]
+        week = int(week)
+        due = self._claim(league_ids, week, interval)
+        sleeper.run_parallel((partial(self._refresh, league_id, week) for league_id in due))
+        with self._lock:
+            return {league_id: list(self._latest.get((league_id, week)) or []) for league_id in league_ids}
+
+
+@lru_cache(maxsize=None)
+def get_week_poller() -> WeekPoller:
+    return WeekPoller()
+
+
+def score_snapshot(entries: Iterable[dict]) -> Dict[ScoreKey, Optional[float]]:
+    """Points per (league, matchup_id, roster_id) for entries shaped like the dashboard's matchup entries."""
+    return {
+        (entry.get('league'), entry.get('matchup_id'), entry.get('roster_id')): cache.to_float(entry.get('points'))
+        for entry in entries
+    }
+
+
+def diff_scores(previous: Optional[Dict[ScoreKey, Optional[float]]], entries: Iterable[dict]) -> Tuple[Dict[ScoreKey, Optional[float]], Set[ScoreKey]]:
+    """Return `(snapshot, changed keys)`; with no previous snapshot nothing counts as changed."""
+    snapshot = score_snapshot(entries)
+    if previous is None:
+        return snapshot, set()
+    changed = {key for key, points in snapshot.items() if previous.get(key) != points}
+    return snapshot, changed
@@ -0,0 +1,290 @@
+"""Fetch and render instrumentation: counters and latency histograms, kept in process and flushed to SQLite.
+
+Sleeper requests, cache lookups and the dashboard's stages record into the process-wide `REGISTRY`. `flush` adds
+what was recorded since the previous flush to the cache database's `metrics` table, so the table holds totals
+across app processes and ingest runs (the app goes through `flush_if_due`, so its reruns share one write per
+interval). `prometheus_text` renders either source in the Prometheus text format::
+
+    SL_CACHE_DB_PATH=data/sleeper_cache.db python -m superleague.metrics > sleeper.prom
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from superleague import cache, config
+
+# Histogram bucket upper bounds in seconds (the last bucket, +Inf, is implicit)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_BUCKET_LABELS = tuple(format(bound, 'g') for bound in BUCKETS) + ('+Inf',)
+
+HELP = {
+    'sl_fetch_total': "Fetches answered by the engine, by endpoint and source (cache/stale hits, network/revalidated/fallback misses).",
+    'sl_refresh_total': "Refreshes that went to Sleeper, by endpoint and outcome.",
+    'sl_refresh_listener_errors_total': "Refresh listeners that raised after a background refresh, by endpoint.",
+    'sl_http_request_seconds': "Latency of individual Sleeper HTTP requests, by endpoint and status.",
+    'sl_http_response_bytes_total': "Response body bytes received from Sleeper, by endpoint.",
+    'sl_http_retries_total': "Sleeper requests retried, by endpoint and reason.",
+    'sl_http_circuit_open_total': "Sleeper requests skipped because the circuit breaker was open, by endpoint.",
+    'sl_rate_limit_wait_seconds': "Time spent waiting for a rate-limiter token.",
+    'sl_stage_seconds': "Time spent in each stage of a dashboard run.",
+    'sl_odds_seconds': "Time spent simulating one league's promotion/relegation odds.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Series(NamedTuple):
+    """One metric series: a counter (`total` only) or a histogram (`count`, `total` and per-bucket counts)."""
+
+    name: str
+    labels: Labels
+    kind: str
+    count: float = 0.0
+    total: float = 0.0
+    buckets: Tuple[float, ...] = ()
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((str(key), str(value)) for key, value in labels.items()))
+
+
+class Registry:
+    """Thread-safe counters and histograms; keeps lifetime totals plus the deltas not yet flushed to SQLite."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, Labels], list] = {}
+        self._pending: Dict[Tuple[str, Labels], list] = {}
+        self._kinds: Dict[str, str] = {}
+
+    def _record(self, name: str, kind: str, labels: Labels, value: float) -> None:
+        bucket = None
+        if kind == 'histogram':
+            bucket = next((i for i, bound in enumerate(BUCKETS) if value <= bound), len(BUCKETS))
+        with self._lock:
+            self._kinds[name] = kind
+            for store in (self._totals, self._pending):
+                entry = store.get((name, labels))
+                if entry is None:
+                    entry = store[(name, labels)] = [0.0, 0.0, [0] * len(_BUCKET_LABELS)]
+                entry[0] += 1
+                entry[1] += value
+                if bucket is not None:
+                    entry[2][bucket] += 1
+
+    def incr(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        self._record(name, 'counter', _labels(labels), float(value))
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        self._record(name, 'histogram', _labels(labels), float(seconds))
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def _series(self, store: Dict[Tuple[str, Labels], list]) -> List[Series]:
+        series = []
+        for (name, labels), (count, total, buckets) in sorted(store.items()):
+            kind = self._kinds[name]
+            series.append(Series(name, labels, kind, count, total, tuple(buckets) if kind == 'histogram' else ()))
+        return series
+
+    def snapshot(self) -> List[Series]:
+        """Everything recorded by this process so far."""
+        with self._lock:
+            return self._series(self._totals)
+
+    def pending(self) -> List[Series]:
+        """What was recorded since the last `settle`; nothing is cleared."""
+        with self._lock:
+            return self._series(self._pending)
+
+    def settle(self, series: Sequence[Series]) -> None:
+        """Subtract `series` (taken from `pending` and written) from the pending deltas.
+
+        Anything recorded in between stays pending for the next flush.
+        """
+        with self._lock:
+            for s in series:
+                key = (s.name, s.labels)
+                entry = self._pending.get(key)
+                if entry is None:
+                    continue
+                entry[0] -= s.count
+                entry[1] -= s.total
+                for i, n in enumerate(s.buckets):
+                    entry[2][i] -= n
+                if entry[0] <= 0:
+                    del self._pending[key]
+
+
+REGISTRY = Registry()
+incr = REGISTRY.incr
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+
+
+class StageTimer:
+    """Records the time between successive `lap(stage)` calls into `sl_stage_seconds`, e.g. through `main()`."""
+
+    def __init__(self, name: str = 'sl_stage_seconds'):
+        self.name = name
+        self.started = self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        observe(self.name, elapsed, stage=stage)
+        return elapsed
+
+    def finish(self) -> float:
+        """Record the whole run as stage `total`."""
+        elapsed = time.perf_counter() - self.started
+        observe(self.name, elapsed, stage='total')
+        return elapsed
+
+
+def _sample_rows(series: Sequence[Series]) -> List[tuple]:
+    rows = []
+    for s in series:
+        labels = json.dumps(dict(s.labels), sort_keys=True)
+        if s.kind == 'counter':
+            rows.append((s.name, labels, s.kind, 'total', s.total))
+            continue
+        rows.append((s.name, labels, s.kind, 'count', s.count))
+        rows.append((s.name, labels, s.kind, 'sum', s.total))
+        rows.extend((s.name, labels, s.kind, bound, n) for bound, n in zip(_BUCKET_LABELS, s.buckets) if n)
+    return rows
+
+
+def flush(db: Any = None) -> int:
+    """Add the pending deltas to the `metrics` table; returns the number of series written (0 without a DB).
+
+    The deltas are only cleared once the write has committed, so a failed write (a locked or full database) keeps
+    them for the next flush and raises.
+    """
+    if db is None:
+        db = cache.get_db_connection()
+    if not db:
+        return 0
+    series = REGISTRY.pending()
+    if series:
+        cache.add_metric_samples(db, _sample_rows(series))
+        REGISTRY.settle(series)
+    return len(series)
+
+
+_flush_lock = threading.Lock()
+_last_flush: Optional[float] = None
+
+
+def flush_if_due(interval: Optional[float] = None, db: Any = None) -> int:
+    """`flush` at most once per `interval` seconds in this process (default `config.METRICS_FLUSH_SECONDS`).
+
+    For the app, which would otherwise open a write transaction on every rerun; the CLIs `flush` once per run.
+    Returns 0 without flushing when the last successful flush was too recent or another thread is flushing; a
+    failed flush raises and is retried on the next call.
+    """
+    global _last_flush
+    interval = config.METRICS_FLUSH_SECONDS if interval is None else interval
+    if not _flush_lock.acquire(blocking=False):
+        return 0
+    try:
+        now = time.monotonic()
+        if _last_flush is not None and now - _last_flush < interval:
+            return 0
+        written = flush(db)
+        _last_flush = now
+        return written
+    finally:
+        _flush_lock.release()
+
+
+def load_series(db: Any) -> List[Series]:
+    """Totals from the `metrics` table, as series."""
+    grouped: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for name, labels, kind, sample, value in cache.load_metric_samples(db):
+        entry = grouped.setdefault((name, labels), {'kind': kind, 'samples': {}})
+        entry['samples'][sample] = value
+    series = []
+    for (name, labels), entry in sorted(grouped.items()):
+        samples = entry['samples']
+        label_tuple = _labels(json.loads(labels))
+        if entry['kind'] == 'counter':
+            series.append(Series(name, label_tuple, 'counter', total=samples.get('total', 0.0)))
+        else:
+            buckets = tuple(samples.get(bound, 0.0) for bound in _BUCKET_LABELS)
+            series.append(Series(name, label_tuple, 'histogram', samples.get('count', 0.0), samples.get('sum', 0.0), buckets))
+    return series
+
+
+def quantile(series: Series, q: float) -> Optional[float]:
+    """Upper bound of the bucket holding the q-quantile of a histogram (None when empty or past the last bound)."""
+    if series.kind != 'histogram' or not series.count:
+        return None
+    target = q * series.count
+    seen = 0.0
+    for bound, n in zip(BUCKETS, series.buckets):
+        seen += n
+        if seen >= target:
+            return bound
+    return None
+
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def prometheus_text(series: Sequence[Series]) -> str:
+    """Render series in the Prometheus text exposition format (histogram buckets cumulative, as it expects)."""
+    lines = []
+    current = None
+    for s in sorted(series, key=lambda s: (s.name, s.labels)):
+        if s.name != current:
+            current = s.name
+            if s.name in HELP:
+                lines.append(f"# HELP {s.name} {HELP[s.name]}")
+            lines.append(f"# TYPE {s.name} {s.kind}")
+        if s.kind == 'counter':
+            lines.append(f"{s.name}{_format_labels(s.labels)} {s.total:g}")
+            continue
+        cumulative = 0.0
+        for bound, n in zip(_BUCKET_LABELS, s.buckets):
+            cumulative += n
+            lines.append(f"{s.name}_bucket{_format_labels(s.labels, (('le', bound),))} {cumulative:g}")
+        lines.append(f"{s.name}_sum{_format_labels(s.labels)} {s.total:g}")
+        lines.append(f"{s.name}_count{_format_labels(s.labels)} {s.count:g}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m superleague.metrics", description="Print the cache database's metric totals in the Prometheus text format.")
+    parser.add_argument("--db", help=f"cache database path (default: ${config.CACHE_ENV_VAR})")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        cache.configure_cache_db_path(args.db)
+    db = cache.get_db_connection()
+    if db is None:
+        print(f"No cache database configured; pass --db or set {config.CACHE_ENV_VAR}.", file=sys.stderr)
+        return 2
+    sys.stdout.write(prometheus_text(load_series(db)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
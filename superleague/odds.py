@@ -0,0 +1,145 @@
+"""Monte Carlo promotion/relegation odds: simulate the rest of a league's regular season many times in NumPy.
+
+Each simulated week draws every team's score from its own season so far (a bootstrap over its completed-week
+points; teams with fewer than `MIN_SAMPLES` scores draw from the whole league's), plays the remaining schedule, and
+ranks the final table the way `standings` does: wins, then points for, then roster_id. A team's odds are the
+share of simulated seasons that end with it in the promotion zone, in the relegation zone, or safe in between.
+Every remaining week of every simulation is drawn at once as one `(weeks, simulations, teams)` array, so tens of
+thousands of seasons take well under a second.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from superleague import config, highlights, metrics
+
+MIN_SAMPLES = 3
+# A fixed seed keeps the odds stable between reruns over the same data
+SEED = 316
+
+# Remaining games, week by week, as (roster_id, roster_id) pairs
+Schedule = Sequence[Sequence[Tuple[Any, Any]]]
+
+
+class ZoneOdds(NamedTuple):
+    promotion: float
+    safe: float
+    relegation: float
+
+
+def split_season(frame: pd.DataFrame, completed_week: int, last_week: int) -> Tuple[Dict[Any, np.ndarray], List[List[Tuple[Any, Any]]]]:
+    """Split one league's entry frame (see `highlights.build_frame`) into played scores and the remaining schedule.
+
+    Scores are every positive `points` of weeks up to `completed_week`, per roster; the schedule pairs the two
+    entries of each matchup in weeks after it up to `last_week` (byes and odd groups are skipped).
+    """
+    weeks = pd.to_numeric(frame['week'], errors='coerce')
+    played = frame[(weeks <= completed_week) & (frame['points'] > 0)]
+    scores = {roster_id: group.to_numpy(dtype=float) for roster_id, group in played.groupby('roster_id')['points']}
+
+    upcoming = frame[(weeks > completed_week) & (weeks <= last_week)].dropna(subset=['matchup_id', 'roster_id'])
+    schedule = []
+    for _, week_frame in upcoming.groupby(weeks[upcoming.index], sort=True):
+        pairs = [
+            tuple(group.tolist()) for _, group in week_frame.groupby('matchup_id')['roster_id'] if len(group) == 2
+        ]
+        if pairs:
+            schedule.append(pairs)
+    return scores, schedule
+
+
+def simulate(
+    standings_rows: Iterable[Mapping[str, Any]],
+    scores: Mapping[Any, Sequence[float]],
+    schedule: Schedule,
+    promotion_allowed: bool,
+    demotion_allowed: bool,
+    simulations: int = config.DEFAULT_ODDS_SIMULATIONS,
+    zone: int = config.STANDINGS_ZONE_SIZE,
+    seed: Optional[int] = SEED,
+) -> Dict[Any, ZoneOdds]:
+    """Odds per roster_id of finishing in the promotion zone, safe, or in the relegation zone.
+
+    `standings_rows` give the current wins and points for (as in the `standings` table); `scores` each roster's
+    completed-week points; `schedule` the games left. Zones that do not apply to the league (the top league cannot
+    be promoted, the bottom one not relegated) count as safe.
+    """
+    rows = sorted((row for row in standings_rows if row.get('roster_id') is not None), key=lambda row: row['roster_id'])
+    roster_ids = [row['roster_id'] for row in rows]
+    team_count = len(roster_ids)
+    if not team_count:
+        return {}
+    column = {roster_id: i for i, roster_id in enumerate(roster_ids)}
+    rng = np.random.default_rng(seed)
+
+    wins = np.tile(np.array([float(row.get('wins') or 0) for row in rows]), (simulations, 1))
+    points = np.tile(np.array([float(row.get('points_for') or 0) for row in rows]), (simulations, 1))
+
+    # Padded (teams, max samples) score matrix; short histories borrow the league's pooled scores
+    pooled = np.concatenate([np.asarray(s, dtype=float) for s in scores.values() if len(s)] or [np.array([100.0])])
+    samples = [np.asarray(scores.get(roster_id, ()), dtype=float) for roster_id in roster_ids]
+    samples = [s if len(s) >= MIN_SAMPLES else pooled for s in samples]
+    counts = np.array([len(s) for s in samples])
+    matrix = np.zeros((team_count, counts.max()))
+    for i, s in enumerate(samples):
+        matrix[i, :len(s)] = s
+    team_axis = np.arange(team_count)
+
+    # (weeks, teams) opponent columns; teams without a game that week face themselves and are masked out
+    opponents = np.tile(team_axis, (len(schedule), 1))
+    for week, games in enumerate(schedule):
+        for a, b in games:
+            if a in column and b in column:
+                opponents[week, column[a]], opponents[week, column[b]] = column[b], column[a]
+    playing = opponents != team_axis
+
+    # Every remaining week of every simulation at once: (weeks, simulations, teams) scores
+    draws = (rng.random((len(schedule), simulations, team_count), dtype=np.float32) * counts).astype(np.intp)
+    week_scores = matrix.ravel()[draws + team_axis * matrix.shape[1]] * playing[:, None, :]
+    opponent_scores = np.take_along_axis(week_scores, np.broadcast_to(opponents[:, None, :], draws.shape), axis=2)
+    # Ties earn no wins
+    wins += ((week_scores > opponent_scores) & playing[:, None, :]).sum(axis=0)
+    points += week_scores.sum(axis=0)
+
+    # Rank by wins, then points for to one decimal; the stable sort keeps roster_id order for exact ties
+    key = wins * 1e7 + np.round(points, 1)
+    order = np.argsort(-key, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    ranks[np.arange(simulations)[:, None], order] = team_axis
+    promoted = (ranks < zone).mean(axis=0) if promotion_allowed else np.zeros(team_count)
+    relegated = (ranks >= team_count - zone).mean(axis=0) if demotion_allowed else np.zeros(team_count)
+    return {
+        roster_id: ZoneOdds(float(promoted[i]), max(float(1 - promoted[i] - relegated[i]), 0.0), float(relegated[i]))
+        for i, roster_id in enumerate(roster_ids)
+    }
+
+
+def league_odds(
+    standings_rows: Sequence[Mapping[str, Any]],
+    entries: Iterable[Mapping[str, Any]],
+    completed_week: int,
+    last_week: int,
+    promotion_allowed: bool,
+    demotion_allowed: bool,
+    simulations: Optional[int] = None,
+) -> Optional[Dict[Any, ZoneOdds]]:
+    """`simulate` one league from its matchup entries; None when odds are off or no regular-season games remain."""
+    simulations = config.ODDS_SIMULATIONS if simulations is None else simulations
+    if simulations <= 0 or completed_week >= last_week or not standings_rows:
+        return None
+    scores, schedule = split_season(highlights.build_frame(entries), completed_week, last_week)
+    if not schedule:
+        return None
+    with metrics.timer('sl_odds_seconds'):
+        return simulate(standings_rows, scores, schedule, promotion_allowed, demotion_allowed, simulations)
+
+
+def format_odds(value: float) -> str:
+    """A probability as a whole percentage, keeping long shots and near-certainties distinguishable from 0%/100%."""
+    if 0 < value < 0.005:
+        return "<1%"
+    if 0.995 <= value < 1:
+        return ">99%"
+    return f"{value:.0%}"
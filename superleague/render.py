@@ -0,0 +1,195 @@
+"""HTML fragments for the highlight cards and standings tables, cached by a hash of the data they show.
+
+A rerun whose standings or highlight data did not change gets the finished markup back from `FRAGMENTS` instead of
+rebuilding and re-escaping it. Card styles live in `HIGHLIGHT_CSS`, which the page emits once; standings tables
+are embedded in their own iframe, so each table document carries `STANDINGS_CSS`. `combined_page` puts every table
+(and optionally the cards) into a single document with one copy of each stylesheet.
+"""
+
+import hashlib
+import html
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Mapping, Sequence, Tuple
+
+HIGHLIGHT_CSS = """<style>
+.sl-hl-primary{color:var(--sl-primary,#000000);font-weight:600}
+.sl-hl-muted{color:var(--sl-muted,#6c757d)}
+.sl-hl-success{color:var(--sl-success,#1e7e34);font-weight:600}
+.sl-hl-danger{color:var(--sl-danger,#e53935);font-weight:600}
+@media (prefers-color-scheme: dark){
+  .sl-hl-primary{color:var(--sl-primary,#e6eef6) !important}
+  .sl-hl-muted{color:var(--sl-muted,#aab9c6) !important}
+  .sl-hl-success{color:var(--sl-success,rgba(38,166,91,0.95)) !important}
+  .sl-hl-danger{color:var(--sl-danger,rgba(239,83,80,0.95)) !important}
+}
+</style>"""
+
+# CSS uses prefers-color-scheme to pick subtle backgrounds that read well in both themes.
+STANDINGS_CSS = """<style>
+.sl-table { border-collapse: collapse; width: 100%; background: transparent; }
+.sl-table th, .sl-table td { padding: 8px 10px; text-align: left; border-bottom: 1px solid rgba(0,0,0,0.06); color: inherit; }
+.sl-table thead th { font-weight: 600; }
+/* Light mode faded colors */
+.promo { background-color: #e6f4ea; }
+.demo  { background-color: #fdecea; }
+/* Dark mode adjustments: set light text color and subtle translucent backgrounds */
+@media (prefers-color-scheme: dark) {
+    .sl-table { background: transparent; }
+    .sl-table th, .sl-table td { border-bottom: 1px solid rgba(255,255,255,0.06); color: #e6eef6; }
+    .promo { background-color: rgba(38,166,91,0.12); }
+    .demo  { background-color: rgba(239,83,80,0.12); }
+}
+</style>"""
+
+# Layout for the combined render mode, where cards and tables share one iframe instead of the page's styles.
+COMBINED_CSS = """<style>
+body { margin: 0; font-family: "Source Sans Pro", system-ui, -apple-system, sans-serif; color: #31333f; }
+.sl-toolbar { display: flex; gap: 8px; justify-content: flex-end; margin-bottom: 4px; }
+.sl-toolbar button { font: inherit; font-size: 13px; padding: 2px 10px; border-radius: 6px; cursor: pointer;
+    border: 1px solid rgba(0,0,0,0.15); background: transparent; color: inherit; }
+.sl-section { margin-bottom: 18px; }
+.sl-section > summary { font-size: 22px; font-weight: 700; padding: 6px 0; cursor: pointer; }
+.sl-card-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 16px; margin: 8px 0; }
+@media (prefers-color-scheme: dark) {
+    body { color: #e6eef6; }
+    .sl-toolbar button { border-color: rgba(255,255,255,0.2); }
+}
+</style>"""
+
+COMBINED_TOOLBAR = """<div class="sl-toolbar">
+<button type="button" onclick="document.querySelectorAll('details.sl-section').forEach(d => d.open = true)">Expand all</button>
+<button type="button" onclick="document.querySelectorAll('details.sl-section').forEach(d => d.open = false)">Collapse all</button>
+</div>"""
+
+CARD_TITLE_STYLE = "font-size:18px;font-weight:700;margin-bottom:6px;"
+
+# (css class, inline style, text) for one line of a highlight card; the text is escaped when rendered.
+CardLine = Tuple[str, str, Any]
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered HTML keyed by content hash, shared by every session in the process."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: str, build: Callable[[], str]) -> str:
+        with self._lock:
+            cached = self._items.get(key)
+            if cached is not None:
+                self._items.move_to_end(key)
+                return cached
+        fragment = build()
+        with self._lock:
+            self._items[key] = fragment
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return fragment
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+FRAGMENTS = FragmentCache()
+
+
+def content_key(kind: str, payload: Any) -> str:
+    encoded = json.dumps([kind, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def highlight_card(title: str, lines: Sequence[CardLine]) -> str:
+    """Markup for one highlight card: a bold title followed by one div per line (without the shared CSS)."""
+    payload = [title, [[css_class, style, str(text)] for css_class, style, text in lines]]
+
+    def _build() -> str:
+        parts = [f"<div style='{CARD_TITLE_STYLE}'>{html.escape(title)}</div>"]
+        for css_class, style, text in payload[1]:
+            class_attr = f"class='{css_class}' " if css_class else ""
+            parts.append(f"<div {class_attr}style='{style}'>{html.escape(text)}</div>")
+        return "\n".join(parts)
+
+    return FRAGMENTS.get_or_build(content_key("card", payload), _build)
+
+
+def standings_markup(
+    rows: Iterable[Mapping[str, Any]],
+    columns: Mapping[str, str],
+    promotion_allowed: bool,
+    demotion_allowed: bool,
+) -> str:
+    """The `<table>` for one league's standings, without styles.
+
+    `columns` maps row keys to header labels; rows in a zone get the `promo` / `demo` class when that zone applies.
+    """
+    keys = list(columns)
+    payload = [
+        [[str(row[key]) for key in keys], bool(row.get('promotion_zone')), bool(row.get('relegation_zone'))]
+        for row in rows
+    ]
+    headers = [str(label) for label in columns.values()]
+
+    def _build() -> str:
+        body = []
+        for cells, promotion_zone, relegation_zone in payload:
+            css_class = ""
+            if promotion_allowed and promotion_zone:
+                css_class = "promo"
+            elif demotion_allowed and relegation_zone:
+                css_class = "demo"
+            # Escape cell contents to avoid breaking the HTML if team names contain <, &, etc.
+            row_cells = "".join(f"<td>{html.escape(cell)}</td>" for cell in cells)
+            body.append(f"<tr class=\"{css_class}\">{row_cells}</tr>")
+        header_html = "".join(f"<th>{html.escape(label)}</th>" for label in headers)
+        return (
+            "<div class=\"sl-table-wrapper\">\n"
+            "  <table class=\"sl-table\">\n"
+            f"    <thead><tr>{header_html}</tr></thead>\n"
+            "    <tbody>\n"
+            + "\n".join(body)
+            + "\n    </tbody>\n  </table>\n</div>"
+        )
+
+    return FRAGMENTS.get_or_build(
+        content_key("standings", [headers, payload, promotion_allowed, demotion_allowed]), _build
+    )
+
+
+def standings_table(
+    rows: Iterable[Mapping[str, Any]],
+    columns: Mapping[str, str],
+    promotion_allowed: bool,
+    demotion_allowed: bool,
+) -> str:
+    """Self-contained HTML document (CSS + table) for one league's standings, ready for `components.html`."""
+    return f"{STANDINGS_CSS}\n{standings_markup(rows, columns, promotion_allowed, demotion_allowed)}"
+
+
+def card_grid(cards: Sequence[str]) -> str:
+    """Lay out highlight cards (from `highlight_card`) in a grid that wraps to one column on narrow screens."""
+    return "<div class=\"sl-card-grid\">" + "".join(f"<div class=\"sl-card\">{card}</div>" for card in cards) + "</div>"
+
+
+def combined_page(sections: Sequence[Tuple[str, str]]) -> str:
+    """One document for a single `components.html` call: each (title, body HTML) becomes a collapsible section.
+
+    The card and table styles are included once for the whole document, and sections open and close in the browser
+    without a Streamlit rerun.
+    """
+    payload = [[str(title), body] for title, body in sections]
+
+    def _build() -> str:
+        parts = [STANDINGS_CSS, HIGHLIGHT_CSS, COMBINED_CSS, COMBINED_TOOLBAR]
+        for title, body in payload:
+            parts.append(
+                f"<details class=\"sl-section\" open><summary>{html.escape(title)}</summary>\n{body}\n</details>"
+            )
+        return "\n".join(parts)
+
+    return FRAGMENTS.get_or_build(content_key("combined", payload), _build)
@@ -0,0 +1,571 @@
+"""Sleeper API transport and fetch engine.
+
+Every request is described by an (endpoint, league_id, week) key, the same key `fetch_log` uses. `fetch_resource`
+answers it from the SQLite cache when it can and otherwise goes through `refresh_resource`, which calls Sleeper
+over the shared keep-alive session and writes the payload through to the cache. Refreshes are conditional on the
+validators fetch_log keeps, so an unchanged payload is never rewritten, and single-flight per key, so concurrent
+callers that miss the cache together share one request. Nothing in here imports Streamlit; the dashboard wraps
+these functions in `st.cache_data`.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Iterable, NamedTuple, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from superleague import cache, config, metrics, throttle, ttl
+
+
+@lru_cache(maxsize=None)
+def _open_http_session(pool_size: int) -> requests.Session:
+    """Create the keep-alive session shared by every Sleeper fetcher.
+
+    Connections to api.sleeper.app are pooled and reused across requests, threads and Streamlit sessions,
+    so only the first request per pooled connection pays for the TCP+TLS handshake.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(int(pool_size), 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip, deflate",
+        "User-Agent": "316-super-league-dashboard",
+    })
+    return session
+
+
+def get_http_session() -> requests.Session:
+    return _open_http_session(config.HTTP_POOL_SIZE)
+
+
+class EndpointSpec(NamedTuple):
+    path: str
+    # Regular freshness; `ttl_for` shortens it for live keys while games are on (see superleague.ttl)
+    ttl_seconds: int
+    timeout: Any
+    load: Callable[..., Any]
+    store: Callable[..., Any]
+    prepare: Optional[Callable[[Any, Optional[int]], Any]] = None
+    # Returns True for keys whose cached payload can never change again (e.g. finalized matchup weeks);
+    # those are served from cache regardless of TTL and never revalidated.
+    pinned: Optional[Callable[..., bool]] = None
+    # Reads the typed columns only (no raw_payload decoding); see `fetch_summary`.
+    summary: Optional[Callable[..., Any]] = None
+
+
+ENDPOINTS: Dict[str, EndpointSpec] = {
+    'league': EndpointSpec(
+        "/league/{league_id}", config.CACHE_TTL_SECONDS, (config.HTTP_CONNECT_TIMEOUT, 10), cache.load_cached_league, cache.store_league
+    ),
+    'rosters': EndpointSpec(
+        "/league/{league_id}/rosters",
+        config.CACHE_TTL_SECONDS,
+        (config.HTTP_CONNECT_TIMEOUT, 10),
+        cache.load_cached_rosters,
+        cache.store_rosters,
+        summary=cache.load_roster_summaries,
+    ),
+    'users': EndpointSpec(
+        "/league/{league_id}/users",
+        config.CACHE_TTL_SECONDS,
+        (config.HTTP_CONNECT_TIMEOUT, 10),
+        cache.load_cached_users,
+        cache.store_users,
+        summary=cache.load_user_summaries,
+    ),
+    'matchups': EndpointSpec(
+        "/league/{league_id}/matchups/{week}",
+        config.CACHE_TTL_SECONDS,
+        (config.HTTP_CONNECT_TIMEOUT, 10),
+        cache.load_cached_matchups,
+        cache.store_week_matchups,
+        cache.prepare_matchups,
+        cache.is_week_final,
+        cache.load_matchup_summaries,
+    ),
+    'nfl_state': EndpointSpec(
+        "/state/nfl", config.NFL_STATE_TTL_SECONDS, (config.HTTP_CONNECT_TIMEOUT, 6), cache.load_cached_nfl_state, cache.store_nfl_state
+    ),
+}
+
+
+class FetchResult(NamedTuple):
+    """Outcome of one fetch. `source` is one of 'cache', 'stale', 'network', 'revalidated' or 'fallback'.
+
+    'revalidated' means Sleeper answered 304 or sent a payload identical to the cached one; `validators` are what
+    fetch_log should keep for the next conditional request.
+    """
+
+    data: Any
+    status_code: Optional[int] = None
+    error: Optional[Exception] = None
+    source: str = 'network'
+    validators: Optional[cache.Validators] = None
+
+
+class BackgroundRefresher:
+    """Runs cache revalidations off the request path, at most one in flight per fetch_log key."""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max(int(max_workers), 1), thread_name_prefix="sl-revalidate")
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def submit(self, key: Tuple[str, str, str], task: Callable[[], Any]) -> bool:
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+
+        def _run():
+            try:
+                task()
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        try:
+            self._executor.submit(_run)
+        except RuntimeError:
+            with self._lock:
+                self._pending.discard(key)
+            return False
+        return True
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls per key: the first caller runs the work, later ones wait for and share its result.
+
+    A key is only in flight while its leader runs; the next call after that starts a new flight. Keys must not be
+    re-entered from inside their own flight.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, work: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = work()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+# One flight per fetch_log key across every session, refresher and pool worker in the process
+FLIGHTS = SingleFlight()
+
+
+def fetch_key(endpoint: str, league_id: Optional[str], week: Optional[int]) -> Tuple[str, str, str]:
+    """The (endpoint, league_key, week_key) tuple fetch_log uses for a request."""
+    return (endpoint, cache.normalize_key(league_id), cache.normalize_key(week))
+
+
+@lru_cache(maxsize=None)
+def get_background_refresher() -> BackgroundRefresher:
+    return BackgroundRefresher(max_workers=min(config.FETCH_MAX_WORKERS, 4))
+
+
+# Callbacks run with the (endpoint, league_id, week) of a background revalidation that changed data, keyed by name so
+# a Streamlit rerun replaces its own listener instead of stacking another one.
+RefreshListener = Callable[[str, Optional[str], Optional[int]], None]
+_REFRESH_LISTENERS: Dict[str, RefreshListener] = {}
+
+
+def set_refresh_listener(name: str, callback: Optional[RefreshListener]) -> None:
+    if callback is None:
+        _REFRESH_LISTENERS.pop(name, None)
+    else:
+        _REFRESH_LISTENERS[name] = callback
+
+
+def _notify_refresh_listeners(endpoint: str, league_id: Optional[str], week: Optional[int]) -> None:
+    for name, callback in list(_REFRESH_LISTENERS.items()):
+        try:
+            callback(endpoint, league_id, week)
+        except Exception as exc:
+            metrics.incr('sl_refresh_listener_errors_total', endpoint=endpoint)
+            print(f"Refresh listener {name!r} failed for {fetch_key(endpoint, league_id, week)}: {exc!r}", file=sys.stderr)
+
+
+def schedule_revalidation(endpoint: str, league_id: Optional[str], week: Optional[int]) -> bool:
+    """Queue a background refresh of an expired key; refresh listeners are notified once it lands.
+
+    Nothing is queued while the circuit breaker is open; the key stays stale until Sleeper is reachable again.
+    """
+    if throttle.get_circuit_breaker().is_open():
+        return False
+
+    def _revalidate():
+        result = refresh_resource(endpoint, league_id, week)
+        # A revalidated key kept its payload, so there is nothing for the listeners to drop
+        if result.status_code == 200 and result.source == 'network':
+            _notify_refresh_listeners(endpoint, league_id, week)
+
+    try:
+        return get_background_refresher().submit(fetch_key(endpoint, league_id, week), _revalidate)
+    except Exception:
+        return False
+
+
+# The cached NFL state drives the freshness policy; it is re-read at most once a minute rather than per key.
+_POLICY_STATE_SECONDS = 60
+_policy_state: Dict[str, Any] = {'state': None, 'loaded_at': None}
+_policy_state_lock = threading.Lock()
+
+
+def _current_nfl_state(db: Any) -> Any:
+    now = time.monotonic()
+    with _policy_state_lock:
+        loaded_at = _policy_state['loaded_at']
+        if loaded_at is not None and now - loaded_at < _POLICY_STATE_SECONDS:
+            return _policy_state['state']
+    try:
+        state = cache.load_cached_nfl_state(db) if db else None
+    except Exception:
+        state = None
+    with _policy_state_lock:
+        _policy_state.update(state=state, loaded_at=now)
+    return state
+
+
+def ttl_for(endpoint: str, week: Optional[int] = None, db: Any = None, state: Any = None) -> int:
+    """How long a key of `endpoint` (and `week`) stays fresh right now, per `ttl.ttl_seconds`.
+
+    The NFL state comes from the cache database unless the caller passes one (e.g. without a cache database).
+    """
+    spec = ENDPOINTS[endpoint]
+    if state is None:
+        if db is None:
+            db = cache.get_db_connection()
+        state = _current_nfl_state(db)
+    return ttl.ttl_seconds(endpoint, week, state, default=spec.ttl_seconds)
+
+
+def _cache_state(db: Any, spec: EndpointSpec, endpoint: str, league_id: Optional[str], week: Optional[int]) -> Optional[str]:
+    """'fresh' for fresh or pinned keys, 'stale' for expired ones, None when the key was never fetched."""
+    cached_ts = cache.get_cached_timestamp(db, endpoint, cache.normalize_key(league_id), cache.normalize_key(week))
+    if not cached_ts:
+        return None
+    if cache.is_fresh(cached_ts, ttl_for(endpoint, week, db)) or (spec.pinned is not None and spec.pinned(db, league_id, week)):
+        return 'fresh'
+    return 'stale'
+
+
+def lookup_cached(endpoint: str, league_id: Optional[str] = None, week: Optional[int] = None, allow_stale: bool = False, loader: Optional[Callable[..., Any]] = None) -> Optional[FetchResult]:
+    """Answer a key from the SQLite cache alone.
+
+    Returns a 'cache' result for fresh or pinned rows, a 'stale' result for expired rows when `allow_stale` is set,
+    and None when the key has to go to the network. `loader` replaces the endpoint's full-payload loader.
+    """
+    spec = ENDPOINTS[endpoint]
+    db = cache.get_db_connection()
+    if not db:
+        return None
+    try:
+        state = _cache_state(db, spec, endpoint, league_id, week)
+        if state == 'fresh' or (state == 'stale' and allow_stale):
+            cached = (loader or spec.load)(db, league_id, week)
+            if cached is not None:
+                return FetchResult(cached, source='cache' if state == 'fresh' else 'stale')
+    except Exception:
+        pass
+    return None
+
+
+def fetch_resource(endpoint: str, league_id: Optional[str] = None, week: Optional[int] = None, allow_stale: Optional[bool] = None) -> FetchResult:
+    """Fetch one (endpoint, league, week) resource through the SQLite cache.
+
+    Fresh cache rows, and pinned ones such as finalized matchup weeks, are served without touching the network.
+    Expired rows are still served immediately in stale-while-revalidate mode (`SL_STALE_WHILE_REVALIDATE`, on by
+    default; `allow_stale` overrides it) while a background worker refreshes them; only a key with nothing cached
+    at all waits on Sleeper. While the circuit breaker is open expired rows are always served.
+    """
+    if allow_stale is None:
+        allow_stale = config.STALE_WHILE_REVALIDATE
+    allow_stale = allow_stale or throttle.get_circuit_breaker().is_open()
+
+    result = lookup_cached(endpoint, league_id, week, allow_stale=allow_stale)
+    if result is None:
+        result = FLIGHTS.do(fetch_key(endpoint, league_id, week), lambda: _fetch_missing(endpoint, league_id, week))
+    elif result.source == 'stale':
+        schedule_revalidation(endpoint, league_id, week)
+    metrics.incr('sl_fetch_total', endpoint=endpoint, source=result.source)
+    return result
+
+
+def _fetch_missing(endpoint: str, league_id: Optional[str], week: Optional[int]) -> FetchResult:
+    """Cache-miss path, run once per flight: a flight that landed since the caller's lookup may have filled the key."""
+    cached = lookup_cached(endpoint, league_id, week)
+    if cached is not None:
+        return cached
+    return _refresh_resource(endpoint, league_id, week)
+
+
+def fetch_summary(endpoint: str, league_id: Optional[str] = None, week: Optional[int] = None, allow_stale: Optional[bool] = None) -> FetchResult:
+    """Like `fetch_resource`, but answer from the typed cache columns (`EndpointSpec.summary`).
+
+    The result holds payload-shaped dicts with only the fields the dashboard reads, whether it was served from the
+    cache or just fetched, so cache hits never decode raw_payload. Without a cache database, or for endpoints that
+    have no summary loader, this is `fetch_resource`.
+    """
+    spec = ENDPOINTS[endpoint]
+    db = cache.get_db_connection()
+    if not db or spec.summary is None:
+        return fetch_resource(endpoint, league_id, week, allow_stale)
+    if allow_stale is None:
+        allow_stale = config.STALE_WHILE_REVALIDATE
+    allow_stale = allow_stale or throttle.get_circuit_breaker().is_open()
+
+    cached = lookup_cached(endpoint, league_id, week, allow_stale=allow_stale, loader=spec.summary)
+    if cached is not None:
+        if cached.source == 'stale':
+            schedule_revalidation(endpoint, league_id, week)
+        metrics.incr('sl_fetch_total', endpoint=endpoint, source=cached.source)
+        return cached
+
+    result = FLIGHTS.do(fetch_key(endpoint, league_id, week), lambda: _fetch_missing(endpoint, league_id, week))
+    metrics.incr('sl_fetch_total', endpoint=endpoint, source=result.source)
+    try:
+        summary = spec.summary(db, league_id, week)
+    except Exception:
+        summary = None
+    return result._replace(data=summary) if summary is not None else result
+
+
+def _get_with_retries(endpoint: str, url: str, timeout: Any, headers: Optional[Dict[str, str]]) -> requests.Response:
+    """GET `url` through the shared rate limiter, retrying 429/5xx answers and network errors with backoff.
+
+    The last response is returned even if it is still a 429/5xx. Raises `throttle.CircuitOpenError` without
+    calling Sleeper while the circuit breaker is open. Every attempt is recorded in `metrics` under `endpoint`.
+    """
+    breaker = throttle.get_circuit_breaker()
+    if not breaker.allow():
+        metrics.incr('sl_http_circuit_open_total', endpoint=endpoint)
+        raise throttle.CircuitOpenError("Sleeper circuit breaker is open")
+    attempts = config.HTTP_RETRIES + 1
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        metrics.observe('sl_rate_limit_wait_seconds', throttle.get_rate_limiter().acquire())
+        started = time.perf_counter()
+        try:
+            response = get_http_session().get(url, timeout=timeout, headers=headers)
+        except requests.RequestException:
+            metrics.observe('sl_http_request_seconds', time.perf_counter() - started, endpoint=endpoint, status='error')
+            if last:
+                breaker.record_failure()
+                raise
+            metrics.incr('sl_http_retries_total', endpoint=endpoint, reason='error')
+            time.sleep(throttle.backoff_seconds(attempt))
+            continue
+        except Exception:
+            breaker.record_failure()
+            raise
+        metrics.observe('sl_http_request_seconds', time.perf_counter() - started, endpoint=endpoint, status=response.status_code)
+        metrics.incr('sl_http_response_bytes_total', len(response.content or b''), endpoint=endpoint)
+        if response.status_code in throttle.RETRY_STATUSES:
+            if last:
+                breaker.record_failure()
+                return response
+            metrics.incr('sl_http_retries_total', endpoint=endpoint, reason=response.status_code)
+            time.sleep(throttle.backoff_seconds(attempt, response.headers.get("Retry-After")))
+            continue
+        breaker.record_success()
+        return response
+
+
+def download_resource(
+    endpoint: str,
+    league_id: Optional[str] = None,
+    week: Optional[int] = None,
+    validators: Optional[cache.Validators] = None,
+) -> FetchResult:
+    """Query Sleeper for one resource without touching the cache; a 200 comes back already `prepare`d.
+
+    With `validators` the request is conditional (If-None-Match / If-Modified-Since). A 304, or a 200 whose body
+    hashes to the stored `payload_hash`, comes back as a 'revalidated' result with `data=None` and without parsing
+    the body. Any other status yields `data=None`; a network error (after retries, see `_get_with_retries`) or an
+    open circuit breaker is returned in `error`.
+    """
+    spec = ENDPOINTS[endpoint]
+    url = config.SLEEPER_API_BASE + spec.path.format(league_id=league_id, week=week)
+    headers = {}
+    if validators is not None:
+        if validators.etag:
+            headers["If-None-Match"] = validators.etag
+        if validators.last_modified:
+            headers["If-Modified-Since"] = validators.last_modified
+    try:
+        response = _get_with_retries(endpoint, url, spec.timeout, headers or None)
+        status_code = getattr(response, 'status_code', None)
+        if status_code == 304 and validators is not None:
+            kept = validators._replace(
+                etag=response.headers.get("ETag") or validators.etag,
+                last_modified=response.headers.get("Last-Modified") or validators.last_modified,
+            )
+            return FetchResult(None, status_code, source='revalidated', validators=kept)
+        if status_code != 200:
+            return FetchResult(None, status_code)
+        received = cache.Validators(
+            response.headers.get("ETag"), response.headers.get("Last-Modified"), cache.payload_hash(response.content)
+        )
+        if validators is not None and validators.payload_hash == received.payload_hash:
+            return FetchResult(None, status_code, source='revalidated', validators=received)
+        data = response.json()
+        if spec.prepare is not None:
+            data = spec.prepare(data, week)
+        return FetchResult(data, status_code, validators=received)
+    except Exception as exc:
+        return FetchResult(None, None, exc)
+
+
+def refresh_resource(endpoint: str, league_id: Optional[str] = None, week: Optional[int] = None) -> FetchResult:
+    """Query Sleeper for one resource and write a 200 through to the cache.
+
+    Concurrent refreshes (and cache misses) of the same key share one request; see `_refresh_resource`.
+    """
+    return FLIGHTS.do(fetch_key(endpoint, league_id, week), lambda: _refresh_resource(endpoint, league_id, week))
+
+
+def _refresh_resource(endpoint: str, league_id: Optional[str] = None, week: Optional[int] = None) -> FetchResult:
+    """Download one resource and write a 200 through to the cache; run inside the key's flight.
+
+    The request is conditional on the validators in fetch_log; when the payload did not change only its fetched_at
+    moves and the cached payload is returned as a 'revalidated' result. A new payload whose rows all match the
+    cached ones (by row hash) is also reported as 'revalidated', so refresh listeners only hear about real changes. On a bad status or a network error the last
+    cached payload (if any) is returned instead.
+    """
+    spec = ENDPOINTS[endpoint]
+    db = cache.get_db_connection()
+    league_key = cache.normalize_key(league_id)
+    week_key = cache.normalize_key(week)
+
+    def _fallback():
+        if not db:
+            return None
+        try:
+            return spec.load(db, league_id, week)
+        except Exception:
+            return None
+
+    validators = None
+    if db:
+        try:
+            validators = cache.get_validators(db, endpoint, league_key, week_key)
+        except Exception:
+            validators = None
+
+    result = download_resource(endpoint, league_id, week, validators)
+    if result.source == 'revalidated':
+        cached = _fallback()
+        if cached is not None:
+            try:
+                cache.record_unchanged(db, endpoint, league_id, week, result.status_code, result.validators)
+            except Exception:
+                pass
+            metrics.incr('sl_refresh_total', endpoint=endpoint, source='revalidated')
+            return result._replace(data=cached)
+        # The validators outlived the cached rows; fetch the payload unconditionally
+        result = download_resource(endpoint, league_id, week)
+
+    if result.status_code == 200:
+        data = result.data
+        source = 'network'
+        if db:
+            try:
+                changed_before = cache.get_changed_at(db, endpoint, league_key, week_key)
+                stored = spec.store(db, league_id, week, data)
+                if stored is not None:
+                    data = stored
+                cache.record_fetch_log(db, endpoint, league_key, week_key, result.status_code, None, result.validators)
+                # Storers that track row hashes leave changed_at alone when every row was already up to date
+                changed_after = cache.get_changed_at(db, endpoint, league_key, week_key)
+                if changed_after is not None and changed_after == changed_before:
+                    source = 'revalidated'
+                if endpoint == 'nfl_state':
+                    with _policy_state_lock:
+                        _policy_state['loaded_at'] = None
+            except Exception:
+                pass
+        metrics.incr('sl_refresh_total', endpoint=endpoint, source=source)
+        return FetchResult(data, result.status_code, source=source, validators=result.validators)
+
+    # Nothing was sent while the circuit breaker is open, so there is no attempt to log
+    if db and not isinstance(result.error, throttle.CircuitOpenError):
+        try:
+            error = str(result.error) if result.error is not None else f'status {result.status_code}'
+            cache.record_fetch_log(db, endpoint, league_key, week_key, result.status_code, error)
+        except Exception:
+            pass
+    metrics.incr('sl_refresh_total', endpoint=endpoint, source='fallback')
+    return FetchResult(_fallback(), result.status_code, result.error, source='fallback')
+
+
+def run_parallel(
+    tasks: Iterable[Callable[[], Any]],
+    max_workers: Optional[int] = None,
+    initializer: Optional[Callable[[], None]] = None,
+) -> list:
+    """Run zero-argument callables on a bounded thread pool and return their results in order.
+
+    `initializer` runs once in each worker thread (the dashboard uses it to attach its script context).
+    A task that raises yields None.
+    """
+    task_list = list(tasks)
+    if not task_list:
+        return []
+    workers = min(max_workers or config.FETCH_MAX_WORKERS, len(task_list))
+    if workers <= 1:
+        results = []
+        for task in task_list:
+            try:
+                results.append(task())
+            except Exception:
+                results.append(None)
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sl-fetch", initializer=initializer) as pool:
+        futures = [pool.submit(task) for task in task_list]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception:
+            results.append(None)
+    return results
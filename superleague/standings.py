@@ -0,0 +1,37 @@
+"""League standings rows, as stored in the cache's materialized `standings` table.
+
+`cache` recomputes that table in SQL whenever rosters or users are written; `compute_standings` produces the same
+rows in Python for runs without a cache database.
+"""
+
+from typing import Any, Iterable, List, Mapping
+
+from superleague import config
+from superleague.teams import TeamIndex
+
+
+def compute_standings(rosters: Iterable[Mapping[str, Any]], team_index: TeamIndex) -> List[dict]:
+    """Rank rosters by wins, then points for (to one decimal), then roster_id."""
+    rows = []
+    for roster in rosters or []:
+        if not isinstance(roster, Mapping):
+            continue
+        settings = roster.get('settings') or {}
+        roster_id = roster.get('roster_id')
+        rows.append({
+            'roster_id': roster_id,
+            'team_name': team_index.name_for(roster_id),
+            'wins': settings.get('wins') or 0,
+            'losses': settings.get('losses') or 0,
+            'ties': settings.get('ties') or 0,
+            'points_for': round(settings.get('fpts') or 0, 1),
+            'points_against': round(settings.get('fpts_against') or 0, 1),
+        })
+
+    rows.sort(key=lambda row: (-row['wins'], -row['points_for'], row['roster_id'] if row['roster_id'] is not None else 0))
+    zone = config.STANDINGS_ZONE_SIZE
+    for rank, row in enumerate(rows, start=1):
+        row['rank'] = rank
+        row['promotion_zone'] = rank <= zone
+        row['relegation_zone'] = rank > len(rows) - zone
+    return rows
@@ -0,0 +1,54 @@
+"""Per-league lookup index from roster_id to owner to display name.
+
+Highlights and standings resolve a team name for many entries per render; going through the raw roster and user
+lists each time is a linear scan per lookup. `TeamIndex` is built once from a league's rosters and users and then
+answers each lookup with two dict hits.
+"""
+
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from superleague import cache
+
+
+def team_name(user: Optional[Mapping[str, Any]], roster_id: Any) -> str:
+    """Pick a user's team name, display name or username, falling back to 'Team {roster_id}'."""
+    fallback = f"Team {roster_id}"
+    if not user:
+        return fallback
+    metadata = user.get('metadata') or {}
+    if metadata.get('team_name'):
+        return metadata['team_name']
+    if user.get('display_name'):
+        return user['display_name']
+    return user.get('username', fallback)
+
+
+class TeamIndex:
+    """roster_id -> owner_id and owner_id -> user for one league."""
+
+    def __init__(self, rosters: Iterable[Mapping[str, Any]], users: Iterable[Mapping[str, Any]]):
+        self.owners: Dict[int, Any] = {}
+        self.users: Dict[Any, Mapping[str, Any]] = {}
+        for roster in rosters or []:
+            if not isinstance(roster, Mapping):
+                continue
+            roster_id = cache.to_int(roster.get('roster_id'))
+            if roster_id is not None:
+                self.owners.setdefault(roster_id, roster.get('owner_id'))
+        for user in users or []:
+            if isinstance(user, Mapping) and user.get('user_id') is not None:
+                # The first user with a given id wins, matching the old linear scan.
+                self.users.setdefault(user['user_id'], user)
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+    def owner_for(self, roster_id: Any) -> Optional[Any]:
+        return self.owners.get(cache.to_int(roster_id))
+
+    def name_for(self, roster_id: Any) -> str:
+        """Resolve a human-friendly team name for a roster_id, or 'Team {roster_id}' when it is unknown."""
+        owner_id = self.owner_for(roster_id)
+        if owner_id is None:
+            return f"Team {roster_id}"
+        return team_name(self.users.get(owner_id), roster_id)
@@ -0,0 +1,121 @@
+"""Client-side protection for the Sleeper API: a token-bucket rate limiter, retry backoff and a circuit breaker.
+
+`sleeper.download_resource` takes a token before every request, retries 429s, 5xx answers and timeouts a bounded
+number of times with jittered exponential backoff, and reports each outcome to the breaker. After
+`config.BREAKER_THRESHOLD` consecutive failures the breaker opens: requests fail at once (the fetch engine then
+serves whatever is cached) until the cooldown has passed, when a single probe request decides whether to close it.
+"""
+
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from superleague import config
+
+# Statuses worth retrying; anything else (404, 400, ...) is an answer, not a hiccup.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`; shared across threads."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = max(int(capacity), 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller has to wait for it (the balance may go negative)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Sleeper while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures -> half-open after `cooldown` seconds.
+
+    While half-open one caller is let through as a probe; its success closes the circuit, its failure reopens it.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = max(int(threshold), 1)
+        self.cooldown = float(cooldown)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                return 'half-open'
+            return 'open'
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected (a half-open circuit waiting for its probe counts as closed)."""
+        return self.state() == 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+def backoff_seconds(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Delay before retry number `attempt` (0-based): full jitter over an exponential cap, or Sleeper's Retry-After."""
+    cap = min(config.RETRY_BACKOFF_MAX_SECONDS, config.RETRY_BACKOFF_SECONDS * (2 ** attempt))
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), config.RETRY_BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass
+    return random.uniform(0, cap)
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter() -> TokenBucket:
+    return TokenBucket(config.HTTP_RATE, config.HTTP_BURST)
+
+
+@lru_cache(maxsize=None)
+def get_circuit_breaker() -> CircuitBreaker:
+    return CircuitBreaker(config.BREAKER_THRESHOLD, config.BREAKER_COOLDOWN_SECONDS)
@@ -0,0 +1,103 @@
+"""Freshness policy: how long a cached (endpoint, week) key stays fresh, given the NFL state and the clock.
+
+Scores only move while games are on, so the current week's matchups are revalidated every minute during the game
+windows (America/New_York), every 15 minutes on the rest of a game day and at the regular TTL otherwise. Rosters
+(records and points for) follow the games more loosely; league info and users never speed up. Out of season
+everything uses the endpoint's regular TTL. Finalized weeks stay pinned by the fetch engine and never expire.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Mapping, Optional
+from zoneinfo import ZoneInfo
+
+from superleague import cache, config
+
+EASTERN = ZoneInfo("America/New_York")
+_DAY_MINUTES = 24 * 60
+
+# (weekday, start, end) in minutes after midnight Eastern, Monday = 0. `end` may run past midnight, since late
+# games and overtime finish after it.
+GAME_WINDOWS = (
+    (0, 19 * 60, 25 * 60),  # Monday night
+    (3, 12 * 60 + 30, 25 * 60),  # Thursday night (Thanksgiving kicks off at 12:30)
+    (6, 9 * 60 + 30, 25 * 60),  # Sunday, from the London games through Sunday night
+)
+# Saturday games are scheduled from this week on
+LATE_SEASON_WEEK = 15
+LATE_SEASON_WINDOWS = ((5, 13 * 60, 25 * 60),)
+IN_SEASON_TYPES = ("regular", "post")
+# Regular season length when the league settings do not say (Sleeper's default playoff start is week 15)
+DEFAULT_REGULAR_SEASON_END = 14
+
+
+def in_season(state: Any) -> bool:
+    return isinstance(state, dict) and state.get('season_type') in IN_SEASON_TYPES
+
+
+def regular_season_end(league_info: Any) -> int:
+    """Last regular-season week: the week before `settings.playoff_week_start`."""
+    settings = league_info.get('settings') if isinstance(league_info, Mapping) else None
+    start = cache.to_int(settings.get('playoff_week_start')) if isinstance(settings, Mapping) else None
+    if not start or start < 2:
+        return DEFAULT_REGULAR_SEASON_END
+    return min(start - 1, config.MAX_SEASON_WEEKS)
+
+
+def _windows(current_week: Optional[int]):
+    if current_week is not None and current_week >= LATE_SEASON_WEEK:
+        return GAME_WINDOWS + LATE_SEASON_WINDOWS
+    return GAME_WINDOWS
+
+
+def in_game_window(now: datetime, current_week: Optional[int] = None) -> bool:
+    local = now.astimezone(EASTERN)
+    minute = local.hour * 60 + local.minute
+    day = local.weekday()
+    for weekday, start, end in _windows(current_week):
+        if day == weekday and start <= minute < min(end, _DAY_MINUTES):
+            return True
+        if day == (weekday + 1) % 7 and minute < end - _DAY_MINUTES:
+            return True
+    return False
+
+
+def is_game_day(now: datetime, current_week: Optional[int] = None) -> bool:
+    day = now.astimezone(EASTERN).weekday()
+    return any(day == weekday for weekday, _, _ in _windows(current_week)) or in_game_window(now, current_week)
+
+
+def ttl_seconds(
+    endpoint: str,
+    week: Optional[int] = None,
+    state: Any = None,
+    now: Optional[datetime] = None,
+    default: Optional[int] = None,
+) -> int:
+    """Seconds a cached key stays fresh right now; `default` is the endpoint's regular TTL."""
+    regular = default if default is not None else (
+        config.NFL_STATE_TTL_SECONDS if endpoint == 'nfl_state' else config.CACHE_TTL_SECONDS
+    )
+    if not in_season(state):
+        return regular if endpoint != 'nfl_state' else config.CACHE_TTL_SECONDS
+    if endpoint not in ('rosters', 'matchups'):
+        return regular
+
+    now = now or datetime.now(timezone.utc)
+    current_week = cache.to_int(state.get('week'))
+    live = in_game_window(now, current_week)
+    game_day = is_game_day(now, current_week)
+    if endpoint == 'rosters':
+        if live:
+            return min(config.GAME_DAY_TTL_SECONDS, regular)
+        return min(config.NFL_STATE_TTL_SECONDS, regular) if game_day else regular
+
+    week = cache.to_int(week)
+    if week is None or current_week is None:
+        return regular
+    if week == current_week:
+        if live:
+            return min(config.LIVE_TTL_SECONDS, regular)
+        return min(config.GAME_DAY_TTL_SECONDS, regular) if game_day else regular
+    if week == current_week - 1:
+        return min(config.RECENT_WEEK_TTL_SECONDS, regular)
+    return regular
@@ -0,0 +1,13 @@
+"""Shared fixtures."""
+
+import pytest
+
+from superleague import cache, config
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A throwaway cache database with the full schema."""
+    database = cache.CacheDatabase(tmp_path / "sleeper_cache.db", config.read_sqlite_profile(), config.SQLITE_READERS)
+    yield database
+    database.close()
@@ -0,0 +1,19 @@
+"""Small Sleeper-shaped payloads for the tests."""
+
+STATE_OFFSEASON = {'season_type': 'off'}
+
+
+def roster(roster_id, owner_id, wins, losses, fpts, ties=0, fpts_against=0.0):
+    return {
+        'roster_id': roster_id,
+        'owner_id': owner_id,
+        'settings': {'wins': wins, 'losses': losses, 'ties': ties, 'fpts': fpts, 'fpts_against': fpts_against},
+    }
+
+
+def user(user_id, display_name, team_name=None):
+    return {'user_id': user_id, 'display_name': display_name, 'username': display_name.lower(), 'metadata': {'team_name': team_name}}
+
+
+def entry(roster_id, matchup_id, points):
+    return {'roster_id': roster_id, 'matchup_id': matchup_id, 'points': points}
@@ -0,0 +1,81 @@
+import pytest
+
+from superleague import cache, highlights, standings, teams
+from tests.payloads import STATE_OFFSEASON, entry, roster, user
+
+COMPLETE_WEEK = [entry(1, 1, 101.5), entry(2, 1, 99.0)]
+UNPLAYED_WEEK = [entry(1, 1, 0), entry(2, 1, 0)]
+PARTIAL_WEEK = [entry(1, 1, 101.5), entry(2, 1, None)]
+
+
+@pytest.mark.parametrize('state, week, items, final', [
+    (None, 1, COMPLETE_WEEK, False),
+    (STATE_OFFSEASON, 17, COMPLETE_WEEK, True),
+    (STATE_OFFSEASON, 17, UNPLAYED_WEEK, False),
+    ({'season_type': 'regular', 'week': 10}, 8, COMPLETE_WEEK, True),
+    # The previous week is still open to stat corrections
+    ({'season_type': 'regular', 'week': 10}, 9, COMPLETE_WEEK, False),
+    ({'season_type': 'regular', 'week': 10}, 10, COMPLETE_WEEK, False),
+    ({'season_type': 'regular', 'week': 10}, 8, PARTIAL_WEEK, False),
+    ({'season_type': 'regular'}, 1, COMPLETE_WEEK, False),
+])
+def test_week_can_be_finalized(state, week, items, final):
+    assert cache.week_can_be_finalized(state, week, items) is final
+
+
+ROSTERS = [
+    roster(1, 'u1', 7, 2, 1201.24),
+    roster(2, 'u2', 7, 2, 1201.26),
+    roster(3, 'u3', 5, 4, 1100.0),
+    roster(4, 'u4', 5, 4, 1100.0),
+    roster(5, None, 3, 6, 990.5),
+    roster(6, 'u6', 2, 7, 1010.0, ties=1),
+    roster(7, 'u7', 1, 8, 880.0),
+]
+USERS = [
+    user('u1', 'Alice', 'Gridiron Gang'),
+    user('u2', 'Bob'),
+    user('u3', 'Cara', ''),
+    user('u4', 'Dan', 'Dan Dynasty'),
+    user('u6', 'Eve'),
+]
+
+
+def test_materialized_standings_match_compute_standings(db):
+    cache.bulk_store(db, [('rosters', 'L1', None, ROSTERS), ('users', 'L1', None, USERS)])
+    expected = standings.compute_standings(ROSTERS, teams.TeamIndex(ROSTERS, USERS))
+    assert cache.load_standings(db, 'L1') == expected
+
+
+# Week 1 has a bye (no matchup_id) and a tie; week 2 a three-way tie and an unpaired roster
+WEEKS = {
+    1: [entry(1, 1, 120.0), entry(2, 1, 95.5), entry(3, 2, 95.5), entry(4, 2, 80.0), {'roster_id': 5, 'matchup_id': None, 'points': 130.0}],
+    2: [entry(1, 1, 88.0), entry(3, 1, 101.0), entry(2, 2, 99.0), entry(5, 2, 99.0), entry(4, 3, 99.0)],
+}
+
+
+def _pandas_all_play(weeks):
+    frame = highlights.build_frame(
+        dict(item, league='L1', week=week) for week, items in weeks.items() for item in items
+    )
+    totals = highlights.all_play_totals(highlights.all_play_weeks(frame))
+    return {
+        int(row['roster_id']): (row['wins'], row['losses'], row['ties'], pytest.approx(row['expected_wins']))
+        for row in totals.to_dict('records')
+    }
+
+
+def test_materialized_all_play_matches_the_pandas_kernel(db):
+    cache.bulk_store(db, [('matchups', 'L1', week, items) for week, items in WEEKS.items()], state=STATE_OFFSEASON)
+    rows, weeks = cache.load_all_play(db, 'L1', 2)
+    assert sorted(weeks) == [1, 2]
+    stored = {row['roster_id']: (row['wins'], row['losses'], row['ties'], row['expected_wins']) for row in rows}
+    assert stored == _pandas_all_play(WEEKS)
+
+
+def test_all_play_leaves_byes_out():
+    totals = _pandas_all_play({1: WEEKS[1]})
+    assert 5 not in totals
+    assert totals[1] == (3, 0, 0, pytest.approx(1.0))
+    # Tied with roster 3 and ahead of roster 4
+    assert totals[2] == (1, 1, 1, pytest.approx(0.5))
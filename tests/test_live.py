@@ -0,0 +1,24 @@
+from superleague import live
+
+
+def _entry(roster_id, matchup_id, points):
+    return {'league': 'L1', 'roster_id': roster_id, 'matchup_id': matchup_id, 'points': points}
+
+
+def test_diff_scores_without_a_previous_snapshot_reports_nothing():
+    snapshot, changed = live.diff_scores(None, [_entry(1, 1, 10.0), _entry(2, 1, 12.5)])
+    assert snapshot == {('L1', 1, 1): 10.0, ('L1', 1, 2): 12.5}
+    assert changed == set()
+
+
+def test_diff_scores_reports_moved_and_new_scores():
+    previous, _ = live.diff_scores(None, [_entry(1, 1, 10.0), _entry(2, 1, None), _entry(3, 2, 7.0)])
+    snapshot, changed = live.diff_scores(previous, [_entry(1, 1, 10.0), _entry(2, 1, 3.5), _entry(3, 2, 9.25), _entry(4, 2, 0.0)])
+    assert changed == {('L1', 1, 2), ('L1', 2, 3), ('L1', 2, 4)}
+    assert snapshot[('L1', 2, 3)] == 9.25
+
+
+def test_diff_scores_treats_numeric_strings_as_scores():
+    previous, _ = live.diff_scores(None, [_entry(1, 1, 10.0)])
+    _, changed = live.diff_scores(previous, [_entry(1, 1, "10.0")])
+    assert changed == set()
@@ -0,0 +1,42 @@
+import pytest
+
+from superleague import cache, metrics
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fresh = metrics.Registry()
+    monkeypatch.setattr(metrics, 'REGISTRY', fresh)
+    return fresh
+
+
+def _totals(db):
+    return {(s.name, s.labels): (s.count, s.total) for s in metrics.load_series(db)}
+
+
+def test_flush_adds_deltas_once(db, registry):
+    registry.incr('sl_fetch_total', endpoint='league', source='cache')
+    registry.observe('sl_stage_seconds', 0.02, stage='total')
+    assert metrics.flush(db) == 2
+    assert metrics.flush(db) == 0
+    registry.incr('sl_fetch_total', 2, endpoint='league', source='cache')
+    metrics.flush(db)
+    assert _totals(db)[('sl_fetch_total', (('endpoint', 'league'), ('source', 'cache')))][1] == 3.0
+
+
+def test_failed_flush_keeps_the_deltas(db, registry, monkeypatch):
+    registry.incr('sl_fetch_total', endpoint='league', source='cache')
+
+    def locked(*args):
+        raise RuntimeError("database is locked")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(cache, 'add_metric_samples', locked)
+        with pytest.raises(RuntimeError):
+            metrics.flush(db)
+    assert len(registry.pending()) == 1
+
+    registry.incr('sl_fetch_total', endpoint='league', source='cache')
+    metrics.flush(db)
+    assert registry.pending() == []
+    assert _totals(db)[('sl_fetch_total', (('endpoint', 'league'), ('source', 'cache')))][1] == 2.0
@@ -0,0 +1,59 @@
+import pytest
+
+from superleague import config, odds, ttl
+
+TEAMS = 6
+STANDINGS = [{'roster_id': roster_id, 'wins': 0, 'points_for': 0.0} for roster_id in range(1, TEAMS + 1)]
+SCORES = {roster_id: [80.0 + 10 * roster_id, 85.0 + 10 * roster_id, 90.0 + 10 * roster_id] for roster_id in range(1, TEAMS + 1)}
+SCHEDULE = [[(1, 2), (3, 4), (5, 6)], [(1, 3), (2, 5), (4, 6)], [(1, 4), (2, 6), (3, 5)]]
+
+
+def _simulate(**kwargs):
+    arguments = dict(promotion_allowed=True, demotion_allowed=True, simulations=2000, zone=2)
+    arguments.update(kwargs)
+    return odds.simulate(STANDINGS, SCORES, SCHEDULE, **arguments)
+
+
+def test_simulate_is_deterministic_for_a_fixed_seed():
+    assert _simulate() == _simulate()
+
+
+def test_simulate_odds_are_distributions_over_the_zones():
+    result = _simulate()
+    assert set(result) == set(range(1, TEAMS + 1))
+    for zone_odds in result.values():
+        assert sum(zone_odds) == pytest.approx(1.0)
+    # Every simulated season fills each zone exactly
+    assert sum(zone_odds.promotion for zone_odds in result.values()) == pytest.approx(2)
+    assert sum(zone_odds.relegation for zone_odds in result.values()) == pytest.approx(2)
+
+
+def test_simulate_favours_the_stronger_teams():
+    result = _simulate()
+    assert result[6].promotion > result[1].promotion
+    assert result[1].relegation > result[6].relegation
+
+
+def test_simulate_without_zones_counts_everyone_safe():
+    result = _simulate(promotion_allowed=False, demotion_allowed=False)
+    assert all(zone_odds == odds.ZoneOdds(0.0, 1.0, 0.0) for zone_odds in result.values())
+
+
+def test_simulate_with_no_games_left_is_the_current_table():
+    standings = [dict(row, wins=row['roster_id']) for row in STANDINGS]
+    result = odds.simulate(standings, SCORES, [], True, True, simulations=100, zone=2)
+    assert result[5].promotion == result[6].promotion == 1.0
+    assert result[1].relegation == result[2].relegation == 1.0
+    assert result[3].safe == result[4].safe == 1.0
+
+
+def test_league_odds_is_off_without_simulations_or_remaining_weeks():
+    assert odds.league_odds(STANDINGS, [], 10, 14, True, True, simulations=0) is None
+    assert odds.league_odds(STANDINGS, [], 14, 14, True, True, simulations=100) is None
+
+
+def test_regular_season_end():
+    assert ttl.regular_season_end({'settings': {'playoff_week_start': 15}}) == 14
+    assert ttl.regular_season_end({'settings': {'playoff_week_start': 0}}) == ttl.DEFAULT_REGULAR_SEASON_END
+    assert ttl.regular_season_end(None) == ttl.DEFAULT_REGULAR_SEASON_END
+    assert ttl.regular_season_end({'settings': {'playoff_week_start': 40}}) == config.MAX_SEASON_WEEKS
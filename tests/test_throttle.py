@@ -0,0 +1,73 @@
+import pytest
+
+from superleague import throttle
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(throttle.time, 'monotonic', fake)
+    monkeypatch.setattr(throttle.time, 'sleep', lambda seconds: setattr(fake, 'now', fake.now + seconds))
+    return fake
+
+
+def test_token_bucket_allows_a_burst_then_paces(clock):
+    bucket = throttle.TokenBucket(rate=2, capacity=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = throttle.TokenBucket(rate=1, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_token_bucket_without_a_rate_never_waits(clock):
+    bucket = throttle.TokenBucket(rate=0, capacity=1)
+    assert all(bucket.acquire() == 0.0 for _ in range(100))
+
+
+def test_circuit_breaker_opens_after_consecutive_failures(clock):
+    breaker = throttle.CircuitBreaker(threshold=3, cooldown=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state() == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state() == 'open'
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+
+def test_circuit_breaker_lets_one_probe_through_after_the_cooldown(clock):
+    breaker = throttle.CircuitBreaker(threshold=1, cooldown=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state() == 'half-open'
+    assert not breaker.is_open()
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state() == 'open'
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state() == 'closed'
+    assert breaker.allow() and breaker.allow()